@@ -5,6 +5,7 @@ from airflow import DAG
 from airflow.decorators import task
 from pipelines.extract import extract_from_adzuna, extract_from_ft, extract_from_jsearch
 from pipelines.load import load_jobs_to_db, mark_missing_offers_inactive
+from pipelines.maintenance import maintain_job_offers_log
 from pipelines.transform import (
     transform_jobs)
 import requests
@@ -43,6 +44,14 @@ with DAG("job_market_ETL",
 
     transform = transform_raw_jobs()
 
+    @task(task_id="build_recommender_index")
+    def build_index():
+        # Import différé : scikit-learn n'est chargé que par cette tâche, pas au parsing du DAG
+        from pipelines.recommender_index import build_recommender_index
+        return build_recommender_index()
+
+    recommender_index = build_index()
+
     with TaskGroup("load") as load_group:
         @task(task_id="load_to_database")
         def load_jobs_to_database():
@@ -58,7 +67,14 @@ with DAG("job_market_ETL",
 
         update_jobs_status = mark_jobs_inactive()
 
-        load_group_tasks = load >> update_jobs_status
+
+        @task(task_id="maintain_logs")
+        def maintain_logs():
+            return maintain_job_offers_log()
+
+        maintain_logs_task = maintain_logs()
+
+        load_group_tasks = load >> update_jobs_status >> maintain_logs_task
 
 
     @task(task_id = "reload_api_data")
@@ -69,4 +85,4 @@ with DAG("job_market_ETL",
 
     reload_api = reload_api_data()
 
-    etl = extract_group >> transform >> reload_api >> load_group
\ No newline at end of file
+    etl = extract_group >> transform >> recommender_index >> reload_api >> load_group
\ No newline at end of file
@@ -10,6 +10,7 @@ from .routes.recommend import router as recommend_router
 from .routes.companies import router as companies_router
 from .routes.jobs import router as jobs_router
 from .routes.reload import router as reload_router
+from .routes.metrics import router as metrics_router
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -60,3 +61,4 @@ app.include_router(recommend_router)
 app.include_router(companies_router)
 app.include_router(jobs_router)
 app.include_router(reload_router)
+app.include_router(metrics_router)
@@ -6,8 +6,9 @@ from fastapi import APIRouter
 from typing import List
 from API.schemas.company import CompanyResponse
 from pipelines.transform import PROCESSED_DATA_DIR
+from pipelines.records import ProcessedOffer
+from fetch_functions.utils import load_json_safely
 import os
-import json
 import glob
 import hashlib
 
@@ -32,8 +33,7 @@ def list_companies():
     if not files:
         return []
     latest_file = max(files, key=os.path.getmtime)
-    with open(latest_file, "r", encoding="utf-8") as f:
-        offers = json.load(f)
+    offers = load_json_safely(latest_file, list[ProcessedOffer]) or []
 
     # Extraire entreprises distinctes
     companies_seen = set()
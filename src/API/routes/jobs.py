@@ -2,7 +2,8 @@ from fastapi import APIRouter, Query
 from typing import Optional
 from datetime import datetime
 from API.schemas.job import JobOfferResponse
-from API.routes.recommend import offers
+from API.routes import recommend
+from storage.description_store import get_description
 import random
 
 router = APIRouter()
@@ -23,6 +24,8 @@ def list_jobs(
     page_size: int = Query(20, ge=1, le=100, description="Taille de page"),
     seed: Optional[str] = Query(None, description="Seed pour randomisation stable"),
 ):
+    # Offres et stockage des descriptions lus à l'appel : tous deux proviennent du même chargement (/reload)
+    offers, descriptions = recommend.offers, recommend.descriptions
     filtered_offers = offers
 
     # --- Filtrage robuste avec dictionnaire ---
@@ -72,7 +75,7 @@ def list_jobs(
 
     results = []
     for o in filtered_offers[start:end]:
-        description = o.get("description") or ""
+        description = get_description(o, descriptions)
         company = o.get("company") or ""
         location_ = o.get("location") or ""
         code_postal = o.get("code_postal") or ""
@@ -0,0 +1,37 @@
+"""
+Métriques de l'API au format d'exposition Prometheus (texte).
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from API.routes import recommend
+
+router = APIRouter()
+
+# (nom, type, aide, clé dans SearchCache.stats())
+SEARCH_CACHE_METRICS = [
+    ("jobmarket_search_cache_hits_total", "counter", "Recherches servies depuis le cache.", "hits"),
+    ("jobmarket_search_cache_misses_total", "counter", "Recherches calculées (absentes du cache ou expirées).", "misses"),
+    ("jobmarket_search_cache_evictions_total", "counter", "Entrées évincées (cache plein).", "evictions"),
+    ("jobmarket_search_cache_expirations_total", "counter", "Entrées expirées (durée de vie dépassée).", "expirations"),
+    ("jobmarket_search_cache_clears_total", "counter", "Vidages du cache (rechargements des données).", "clears"),
+    ("jobmarket_search_cache_entries", "gauge", "Entrées actuellement en cache.", "entries"),
+    ("jobmarket_search_cache_max_entries", "gauge", "Capacité du cache.", "max_entries"),
+    ("jobmarket_search_cache_hit_ratio", "gauge", "Part des recherches servies depuis le cache.", "hit_ratio"),
+]
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Compteurs du cache des recherches et volume des données chargées, pour Prometheus."""
+    stats = recommend.search_cache.stats()
+    lines = []
+    for name, metric_type, help_text, key in SEARCH_CACHE_METRICS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}", f"{name} {stats[key]}"]
+
+    lines += [
+        "# HELP jobmarket_offers_loaded Offres chargées dans le moteur de recommandation.",
+        "# TYPE jobmarket_offers_loaded gauge",
+        f"jobmarket_offers_loaded {len(recommend.offers)}",
+    ]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
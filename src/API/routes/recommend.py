@@ -1,12 +1,17 @@
 from datetime import datetime
 from fastapi import APIRouter, Query
-from typing import Optional
+from typing import Literal, Optional
 from fetch_functions.utils import get_latest_file
+from recommender.loader import load_recommendation_engine
+from recommender.data_preparation import text_normalization
 from recommender.recommender import (
-    build_recommendation_engine_from_folder,
-    recommend_offers
+    recommend_offer_indices, recommend_offer_indices_batch, recommend_offer_indices_semantic
 )
 from API.schemas.job import JobOfferResponse
+from API.schemas.search import BatchSearchRequest, BatchSearchResult
+from API.search_cache import SearchCache
+from API.search_filters import OfferFilters, normalize_contract, normalize_location
+from storage.description_store import get_description
 import os
 
 router = APIRouter()
@@ -15,25 +20,129 @@ ROOT = os.environ.get("PROJECT_ROOT", os.path.abspath(os.path.join(os.path.dirna
 PROCESSED_OFFERS_DIR = os.path.join(ROOT, "data/processed_data")
 LATEST_FILE = get_latest_file(PROCESSED_OFFERS_DIR)
 
+# Nombre maximal d'offres classées par recherche (toutes pages confondues)
+SEARCH_MAX_RESULTS = 150
+# Seuils de similarité : cosinus TF-IDF (mode exact) et cosinus des plongements LSA (mode sémantique)
+SEARCH_SCORE_THRESHOLD = 0.45
+SEMANTIC_SCORE_THRESHOLD = float(os.environ.get("SEMANTIC_SCORE_THRESHOLD", 0.5))
+
 offers = []
 vectorizer = None
 offer_vectors = None
-texts = []
+descriptions = None  # Stockage des descriptions (mmap), lues uniquement pour les offres renvoyées
+inverted_index = None  # Listes d'offres par terme : seules les offres partageant un terme avec la requête sont scorées
+semantic_index = None  # Projection LSA et index IVF (mode sémantique), None s'il n'a pas été construit par l'ETL
+snapshot_version = None  # Fichier transformé chargé, inclus dans la clé du cache des recherches
+search_filters = None  # Offres regroupées par contrat, localisation et département : masques des recherches filtrées
+search_cache = SearchCache()
 
 def load_recommendation_data() -> None:
-    global offers, vectorizer, offer_vectors, texts
-    offers, vectorizer, offer_vectors, texts = build_recommendation_engine_from_folder(PROCESSED_OFFERS_DIR)
+    global offers, vectorizer, offer_vectors, descriptions, inverted_index, semantic_index, snapshot_version, \
+        search_filters, LATEST_FILE
+    LATEST_FILE = get_latest_file(PROCESSED_OFFERS_DIR)
+    # Index construit par l'ETL (projeté en mémoire) ; reconstruction seulement s'il est absent ou périmé
+    offers, vectorizer, offer_vectors, descriptions, inverted_index, semantic_index = load_recommendation_engine(
+        PROCESSED_OFFERS_DIR
+    )
+    snapshot_version = os.path.basename(LATEST_FILE) if LATEST_FILE else None
+    search_filters = OfferFilters(offers)
+    # Les résultats en cache désignent des offres des données précédentes
+    search_cache.clear()
     print(f"✅ Données rechargées depuis {LATEST_FILE} !")
 
+def get_offer_description(offer: dict) -> str:
+    """Description d'une offre, lue à la demande dans le stockage du fichier chargé."""
+    return get_description(offer, descriptions)
+
 # Chargement initial
 load_recommendation_data()
 
-# --- MAPPING DICTIONNAIRE DES TYPES DE CONTRAT ---
-CONTRACT_TYPE_EQUIV = {
-    "cdi": {"cdi", "permanent", "contract", "fulltime"},
-    "cdd": {"cdd", "temporary", "interim"},
-    "stage": {"stage", "internship"},
-}
+def compose_search_query(query: str, location: Optional[str], contract_type: Optional[str]) -> str:
+    """Requête soumise au moteur : mot-clé complété de la localisation et du type de contrat."""
+    user_query = query
+    if location:
+        user_query += f" {location}"
+    if contract_type:
+        user_query += f" {contract_type}"
+    return user_query
+
+
+def normalize_search_filters(location: Optional[str], contract_type: Optional[str]) -> tuple:
+    """Filtres normalisés (localisation, type de contrat) appliqués aux offres recommandées."""
+    norm_contract = normalize_contract(contract_type) if contract_type else None
+    norm_location = normalize_location(location) if location else None
+    return norm_location, norm_contract
+
+
+def search_mode(mode: str) -> str:
+    """Mode de recherche effectif : le mode sémantique n'est servi que si son index a été construit par l'ETL."""
+    return "semantic" if mode == "semantic" and semantic_index is not None else "exact"
+
+
+def search_cache_key(user_query: str, norm_location: Optional[str], norm_contract: Optional[str],
+                     mode: str = "exact") -> tuple:
+    return text_normalization(user_query), norm_location, norm_contract, mode, snapshot_version
+
+
+def rank_search_results(user_query: str, norm_location: Optional[str], norm_contract: Optional[str],
+                        mode: str = "exact") -> tuple:
+    """
+    Indices (dans `offers`) des offres recommandées pour une recherche, filtrées par type de contrat
+    et localisation, par score décroissant (SEARCH_MAX_RESULTS au plus).
+    Les filtres sont appliqués avant le calcul des scores : seules les offres autorisées sont classées.
+    """
+    allowed = search_filters.mask(norm_location, norm_contract)
+    if mode == "semantic":
+        return tuple(recommend_offer_indices_semantic(
+            user_input=user_query,
+            offers_vectorizer=vectorizer,
+            semantic_index=semantic_index,
+            processed_offers=offers,
+            top_n=SEARCH_MAX_RESULTS,
+            score_threshold=SEMANTIC_SCORE_THRESHOLD,
+            allowed_offers=allowed
+        ))
+
+    recos = recommend_offer_indices(
+        user_input=user_query,
+        offers_vectorizer=vectorizer,
+        processed_offer_vectors=offer_vectors,
+        processed_offers=offers,
+        top_n=SEARCH_MAX_RESULTS,
+        score_threshold=SEARCH_SCORE_THRESHOLD,
+        inverted_index=inverted_index,
+        allowed_offers=allowed
+    )
+    return tuple(recos)
+
+
+def build_offer_response(o: dict) -> JobOfferResponse:
+    """Réponse d'une offre recommandée (description lue à la demande)."""
+    description = get_offer_description(o)
+    company = o.get("company") or ""
+    location_ = o.get("location") or ""
+    code_postal = o.get("code_postal") or ""
+    salary_min = float(o["salary_min"]) if o.get("salary_min") not in ("", None) else None
+    salary_max = float(o["salary_max"]) if o.get("salary_max") not in ("", None) else None
+    created_at = o.get("created_at")
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    # sinon, c'est déjà un datetime
+
+    return JobOfferResponse(
+        external_id = o.get("external_id", ""),
+        title = o.get("title", ""),
+        company = company,
+        description = description,
+        location = location_,
+        contract_type = o.get("contract_type"),
+        code_postal = code_postal,
+        salary_min = salary_min,
+        salary_max = salary_max,
+        created_at = created_at,
+        url = o.get("apply_url", o.get("url", ""))
+    )
+
 
 @router.get("/search")
 def search_offers(
@@ -42,85 +151,92 @@ def search_offers(
     contract_type: Optional[str] = Query(None, description="Filtre type de contrat"),
     page: int = Query(1, ge=1, description="Numéro de page"),
     page_size: int = Query(20, ge=1, le=100, description="Taille de page"),
+    mode: Literal["exact", "semantic"] = Query("exact", description="Classement TF-IDF exact ou sémantique (LSA, approché)"),
 ):
     # Compose user_query pour la reco
-    user_query = query
-    if location:
-        user_query += f" {location}"
-    if contract_type:
-        user_query += f" {contract_type}"
+    user_query = compose_search_query(query, location, contract_type)
+    mode = search_mode(mode)
 
     try:
-        recos = recommend_offers(
-            user_input=user_query,
-            offers_vectorizer=vectorizer,
-            processed_offer_vectors=offer_vectors,
-            processed_offers=offers,
-            top_n=150,
-            score_threshold=0.45
-        )
-
-        # Applique filtrage contract_type/location après reco
-        filtered_results = []
-        norm_contract = contract_type.strip().lower().replace(" ", "") if contract_type else None
-        norm_location = location.strip().lower() if location else None
-
-        # === Filtrage robuste avec mapping dictionnaire ===
-        values = CONTRACT_TYPE_EQUIV.get(norm_contract, {norm_contract}) if norm_contract else None
-
-        for o in recos:
-            # Filtrage contract_type
-            if norm_contract and values:
-                offer_type = (o.get("contract_type") or "").strip().lower().replace(" ", "")
-                if not any(val in offer_type for val in values):
-                    continue
-            # Filtrage location
-            if norm_location:
-                loc = (o.get("location") or "").strip().lower()
-                if norm_location not in loc:
-                    continue
-
-            description = o.get("description") or ""
-            company = o.get("company") or ""
-            location_ = o.get("location") or ""
-            code_postal = o.get("code_postal") or ""
-            salary_min = float(o["salary_min"]) if o.get("salary_min") not in ("", None) else None
-            salary_max = float(o["salary_max"]) if o.get("salary_max") not in ("", None) else None
-            created_at = o.get("created_at")
-            if isinstance(created_at, str):
-                created_at = datetime.fromisoformat(created_at)
-            # sinon, c'est déjà un datetime
-
-            filtered_results.append(JobOfferResponse(
-                external_id = o.get("external_id", ""),
-                title = o.get("title", ""),
-                company = company,
-                description = description,
-                location = location_,
-                contract_type = o.get("contract_type"),
-                code_postal = code_postal,
-                salary_min = salary_min,
-                salary_max = salary_max,
-                created_at = created_at,
-                url = o.get("apply_url", o.get("url", ""))
-            ))
-
-        # Limite à 150 offres max après avoir tout filtré
-        filtered_results = filtered_results[:150]
-
-        total_count = len(filtered_results)
+        norm_location, norm_contract = normalize_search_filters(location, contract_type)
+
+        # Classement mis en cache : les pages suivantes d'une même recherche ne sont pas recalculées
+        cache_key = search_cache_key(user_query, norm_location, norm_contract, mode)
+        ranked = search_cache.get(cache_key)
+        if ranked is None:
+            ranked = rank_search_results(user_query, norm_location, norm_contract, mode)
+            search_cache.put(cache_key, ranked)
+
+        total_count = len(ranked)
         start = (page - 1) * page_size
         end = start + page_size
 
+        # Les réponses (et donc les descriptions) ne sont construites que pour la page demandée
+        page_results = [build_offer_response(offers[i]) for i in ranked[start:end]]
+
         # Retourne le même format que /jobs pour la pagination
         return {
-            "results": filtered_results[start:end],
+            "results": page_results,
             "total_count": total_count,
             "page": page,
-            "page_size": page_size
+            "page_size": page_size,
+            "mode": mode
         }
 
     except Exception as e:
         print(f"Erreur dans /search : {e}")
         raise
 
+
+@router.post("/search/batch", response_model=list[BatchSearchResult])
+def search_offers_batch(request: BatchSearchRequest):
+    """
+    Exécute plusieurs recherches en un appel (alertes, recherches enregistrées).
+
+    Chaque recherche applique les mêmes règles et filtres que /search et renvoie ses top_k premières offres.
+    Les recherches absentes du cache sont vectorisées ensemble et scorées par un seul produit
+    matriciel creux, au lieu d'un parcours du corpus par recherche.
+    """
+    try:
+        searches = []
+        for item in request.queries:
+            user_query = compose_search_query(item.query, item.location, item.contract_type)
+            norm_location, norm_contract = normalize_search_filters(item.location, item.contract_type)
+            searches.append((user_query, norm_location, norm_contract))
+
+        keys = [search_cache_key(*search) for search in searches]
+        rankings = [search_cache.get(key) for key in keys]
+
+        # Recherches distinctes à calculer (une même recherche peut figurer plusieurs fois dans le lot)
+        missing = list(dict.fromkeys(key for key, ranked in zip(keys, rankings) if ranked is None))
+        if missing:
+            missing_searches = {key: search for key, search in zip(keys, searches)}
+            recos = recommend_offer_indices_batch(
+                user_inputs=[missing_searches[key][0] for key in missing],
+                offers_vectorizer=vectorizer,
+                processed_offer_vectors=offer_vectors,
+                processed_offers=offers,
+                top_n=SEARCH_MAX_RESULTS,
+                score_threshold=SEARCH_SCORE_THRESHOLD,
+                allowed_offers=[search_filters.mask(*missing_searches[key][1:]) for key in missing]
+            )
+            computed = {}
+            for key, search_recos in zip(missing, recos):
+                computed[key] = tuple(search_recos)
+                search_cache.put(key, computed[key])
+            rankings = [ranked if ranked is not None else computed[key] for key, ranked in zip(keys, rankings)]
+
+        return [
+            BatchSearchResult(
+                query = item.query,
+                location = item.location,
+                contract_type = item.contract_type,
+                results = [build_offer_response(offers[i]) for i in ranked[:request.top_k]],
+                total_count = len(ranked)
+            )
+            for item, ranked in zip(request.queries, rankings)
+        ]
+
+    except Exception as e:
+        print(f"Erreur dans /search/batch : {e}")
+        raise
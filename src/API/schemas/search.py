@@ -0,0 +1,43 @@
+"""
+Schemas Pydantic de la recherche groupée (/search/batch) de l'API Job Market.
+"""
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from API.schemas.job import JobOfferResponse
+
+# Nombre maximal de requêtes par appel à /search/batch
+SEARCH_BATCH_MAX_QUERIES = 1000
+
+
+class BatchSearchQuery(BaseModel):
+    """
+    Une recherche du lot : mêmes paramètres que /search.
+    """
+    query: str
+    location: Optional[str] = None
+    contract_type: Optional[str] = None
+
+
+class BatchSearchRequest(BaseModel):
+    """
+    Corps de /search/batch.
+
+    Champs :
+        queries (list) : Recherches à exécuter.
+        top_k (int) : Nombre maximal d'offres renvoyées par recherche.
+    """
+    queries: List[BatchSearchQuery] = Field(..., min_length=1, max_length=SEARCH_BATCH_MAX_QUERIES)
+    top_k: int = Field(20, ge=1, le=150)
+
+
+class BatchSearchResult(BaseModel):
+    """
+    Résultat d'une recherche du lot : total_count compte les offres retenues (150 au plus), comme /search.
+    """
+    query: str
+    location: Optional[str] = None
+    contract_type: Optional[str] = None
+    results: List[JobOfferResponse]
+    total_count: int
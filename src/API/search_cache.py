@@ -0,0 +1,86 @@
+"""
+Cache des résultats de /search.
+
+Les clients (front Streamlit, scripts internes) répètent souvent les mêmes recherches. Pour chaque
+combinaison (requête normalisée, localisation, type de contrat, fichier chargé), le cache conserve
+la liste classée des offres retenues (leurs indices) : toutes les pages d'une même recherche sont
+servies sans revectoriser ni rescorer.
+
+Cache LRU borné (SEARCH_CACHE_SIZE entrées, 0 le désactive) dont les entrées expirent après
+SEARCH_CACHE_TTL secondes. Il est vidé à chaque rechargement des données (/reload) ; le fichier
+chargé fait en outre partie de la clé, de sorte qu'un résultat calculé pendant un rechargement
+n'est jamais servi pour les nouvelles données.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", 1024))
+SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", 600))
+
+
+class SearchCache:
+    """
+    Cache LRU avec durée de vie des entrées et compteurs (succès, échecs, évictions, expirations).
+    Les routes FastAPI synchrones s'exécutant dans un pool de threads, les accès sont protégés par un verrou.
+    """
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_SIZE, ttl_seconds: float = SEARCH_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.clears = 0
+
+    def get(self, key):
+        """Valeur associée à la clé, ou None (absente ou expirée)."""
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.clears += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "clears": self.clears,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,102 @@
+"""
+Filtres structurés de /search (type de contrat, localisation) appliqués avant le calcul des scores.
+
+Au chargement des données, les offres sont regroupées par valeur normalisée de leur type de contrat,
+de leur localisation et de leur département (code postal). Un masque booléen est précalculé pour
+chaque type de contrat de CONTRACT_TYPE_EQUIV. Le masque d'une recherche filtrée ne coûte que la
+comparaison du filtre aux valeurs distinctes, sans parcours des offres. Les scores ne sont ensuite
+calculés que pour les offres autorisées : une recherche filtrée obtient ses SEARCH_MAX_RESULTS
+meilleures offres parmi celles qui respectent les filtres, au lieu de filtrer a posteriori les
+meilleures offres de tout le corpus.
+
+Les règles de correspondance sont celles du filtrage a posteriori de /search :
+- type de contrat : l'une des valeurs équivalentes est contenue dans le type de l'offre ;
+- localisation : le filtre est contenu dans la localisation de l'offre. Un filtre de la forme d'un
+  département ("75", "974") retient en outre les offres dont le code postal est dans ce département.
+"""
+
+import re
+
+import numpy as np
+
+
+# --- MAPPING DICTIONNAIRE DES TYPES DE CONTRAT ---
+CONTRACT_TYPE_EQUIV = {
+    "cdi": {"cdi", "permanent", "contract", "fulltime"},
+    "cdd": {"cdd", "temporary", "interim"},
+    "stage": {"stage", "internship"},
+}
+
+# Département : deux premiers chiffres du code postal, trois pour l'outre-mer (97x)
+DEPARTMENT_PATTERN = re.compile(r"^(97\d|\d{2})$")
+
+
+def normalize_contract(value) -> str:
+    return (value or "").strip().lower().replace(" ", "")
+
+
+def normalize_location(value) -> str:
+    return (value or "").strip().lower()
+
+
+def postal_department(code_postal):
+    """Département d'un code postal (même règle que mv_offer_rollups), None s'il n'est pas numérique."""
+    code = (code_postal or "").strip()
+    if len(code) < 2 or not code.isdigit():
+        return None
+    return code[:3] if code.startswith("97") else code[:2]
+
+
+def group_rows(values) -> dict:
+    """Indices des offres (croissants) pour chaque valeur distincte."""
+    groups = {}
+    for row, value in enumerate(values):
+        groups.setdefault(value, []).append(row)
+    return {value: np.array(rows, dtype=np.intp) for value, rows in groups.items()}
+
+
+class OfferFilters:
+    """Offres regroupées par type de contrat, localisation et département, pour le calcul des masques de /search."""
+
+    def __init__(self, offers: list):
+        self.offers_count = len(offers)
+        self.contract_rows = group_rows(normalize_contract(o.get("contract_type")) for o in offers)
+        self.location_rows = group_rows(normalize_location(o.get("location")) for o in offers)
+        self.department_rows = group_rows(postal_department(o.get("code_postal")) for o in offers)
+        self.department_rows.pop(None, None)
+        self.contract_masks = {
+            contract: self._union(self.contract_rows, lambda offer_type: any(val in offer_type for val in values))
+            for contract, values in CONTRACT_TYPE_EQUIV.items()
+        }
+
+    def _union(self, groups: dict, matches):
+        """Masque des offres dont la valeur (clé de `groups`) vérifie `matches`."""
+        mask = np.zeros(self.offers_count, dtype=bool)
+        for value, rows in groups.items():
+            if matches(value):
+                mask[rows] = True
+        return mask
+
+    def contract_mask(self, norm_contract: str):
+        if norm_contract in self.contract_masks:
+            return self.contract_masks[norm_contract]
+        return self._union(self.contract_rows, lambda offer_type: norm_contract in offer_type)
+
+    def location_mask(self, norm_location: str):
+        mask = self._union(self.location_rows, lambda location: norm_location in location)
+        if DEPARTMENT_PATTERN.match(norm_location) and norm_location in self.department_rows:
+            mask[self.department_rows[norm_location]] = True
+        return mask
+
+    def mask(self, norm_location, norm_contract):
+        """
+        Masque booléen des offres respectant les filtres normalisés (voir normalize_search_filters),
+        None en l'absence de filtre.
+        """
+        mask = None
+        if norm_contract:
+            mask = self.contract_mask(norm_contract)
+        if norm_location:
+            location_mask = self.location_mask(norm_location)
+            mask = location_mask if mask is None else mask & location_mask
+        return mask
@@ -0,0 +1,84 @@
+"""
+Benchmark de la normalisation des dates sur tous les formats connus des sources.
+
+Compare l'ancienne conversion (jusqu'à six `strptime` par offre, `datetime.now()` par date
+relative) au DateNormalizer (format détecté par lot, chemin rapide ISO, heure de référence
+unique) et vérifie que les sorties sont identiques.
+
+Exécution depuis ./src :
+    python -m benchmarks.bench_dates [nombre_de_dates]
+"""
+
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+from normalization.dates import DATE_FORMATS, DateNormalizer
+
+
+def legacy_convert_to_timestamp(date_str):
+    """Ancienne implémentation de transform.convert_to_timestamp."""
+    if not date_str:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    return None
+
+
+def legacy_convert_relative_time(relative_str, now):
+    """Ancienne implémentation de transform.convert_relative_time (heure figée pour la comparaison)."""
+    if not relative_str or not isinstance(relative_str, str):
+        return None
+    match = re.search(r"il y a (\d+)\s*(jours?|heures?)", relative_str.lower().strip())
+    if match:
+        number = int(match.group(1))
+        delta = timedelta(days=number) if "jour" in match.group(2) else timedelta(hours=number)
+        return (now - delta).strftime("%Y-%m-%d %H:%M:%S")
+    return None
+
+
+# Un jeu de dates par source / format rencontré
+SAMPLES = {
+    "adzuna (ISO)": lambda i: f"2025-07-{i % 28 + 1:02d}T{i % 24:02d}:20:30Z",
+    "france_travail (ISO ms)": lambda i: f"2025-06-{i % 28 + 1:02d}T08:{i % 60:02d}:00.000Z",
+    "français avec heure": lambda i: f"{i % 28 + 1:02d}/07/2025 10:20:30",
+    "SQL": lambda i: f"2025-07-{i % 28 + 1:02d} 10:20:30",
+    "jour-mois-année": lambda i: f"{i % 28 + 1:02d}-07-2025",
+    "année/mois/jour": lambda i: f"2025/07/{i % 28 + 1:02d}",
+}
+RELATIVE_SAMPLE = lambda i: f"il y a {i % 30} {'jours' if i % 2 else 'heures'}"
+
+
+def measure(func, values):
+    start = time.perf_counter()
+    results = [func(value) for value in values]
+    return time.perf_counter() - start, results
+
+
+def main(count: int = 100_000):
+    print(f"{'format':<26}{'ancien (s)':>12}{'nouveau (s)':>13}{'gain':>8}")
+
+    for label, sample in SAMPLES.items():
+        values = [sample(i) for i in range(count)]
+        normalizer = DateNormalizer()
+        normalizer.start_batch()
+        legacy_time, legacy_results = measure(legacy_convert_to_timestamp, values)
+        new_time, new_results = measure(normalizer.to_timestamp, values)
+        assert legacy_results == new_results, f"Sorties différentes pour {label}"
+        print(f"{label:<26}{legacy_time:>12.3f}{new_time:>13.3f}{legacy_time / new_time:>7.1f}x")
+
+    values = [RELATIVE_SAMPLE(i) for i in range(count)]
+    reference_time = datetime.now()
+    normalizer = DateNormalizer(reference_time)
+    legacy_time, legacy_results = measure(lambda v: legacy_convert_relative_time(v, reference_time), values)
+    new_time, new_results = measure(normalizer.from_relative, values)
+    assert legacy_results == new_results, "Sorties différentes pour les dates relatives"
+    print(f"{'jsearch (relatif)':<26}{legacy_time:>12.3f}{new_time:>13.3f}{legacy_time / new_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
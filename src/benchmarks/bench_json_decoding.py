@@ -0,0 +1,87 @@
+"""
+Benchmark du décodage des fichiers bruts et de l'encodage des offres transformées.
+
+Pour le dernier fichier de chaque source, compare `json.load` (dictionnaires complets) au
+décodage msgspec dans le schéma de la source (champs utiles uniquement, Struct compactes) :
+temps de décodage et mémoire conservée par les objets décodés (tracemalloc).
+Compare ensuite l'encodage du dernier fichier transformé (`json.dump` indenté contre msgspec).
+
+Exécution depuis ./src :
+    python -m benchmarks.bench_json_decoding
+"""
+
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+import msgspec
+
+from fetch_functions.utils import get_latest_file
+from pipelines.extract import RAW_DATA_DIR
+from pipelines.records import RAW_RECORD_TYPES, ProcessedOffer
+from pipelines.transform import PROCESSED_DATA_DIR
+
+
+def measure_decode(decode):
+    """Retourne (durée en s, mémoire conservée par le résultat en Mo), mesurées séparément."""
+    gc.collect()
+    start = time.perf_counter()
+    result = decode()
+    duration = time.perf_counter() - start
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = decode()
+    retained = tracemalloc.get_traced_memory()[0] / (1024 * 1024)
+    tracemalloc.stop()
+    del result
+    return duration, retained
+
+
+def bench_file(label, file_path, record_type):
+    with open(file_path, "rb") as f:
+        content = f.read()
+
+    legacy_time, legacy_memory = measure_decode(lambda: json.loads(content))
+    new_time, new_memory = measure_decode(
+        lambda: msgspec.json.decode(content, type=list[record_type], strict=False)
+    )
+    print(
+        f"{label:<16}{len(content) / (1024 * 1024):>9.1f}"
+        f"{legacy_time:>11.3f}{new_time:>11.3f}{legacy_time / new_time:>7.1f}x"
+        f"{legacy_memory:>12.1f}{new_memory:>11.1f}{legacy_memory / max(new_memory, 1e-6):>7.1f}x"
+    )
+
+
+def main():
+    print(f"{'fichier':<16}{'Mo':>9}{'json (s)':>11}{'typé (s)':>11}{'gain':>8}"
+          f"{'json (Mo)':>12}{'typé (Mo)':>11}{'gain':>8}")
+
+    for source, record_type in RAW_RECORD_TYPES.items():
+        latest_path = get_latest_file(os.path.join(RAW_DATA_DIR, source, "output"))
+        if latest_path:
+            bench_file(source, latest_path, record_type)
+
+    processed_path = get_latest_file(PROCESSED_DATA_DIR)
+    if not processed_path:
+        return
+    bench_file("transformé", processed_path, ProcessedOffer)
+
+    with open(processed_path, "rb") as f:
+        offers = msgspec.json.decode(f.read())
+
+    start = time.perf_counter()
+    json.dumps(offers, ensure_ascii=False, indent=2)
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    msgspec.json.encode(offers)
+    new_time = time.perf_counter() - start
+    print(f"\nEncodage des offres transformées : json {legacy_time:.3f} s, "
+          f"msgspec {new_time:.3f} s ({legacy_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark de la sélection des offres recommandées (score puis top-k).
+
+Compare, sur des corpus TF-IDF synthétiques de 10k, 100k et 1M offres (lignes normalisées L2,
+termes tirés selon une loi de Zipf), l'ancienne sélection (cosine_similarity, liste Python
+de couples (indice, score) triée en entier) à compute_similarity + top_k_indices
+(produit scalaire creux, seuil vectorisé, argpartition), puis à l'index inversé (scores accumulés
+sur les seules listes des termes de la requête). Vérifie que les offres retenues et leurs scores
+sont identiques et indique la longueur moyenne des listes parcourues.
+
+Compare enfin, pour un lot de BATCH_QUERY_COUNT requêtes (/search/batch), une sélection par requête
+à batch_top_k_indices (un seul produit creux offres x requêtes).
+
+Compare aussi, pour des recherches filtrées (masques de FILTER_SELECTIVITIES des offres, comme un type
+de contrat ou un département), le filtrage a posteriori des TOP_N meilleures offres du corpus au filtrage
+avant le calcul des scores (index inversé restreint aux offres autorisées) : latence et nombre d'offres renvoyées.
+
+Exécution depuis ./src :
+    python -m benchmarks.bench_recommend [taille_du_corpus ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+
+from recommender.inverted_index import InvertedIndex
+from recommender.recommender import batch_top_k_indices, compute_similarity, top_k_indices
+
+
+VOCABULARY_SIZE = 50_000
+TERMS_PER_OFFER = 20
+QUERY_COUNT = 20
+BATCH_QUERY_COUNT = 1000
+TOP_N = 150
+THRESHOLDS = (0.45, 0.1)
+FILTER_SELECTIVITIES = (0.1, 0.01)
+FILTER_THRESHOLD = 0.1
+
+
+def synthetic_corpus(offers: int, rng):
+    """Matrice TF-IDF creuse (offres x termes), lignes normalisées L2."""
+    columns = np.minimum(rng.zipf(1.3, offers * TERMS_PER_OFFER) - 1, VOCABULARY_SIZE - 1)
+    rows = np.repeat(np.arange(offers), TERMS_PER_OFFER)
+    weights = rng.random(offers * TERMS_PER_OFFER)
+    matrix = csr_matrix((weights, (rows, columns)), shape=(offers, VOCABULARY_SIZE))
+    return normalize(matrix)
+
+
+def synthetic_queries(rng, count: int = QUERY_COUNT):
+    """Requêtes de 1 à 3 termes parmi les 2 000 plus fréquents, normalisées L2."""
+    queries = []
+    for _ in range(count):
+        terms = rng.choice(2_000, size=rng.integers(1, 4), replace=False)
+        query = csr_matrix((rng.random(terms.size), (np.zeros(terms.size, dtype=int), terms)),
+                           shape=(1, VOCABULARY_SIZE))
+        queries.append(normalize(query))
+    return queries
+
+
+def legacy_top_indices(query_vector, offer_vectors, top_n, score_threshold):
+    """Ancienne implémentation de la sélection dans recommend_offers."""
+    scores = cosine_similarity(query_vector, offer_vectors).flatten()
+    scored_offers = [(i, score) for i, score in enumerate(scores) if score >= score_threshold]
+    scored_offers.sort(key=lambda x: x[1], reverse=True)
+    return [i for i, score in scored_offers][:top_n], scores
+
+
+def new_top_indices(query_vector, offer_vectors, top_n, score_threshold):
+    scores = compute_similarity(query_vector, offer_vectors)
+    return top_k_indices(scores, top_n, score_threshold).tolist(), scores
+
+
+def inverted_top_indices(query_vector, inverted_index, top_n, score_threshold):
+    offer_ids, scores = inverted_index.score(query_vector)
+    all_scores = np.zeros(inverted_index.offers_count)
+    all_scores[offer_ids] = scores
+    return top_k_indices(scores, top_n, score_threshold, offer_ids).tolist(), all_scores
+
+
+def post_filtered_top_indices(query_vector, index, top_n, score_threshold):
+    """Ancien filtrage de /search : TOP_N meilleures offres du corpus, puis filtre."""
+    inverted_index, allowed = index
+    offer_ids, scores = inverted_index.score(query_vector)
+    return [i for i in top_k_indices(scores, top_n, score_threshold, offer_ids).tolist() if allowed[i]]
+
+
+def pushed_down_top_indices(query_vector, index, top_n, score_threshold):
+    """Filtre appliqué avant le calcul des scores."""
+    inverted_index, allowed = index
+    offer_ids, scores = inverted_index.score(query_vector, allowed)
+    return top_k_indices(scores, top_n, score_threshold, offer_ids).tolist()
+
+
+def measure(select, queries, index, score_threshold):
+    """Retourne (latence médiane en ms, résultats) sur l'ensemble des requêtes."""
+    durations, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(select(query, index, TOP_N, score_threshold))
+        durations.append(time.perf_counter() - start)
+    return float(np.median(durations)) * 1000, results
+
+
+def main(sizes):
+    rng = np.random.default_rng(42)
+    queries = synthetic_queries(rng)
+    print(f"{'offres':>10}{'seuil':>8}{'ancien (ms)':>14}{'nouveau (ms)':>15}{'inversé (ms)':>15}"
+          f"{'listes (moy.)':>15}")
+
+    for size in sizes:
+        offer_vectors = synthetic_corpus(size, rng)
+        inverted_index = InvertedIndex.from_vectors(offer_vectors)
+        postings = np.mean([inverted_index.postings_length(query) for query in queries])
+        for score_threshold in THRESHOLDS:
+            legacy_ms, legacy_results = measure(legacy_top_indices, queries, offer_vectors, score_threshold)
+            new_ms, new_results = measure(new_top_indices, queries, offer_vectors, score_threshold)
+            inverted_ms, inverted_results = measure(inverted_top_indices, queries, inverted_index, score_threshold)
+
+            for (legacy_top, legacy_scores), *others in zip(legacy_results, new_results, inverted_results):
+                for top, scores in others:
+                    # Les scores peuvent différer au dernier bit (ordre des sommes) : comparaison à 1e-12
+                    assert np.allclose(legacy_scores[legacy_top], scores[top], rtol=0, atol=1e-12), \
+                        f"Scores différents ({size} offres, seuil {score_threshold})"
+
+            print(f"{size:>10}{score_threshold:>8}{legacy_ms:>14.2f}{new_ms:>15.2f}{inverted_ms:>15.2f}"
+                  f"{postings:>15.0f}")
+
+    print(f"\nLot de {BATCH_QUERY_COUNT} requêtes (seuil {THRESHOLDS[0]})")
+    print(f"{'offres':>10}{'par requête (ms)':>18}{'produit unique (ms)':>21}{'gain':>8}")
+    batch = vstack(synthetic_queries(rng, BATCH_QUERY_COUNT)).tocsr()
+    for size in sizes:
+        offer_vectors = synthetic_corpus(size, rng)
+
+        start = time.perf_counter()
+        single = [new_top_indices(batch[row], offer_vectors, TOP_N, THRESHOLDS[0])[0] for row in range(batch.shape[0])]
+        single_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        grouped = batch_top_k_indices(batch, offer_vectors, TOP_N, THRESHOLDS[0])
+        grouped_ms = (time.perf_counter() - start) * 1000
+
+        assert len(single) == len(grouped) and all(np.array_equal(a, b) for a, b in zip(single, grouped)), \
+            f"Sélections différentes ({size} offres)"
+        print(f"{size:>10}{single_ms:>18.1f}{grouped_ms:>21.1f}{single_ms / grouped_ms:>7.1f}x")
+
+
+    print(f"\nRecherches filtrées (seuil {FILTER_THRESHOLD})")
+    print(f"{'offres':>10}{'filtre':>8}{'a posteriori (ms)':>19}{'avant scores (ms)':>19}"
+          f"{'offres renvoyées':>22}")
+    for size in sizes:
+        offer_vectors = synthetic_corpus(size, rng)
+        inverted_index = InvertedIndex.from_vectors(offer_vectors)
+        for selectivity in FILTER_SELECTIVITIES:
+            allowed = rng.random(size) < selectivity
+            post_ms, post_results = measure(post_filtered_top_indices, queries, (inverted_index, allowed),
+                                            FILTER_THRESHOLD)
+            pushed_ms, pushed_results = measure(pushed_down_top_indices, queries, (inverted_index, allowed),
+                                                FILTER_THRESHOLD)
+            for post, pushed in zip(post_results, pushed_results):
+                # Les offres filtrées a posteriori sont les premières de la sélection restreinte
+                assert pushed[:len(post)] == post, f"Sélections différentes ({size} offres, filtre {selectivity})"
+            returned = f"{np.mean([len(r) for r in post_results]):.0f} -> {np.mean([len(r) for r in pushed_results]):.0f}"
+            print(f"{size:>10}{selectivity:>8}{post_ms:>19.2f}{pushed_ms:>19.2f}{returned:>22}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,132 @@
+"""
+Benchmark du mode sémantique de /search (projection LSA et index IVF, voir recommender/semantic.py).
+
+Sur des corpus TF-IDF synthétiques de 10k et 100k offres structurés en thèmes (chaque offre tire
+ses termes du vocabulaire d'un thème et d'un fond commun de loi de Zipf), mesure :
+- la durée de construction (projection TruncatedSVD, k-means et répartition dans les listes) ;
+- la latence médiane d'une requête : chemin exact (index inversé TF-IDF), recherche LSA exhaustive
+  (toutes les listes) et recherche IVF pour plusieurs nombres de listes parcourues, dont celui par défaut ;
+- le rappel@TOP_K de la recherche IVF par rapport à la recherche LSA exhaustive (erreur de l'index approché)
+  et par rapport au chemin exact TF-IDF (écart du mode sémantique au classement actuel).
+
+Les offres de score égal au TOP_K-ième se départagent arbitrairement : le rappel compte comme retrouvée
+toute offre renvoyée dont le score de référence atteint celui du TOP_K-ième.
+
+Exécution depuis ./src :
+    python -m benchmarks.bench_semantic [taille_du_corpus ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+
+from recommender.inverted_index import InvertedIndex
+from recommender.recommender import top_k_indices
+from recommender.semantic import build_semantic_index, project
+
+
+VOCABULARY_SIZE = 50_000
+TOPICS = 200
+TOPIC_TERMS = 300
+TERMS_PER_OFFER = 20
+TOPIC_SHARE = 0.7
+QUERY_COUNT = 200
+TOP_K = 10
+PROBES = (1, 4, 8, 16, 32, 64)
+
+
+def synthetic_topics(rng):
+    """Vocabulaire propre à chaque thème (termes tirés parmi les 20 000 plus fréquents)."""
+    return [rng.choice(20_000, size=TOPIC_TERMS, replace=False) for _ in range(TOPICS)]
+
+
+def synthetic_corpus(offers: int, topics, rng):
+    """Matrice TF-IDF creuse (offres x termes), lignes normalisées L2."""
+    offer_topics = rng.integers(0, TOPICS, offers)
+    from_topic = rng.random((offers, TERMS_PER_OFFER)) < TOPIC_SHARE
+    topic_terms = np.stack(topics)[offer_topics[:, None], rng.integers(0, TOPIC_TERMS, (offers, TERMS_PER_OFFER))]
+    background = np.minimum(rng.zipf(1.3, (offers, TERMS_PER_OFFER)) - 1, VOCABULARY_SIZE - 1)
+    columns = np.where(from_topic, topic_terms, background).ravel()
+    rows = np.repeat(np.arange(offers), TERMS_PER_OFFER)
+    matrix = csr_matrix((rng.random(offers * TERMS_PER_OFFER), (rows, columns)), shape=(offers, VOCABULARY_SIZE))
+    return normalize(matrix)
+
+
+def synthetic_queries(topics, rng):
+    """Requêtes de 2 ou 3 termes d'un même thème, normalisées L2."""
+    queries = []
+    for _ in range(QUERY_COUNT):
+        terms = rng.choice(topics[rng.integers(TOPICS)], size=rng.integers(2, 4), replace=False)
+        query = csr_matrix((rng.random(terms.size), (np.zeros(terms.size, dtype=int), terms)),
+                           shape=(1, VOCABULARY_SIZE))
+        queries.append(normalize(query))
+    return queries
+
+
+def measure(search, queries):
+    """Retourne (latence médiane en ms, résultats) sur l'ensemble des requêtes."""
+    durations, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        durations.append(time.perf_counter() - start)
+    return float(np.median(durations)) * 1000, results
+
+
+def recall(results, reference_scores):
+    """Part des offres renvoyées dont le score de référence atteint le TOP_K-ième meilleur."""
+    recalls = []
+    for top, scores in zip(results, reference_scores):
+        kth = np.sort(scores)[-TOP_K]
+        recalls.append(np.sum(scores[top] >= kth - 1e-6) / TOP_K)
+    return float(np.mean(recalls))
+
+
+def main(sizes):
+    rng = np.random.default_rng(42)
+    topics = synthetic_topics(rng)
+    queries = synthetic_queries(topics, rng)
+
+    for size in sizes:
+        offer_vectors = synthetic_corpus(size, topics, rng)
+        inverted_index = InvertedIndex.from_vectors(offer_vectors)
+
+        start = time.perf_counter()
+        semantic_index = build_semantic_index(offer_vectors)
+        build_s = time.perf_counter() - start
+
+        # Scores de référence sur tout le corpus : TF-IDF exact et cosinus LSA exhaustif
+        embeddings = np.empty_like(semantic_index.embeddings)
+        embeddings[semantic_index.list_offers] = semantic_index.embeddings
+        tfidf_scores = [(offer_vectors @ query.T).toarray().ravel() for query in queries]
+        lsa_scores = [embeddings @ project(query, semantic_index.columns, semantic_index.projection)[0]
+                      for query in queries]
+
+        def exact_search(query):
+            offer_ids, scores = inverted_index.score(query)
+            return top_k_indices(scores, TOP_K, 1e-12, offer_ids)
+
+        print(f"\n{size} offres : {semantic_index.dimensions} dimensions, {semantic_index.lists} listes, "
+              f"construction en {build_s:.1f} s")
+        print(f"{'recherche':>24}{'latence (ms)':>14}{'rappel LSA':>12}{'rappel TF-IDF':>15}")
+
+        exact_ms, exact_results = measure(exact_search, queries)
+        print(f"{'exacte (TF-IDF)':>24}{exact_ms:>14.2f}{recall(exact_results, lsa_scores):>12.3f}"
+              f"{recall(exact_results, tfidf_scores):>15.3f}")
+
+        # Nombres de listes fixes, nombre par défaut (voir default_probes) et recherche exhaustive
+        for probes in sorted({*PROBES, semantic_index.probes, semantic_index.lists}):
+            if probes > semantic_index.lists:
+                continue
+            label = "LSA exhaustive" if probes == semantic_index.lists else f"IVF {probes} listes"
+            if probes == semantic_index.probes:
+                label += " (défaut)"
+            ms, results = measure(lambda query: semantic_index.search(query, TOP_K, -1.0, probes=probes), queries)
+            print(f"{label:>24}{ms:>14.2f}{recall(results, lsa_scores):>12.3f}{recall(results, tfidf_scores):>15.3f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
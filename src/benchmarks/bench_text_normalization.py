@@ -0,0 +1,95 @@
+"""
+Microbenchmark du noyau de normalisation de texte.
+
+Compare le temps d'exécution des anciennes fonctions `normalize_text` (transform.py) et
+`text_normalization` (recommender/data_preparation.py) à celui des fonctions du module
+normalization.text, avec et sans cache LRU pour les champs courts, sur un corpus d'offres
+synthétiques (titres, entreprises, villes, descriptions).
+La parité des sorties est vérifiée par tests/test_text_normalization.py.
+
+Exécution depuis ./src :
+    python -m benchmarks.bench_text_normalization [nombre_d_offres]
+"""
+
+import random
+import re
+import sys
+import time
+import unicodedata
+
+from normalization.text import (
+    normalize_label,
+    normalize_label_cached,
+    normalize_search_text,
+    normalize_search_text_cached,
+)
+
+
+def legacy_normalize_text(text):
+    """Ancienne implémentation de transform.normalize_text."""
+    if not text or not isinstance(text, str):
+        return None
+    s = unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8").upper()
+    s = re.sub(r"[-']", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    s = re.sub(r"\bSAINT\b", "ST", s)
+    m = re.search(r"(\d{1,2})[EÈ]M[EÈ]?\s*ARRONDISSEMENT,?\s*(\w+)", s, re.IGNORECASE)
+    if m:
+        return f"{m.group(2).upper()} {m.group(1).zfill(2)}"
+    m2 = re.search(r"^(?P<ville>.+?)\s+(?P<num>\d{1,2})$", s)
+    if m2:
+        return f"{m2.group('ville').strip()} {m2.group('num').zfill(2)}"
+    return s
+
+
+def legacy_text_normalization(text):
+    """Ancienne implémentation de recommender.data_preparation.text_normalization."""
+    if not text or not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8")
+    text = text.lower()
+    text = re.sub(r"[^a-z0-9\s]", "", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+
+CITIES = ["Paris 8", "9ème Arrondissement, Lyon", "Saint-Étienne", "L'Haÿ-les-Roses", "Île-de-France",
+          "Aix-en-Provence", "Besançon", "Nîmes", "Saint-Denis 93", "Marseille 13e Arrondissement"]
+COMPANIES = ["SNCF Connect", "Société Générale", "L'Oréal", "Thalès", "Crédit Agricole", "Ubisoft",
+             "Œuvre d'Orient", "Ça & Là", "Schneider Electric", "Dassault Systèmes"]
+TITLES = ["Data Engineer H/F", "Développeur·se Python", "Ingénieur DevOps – Cloud", "Analyste Cybersécurité",
+          "Chef de projet (F/H)", "Data Scientist — NLP", "Architecte Big Data", "Administrateur Systèmes & Réseaux"]
+DESCRIPTION = ("Nous recherchons un(e) développeur·se passionné(e) ! Missions : concevoir des pipelines "
+               "ETL, maintenir l'entrepôt de données, garantir la qualité… Télétravail 2j/sem, "
+               "rémunération 45–55 k€, tickets-restaurant. Envoyez CV à rh@société.fr\n\t") * 6
+
+
+def measure(func, values):
+    start = time.perf_counter()
+    for value in values:
+        func(value)
+    return time.perf_counter() - start
+
+
+def main(count: int = 50_000):
+    rng = random.Random(1)
+    short_fields = [rng.choice(CITIES + COMPANIES) for _ in range(count)]
+    titles = [f"{rng.choice(TITLES)} {i % 500}" for i in range(count)]
+    descriptions = [f"{DESCRIPTION} {i}" for i in range(count // 10)]
+
+    cases = [
+        ("villes/entreprises (ETL)", short_fields, legacy_normalize_text, normalize_label, normalize_label_cached),
+        ("titres (recherche)", titles, legacy_text_normalization, normalize_search_text, normalize_search_text_cached),
+        ("descriptions (recherche)", descriptions, legacy_text_normalization, normalize_search_text, None),
+    ]
+
+    print(f"{'champ':<28}{'ancien (s)':>12}{'nouveau (s)':>13}{'avec cache (s)':>16}")
+    for label, values, legacy, new, cached in cases:
+        legacy_time = measure(legacy, values)
+        new_time = measure(new, values)
+        cached_time = f"{measure(cached, values):>16.3f}" if cached else f"{'-':>16}"
+        print(f"{label:<28}{legacy_time:>12.3f}{new_time:>13.3f}{cached_time}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
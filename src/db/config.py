@@ -23,4 +23,18 @@ DB_CONFIG = {
     "password": os.getenv("JOBS_POSTGRES_PASSWORD"),
     "host": os.getenv("JOBS_POSTGRES_HOST"),
     "port": os.getenv("JOBS_POSTGRES_PORT")
-}
\ No newline at end of file
+}
+
+def _optional_int(value):
+    """Entier optionnel : "none" ou vide désactive le paramètre."""
+    return None if value in (None, "", "none", "None") else int(value)
+
+
+# Pool de connexions (chargement en base)
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 4))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+
+# Nombre d'exécutions d'une requête avant qu'elle soit préparée côté serveur
+# ("none" pour désactiver, ex: derrière PgBouncer en mode transaction)
+DB_PREPARE_THRESHOLD = _optional_int(os.getenv("DB_PREPARE_THRESHOLD", 5))
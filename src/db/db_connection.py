@@ -1,6 +1,21 @@
+import atexit
+import threading
+from contextlib import contextmanager
+
 import psycopg
-from db.config import DB_CONFIG
-from logger.logger import error
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+from db.config import (
+    DB_CONFIG,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_PREPARE_THRESHOLD,
+)
+from logger.logger import error, info
+
+
+_pool = None
+_pool_lock = threading.Lock()
 
 
 def connect_db() -> psycopg.connection:
@@ -22,5 +37,79 @@ def connect_db() -> psycopg.connection:
         error(f" Erreur de connexion : {e}")
         return None
 
+
+def get_pool() -> ConnectionPool:
+    """
+    Retourne le pool de connexions du processus, créé à la première demande.
+
+    - Taille configurable (DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE).
+    - Chaque connexion est vérifiée avant d'être prêtée (connexions coupées par le serveur écartées).
+    - Les requêtes répétées sont préparées côté serveur après DB_PREPARE_THRESHOLD exécutions.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    kwargs={**DB_CONFIG, "prepare_threshold": DB_PREPARE_THRESHOLD},
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    check=ConnectionPool.check_connection,
+                    name="jobs_db",
+                    open=True,
+                )
+                atexit.register(close_pool)
+                info(f"Pool de connexions ouvert ({DB_POOL_MIN_SIZE} à {DB_POOL_MAX_SIZE} connexions).")
+    return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Prête une connexion du pool le temps d'un bloc `with`.
+    La transaction est validée en sortie de bloc, annulée en cas d'exception,
+    puis la connexion est rendue au pool.
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def create_async_pool(max_size: int = DB_POOL_MAX_SIZE) -> AsyncConnectionPool:
+    """
+    Crée un pool de connexions asynchrones, configuré comme le pool synchrone.
+    Le pool n'est pas ouvert : il doit l'être dans la boucle d'événements qui l'utilise
+    (`async with create_async_pool() as pool:`), puis fermé avec elle.
+    """
+    return AsyncConnectionPool(
+        kwargs={**DB_CONFIG, "prepare_threshold": DB_PREPARE_THRESHOLD},
+        min_size=min(DB_POOL_MIN_SIZE, max_size),
+        max_size=max_size,
+        timeout=DB_POOL_TIMEOUT,
+        check=AsyncConnectionPool.check_connection,
+        name="jobs_db_async",
+        open=False,
+    )
+
+
+def check_connection() -> bool:
+    """Vérifie que la base de données est joignable via le pool."""
+    try:
+        with pooled_connection() as conn:
+            conn.execute("SELECT 1;")
+        return True
+    except Exception as e:
+        error(f" Erreur de connexion : {e}")
+        return False
+
+
+def close_pool() -> None:
+    """Ferme le pool de connexions (appelé automatiquement en fin de processus)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
 if __name__ == "__main__":
     connect_db()
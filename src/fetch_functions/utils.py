@@ -1,4 +1,6 @@
 import json
+import typing
+import msgspec
 from logger.logger import *
 from datetime import datetime
 
@@ -29,8 +31,9 @@ def save_to_json(data, directory, source, filename=None):
     output_path = os.path.join(output_dir, filename)
 
     try:
-        with open(output_path, "w", encoding="utf-8") as file:
-            json.dump(data, file, ensure_ascii=False, indent=2)
+        # Encodage msgspec : UTF-8 direct (équivalent à ensure_ascii=False), sans indentation
+        with open(output_path, "wb") as file:
+            file.write(msgspec.json.encode(data))
         info(f"Données sauvegardées dans {output_path}")
     except Exception as e:
         error(f"Erreur lors de la sauvegarde dans {directory} : {e}")
@@ -116,16 +119,43 @@ def remove_no_results_terms(job_titles_path, no_results_queries):
 
 
 
-def load_json_safely(file_path):
-    """Charge un fichier JSON et gère les erreurs en cas d'échec."""
+def load_json_safely(file_path, decode_type=None):
+    """
+    Charge un fichier JSON et gère les erreurs en cas d'échec.
+
+    :param decode_type: Schéma optionnel (ex: list[AdzunaJob]) : les champs absents du schéma sont ignorés
+                        au décodage. Si un enregistrement ne respecte pas le schéma, seuls les enregistrements
+                        invalides d'une liste sont écartés.
+    """
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
+        with open(file_path, "rb") as file:
+            content = file.read()
+        if decode_type is None:
+            return msgspec.json.decode(content)
+        try:
+            return msgspec.json.decode(content, type=decode_type, strict=False)
+        except msgspec.ValidationError as e:
+            if typing.get_origin(decode_type) is not list:
+                raise
+            warning(f"Schéma non respecté dans {file_path} ({e}), décodage enregistrement par enregistrement.")
+            return _convert_valid_records(msgspec.json.decode(content), typing.get_args(decode_type)[0], file_path)
+    except (FileNotFoundError, msgspec.DecodeError) as e:
         error(f"Erreur lors de la lecture du fichier {file_path} : {e}")
         return None  # Retourne `None` au lieu de lever une exception
 
 
+def _convert_valid_records(records, record_type, file_path):
+    """Convertit chaque enregistrement dans le schéma donné et écarte ceux qui ne le respectent pas."""
+    valid_records = []
+    for record in records:
+        try:
+            valid_records.append(msgspec.convert(record, record_type, strict=False))
+        except msgspec.ValidationError:
+            continue
+    warning(f"{len(records) - len(valid_records)} enregistrements invalides écartés dans {file_path}.")
+    return valid_records
+
+
 
 def get_latest_file(directory):
     """
@@ -0,0 +1,135 @@
+"""
+Normalisation des dates des offres d'emploi au format PostgreSQL ('YYYY-MM-DD HH:MI:SS').
+
+Chaque source publie ses dates dans un format stable : le format est détecté sur la
+première date valide d'un lot puis réutilisé pour les suivantes. L'ISO 8601 (Adzuna,
+France Travail) passe par un chemin rapide, les autres formats ne sont essayés qu'en
+cas d'échec du format détecté.
+
+Les dates relatives de JSearch ("il y a 3 jours") sont calculées à partir d'une heure de
+référence unique pour toute l'exécution, ce qui les rend cohérentes entre elles et
+permet de mettre en cache les conversions (peu de valeurs distinctes).
+"""
+
+import re
+from datetime import datetime, timedelta
+from functools import partial
+
+
+OUTPUT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Liste des formats de dates possibles, dans l'ordre où ils sont essayés en secours
+DATE_FORMATS = [
+    "%Y-%m-%dT%H:%M:%SZ",    # Format ISO 8601 (Adzuna, France Travail)
+    "%Y-%m-%dT%H:%M:%S.%fZ", # Format ISO avec millisecondes
+    "%d/%m/%Y %H:%M:%S",     # Format français avec heure
+    "%Y-%m-%d %H:%M:%S",     # Format SQL classique
+    "%d-%m-%Y",              # Format court (jour-mois-année)
+    "%Y/%m/%d",              # Format alternatif (année/mois/jour)
+]
+
+# ISO 8601 en UTC, avec ou sans fractions de seconde : "2025-07-01T10:20:30Z", "2025-07-01T10:20:30.000Z"
+ISO_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{1,6})?Z")
+RELATIVE_PATTERN = re.compile(r"il y a (\d+)\s*(jours?|heures?)")
+
+
+def parse_iso(date_str: str) -> str:
+    """
+    Chemin rapide ISO 8601 : la date est validée par `datetime.fromisoformat` (C)
+    et le résultat est obtenu par découpage de la chaîne, sans reformatage.
+    Lève ValueError si la chaîne n'est pas au format attendu.
+    """
+    if not ISO_PATTERN.fullmatch(date_str):
+        raise ValueError(f"Date non ISO : {date_str}")
+    datetime.fromisoformat(date_str[:19])  # Valide jour/mois/heure
+    return f"{date_str[:10]} {date_str[11:19]}"
+
+
+def parse_with_format(date_format: str, date_str: str) -> str:
+    """Chemin de secours : strptime avec un format explicite puis reformatage."""
+    return datetime.strptime(date_str, date_format).strftime(OUTPUT_FORMAT)
+
+
+DATE_PARSERS = [parse_iso] + [partial(parse_with_format, date_format) for date_format in DATE_FORMATS]
+
+
+class DateNormalizer:
+    """
+    Normaliseur de dates pour une source.
+
+    Le parser est détecté une fois par lot (`start_batch`) puis tenté en premier pour
+    chaque date ; les autres formats ne sont essayés que s'il échoue.
+    Les instances peuvent être partagées entre threads : les écritures concurrentes
+    (parser détecté, cache des dates relatives) sont idempotentes.
+    """
+
+    def __init__(self, reference_time: datetime = None):
+        self.reference_time = reference_time or datetime.now()
+        self._parser = None
+        self._relative_cache = {}
+
+    def start_batch(self, reference_time: datetime = None) -> None:
+        """
+        Démarre un nouveau lot : le format sera détecté à nouveau.
+        Si une heure de référence est fournie, elle remplace la précédente (nouvelle exécution).
+        """
+        self._parser = None
+        if reference_time is not None:
+            self.reference_time = reference_time
+            self._relative_cache = {}
+
+    def to_timestamp(self, date_str):
+        """
+        Convertit une date sous différents formats en un timestamp PostgreSQL-compatible.
+
+        :return: Chaîne au format 'YYYY-MM-DD HH:MI:SS' ou None si la conversion échoue.
+        """
+        if not date_str:
+            return None
+
+        parser = self._parser
+        if parser is not None:
+            try:
+                return parser(date_str)
+            except ValueError:
+                pass
+
+        for candidate in DATE_PARSERS:
+            if candidate is parser:
+                continue
+            try:
+                result = candidate(date_str)
+            except ValueError:
+                continue
+            if self._parser is None:
+                self._parser = candidate
+            return result
+
+        # Si aucun format ne correspond, on retourne None
+        return None
+
+    def from_relative(self, relative_str):
+        """
+        Convertit une chaîne du format "il y a X jours" ou "il y a X heures"
+        en un timestamp PostgreSQL-compatible, relativement à l'heure de référence.
+        """
+        if not relative_str or not isinstance(relative_str, str):
+            return None
+
+        try:
+            return self._relative_cache[relative_str]
+        except KeyError:
+            pass
+
+        result = None
+        match = RELATIVE_PATTERN.search(relative_str.lower().strip())
+        if match:
+            number = int(match.group(1))
+            if "jour" in match.group(2):
+                delta = timedelta(days=number)
+            else:
+                delta = timedelta(hours=number)
+            result = (self.reference_time - delta).strftime(OUTPUT_FORMAT)
+
+        self._relative_cache[relative_str] = result
+        return result
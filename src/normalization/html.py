@@ -0,0 +1,26 @@
+"""
+Nettoyage des descriptions d'offres : balises HTML, entités &nbsp; et espaces superflus.
+
+La plupart des descriptions (Adzuna, JSearch) sont du texte brut : elles ne passent que
+par le regroupement des espaces. Les descriptions HTML sont nettoyées en une seule passe
+(balises et &nbsp; remplacés ensemble) au lieu d'une regex suivie de plusieurs `replace`.
+"""
+
+import re
+
+
+# Balise HTML ou espace insécable encodé, remplacés par un espace
+HTML_NOISE_PATTERN = re.compile(r"<[^>]+>|&nbsp;")
+
+
+def strip_html(text):
+    """
+    Supprime les balises HTML et les espaces inutiles d'une description.
+    Retourne None si le texte est vide.
+    """
+    if not text:
+        return None
+    if "<" in text or "&nbsp;" in text:
+        text = HTML_NOISE_PATTERN.sub(" ", text)
+    # str.split() découpe sur les mêmes espaces que `\s` (dont \n et \r)
+    return " ".join(text.split())
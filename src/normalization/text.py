@@ -0,0 +1,117 @@
+"""
+Noyau de normalisation de texte partagé par l'ETL (transform.py) et le moteur de recommandation.
+
+Les deux normalisations historiques enchaînaient NFD + encodage ASCII + plusieurs `re.sub`
+pour chaque chaîne. Ce module produit exactement les mêmes sorties avec :
+- la décomposition NFD évitée pour les chaînes déjà ASCII ;
+- un traitement en octets après suppression des accents : `bytes.translate` (suppression et
+  remplacement en une passe) et `bytes.split` remplacent les `re.sub` ;
+- des expressions régulières compilées une seule fois et appliquées seulement si nécessaire ;
+- un cache LRU borné optionnel pour les champs courts et répétitifs (entreprises, villes).
+
+Variable d'environnement :
+- TEXT_NORMALIZATION_CACHE_SIZE : taille du cache LRU par fonction (défaut 65536, 0 = désactivé).
+"""
+
+import os
+import re
+import string
+import unicodedata
+from functools import lru_cache, wraps
+
+
+CACHE_SIZE = int(os.environ.get("TEXT_NORMALIZATION_CACHE_SIZE", 65536))
+
+# Séparateurs ASCII reconnus par `\s` et `str.split` mais pas par `bytes.split` → espaces
+_SEPARATORS = b"\x1c\x1d\x1e\x1f"
+_SEPARATOR_TABLE = bytes.maketrans(_SEPARATORS, b" " * len(_SEPARATORS))
+
+# Tirets/apostrophes → espaces (libellés ETL)
+_DASH_TABLE = bytes.maketrans(b"-'" + _SEPARATORS, b" " * (len(_SEPARATORS) + 2))
+
+# Octets ASCII supprimés du texte de recherche : tout sauf [a-z0-9] et les espaces au sens de `\s`
+_SEARCH_KEPT = (string.ascii_lowercase + string.digits + " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f").encode("ascii")
+_SEARCH_DELETE = bytes(byte for byte in range(128) if byte not in _SEARCH_KEPT)
+
+SAINT_PATTERN = re.compile(r"\bSAINT\b")
+ARRONDISSEMENT_PATTERN = re.compile(r"(\d{1,2})[EÈ]M[EÈ]?\s*ARRONDISSEMENT,?\s*(\w+)", re.IGNORECASE)
+CITY_NUMBER_PATTERN = re.compile(r"^(?P<ville>.+?)\s+(?P<num>\d{1,2})$")
+
+
+def fold_ascii(text: str) -> bytes:
+    """
+    Supprime les accents et tout caractère non ASCII, en restant en octets pour la suite
+    du traitement. Équivalent à `unicodedata.normalize("NFD", text).encode("ascii", "ignore")`,
+    la décomposition étant évitée pour les chaînes déjà ASCII.
+    """
+    if text.isascii():
+        return text.encode("ascii")
+    return unicodedata.normalize("NFD", text).encode("ascii", "ignore")
+
+
+def normalize_label(text):
+    """
+    Normalise un libellé court (ville, entreprise, pays) pour l'ETL :
+      - suppression des accents, majuscules
+      - tirets/apostrophes → espaces
+      - espaces multiples → un seul
+      - SAINT → ST
+      - arrondissements ou "<Ville> <n>" → "VILLE NN" (zéro-pad)
+    Retourne None si le texte est vide ou n'est pas une chaîne.
+    """
+    if not text or not isinstance(text, str):
+        return None
+
+    s = b" ".join(fold_ascii(text).upper().translate(_DASH_TABLE).split()).decode("ascii")
+
+    if "SAINT" in s:
+        s = SAINT_PATTERN.sub("ST", s)
+
+    # Arrondissements explicites : "9E ARRONDISSEMENT, PARIS" → "PARIS 09"
+    if "ARRONDISSEMENT" in s:
+        m = ARRONDISSEMENT_PATTERN.search(s)
+        if m:
+            return f"{m.group(2).upper()} {m.group(1).zfill(2)}"
+
+    # "<Ville> <n>" en fin de chaîne : "PARIS 8" ou "PARIS 08"
+    if s[-1:].isdigit():
+        m = CITY_NUMBER_PATTERN.search(s)
+        if m:
+            return f"{m.group('ville').strip()} {m.group('num').zfill(2)}"
+
+    return s
+
+
+def normalize_search_text(text) -> str:
+    """
+    Normalise un texte pour la vectorisation : suppression des accents, minuscules,
+    suppression des caractères non alphanumériques (sauf espaces) et des espaces multiples.
+    Retourne une chaîne vide si le texte est vide ou n'est pas une chaîne.
+    """
+    if not text or not isinstance(text, str):
+        return ""
+    return b" ".join(fold_ascii(text).lower().translate(_SEPARATOR_TABLE, _SEARCH_DELETE).split()).decode("ascii")
+
+
+def _with_lru_cache(func):
+    """Ajoute un cache LRU borné à une fonction de normalisation (chaînes uniquement)."""
+    if CACHE_SIZE <= 0:
+        return func
+
+    cached_func = lru_cache(maxsize=CACHE_SIZE)(func)
+
+    @wraps(func)
+    def wrapper(text):
+        if isinstance(text, str):
+            return cached_func(text)
+        return func(text)
+
+    wrapper.cache_info = cached_func.cache_info
+    wrapper.cache_clear = cached_func.cache_clear
+    return wrapper
+
+
+# Variantes mises en cache, réservées aux champs courts et répétitifs :
+# inutile (et coûteux en mémoire) pour les descriptions.
+normalize_label_cached = _with_lru_cache(normalize_label)
+normalize_search_text_cached = _with_lru_cache(normalize_search_text)
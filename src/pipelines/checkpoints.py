@@ -0,0 +1,88 @@
+"""
+Points de reprise du chargement en base.
+
+Le chargement progresse par lots. Après chaque lot validé, la table load_checkpoints enregistre,
+pour le fichier transformé en cours (snapshot_id), le dernier lot validé, la taille des lots et
+le nombre d'offres du fichier déjà chargées. Si le chargement est interrompu (OOM, redémarrage
+de la base, timeout de la tâche Airflow), la tentative suivante sur le même fichier reprend
+après la dernière offre chargée. Le point de reprise est supprimé une fois le fichier chargé.
+
+Les upserts étant idempotents, un lot rejoué (interruption entre la validation du lot et
+l'écriture du point de reprise) ne crée pas de doublon.
+"""
+
+import os
+
+from db.db_connection import pooled_connection
+from logger.logger import info, warning
+
+
+def snapshot_id(file_path: str) -> str:
+    """Identifiant d'un fichier transformé (son nom, horodaté)."""
+    return os.path.basename(file_path)
+
+
+class LoadCheckpoint:
+    """
+    Point de reprise du chargement d'un fichier transformé.
+    Une erreur d'accès à la table (migration non appliquée...) désactive le suivi
+    sans interrompre le chargement.
+    """
+
+    def __init__(self, snapshot: str):
+        self.snapshot = snapshot
+        self.last_batch = -1
+        self.loaded_offers = 0
+        self.enabled = True
+
+    def resume(self) -> int:
+        """Lit le point de reprise du fichier ; retourne le nombre d'offres déjà chargées."""
+        try:
+            with pooled_connection() as conn:
+                row = conn.execute(
+                    "SELECT last_batch, loaded_offers FROM load_checkpoints WHERE snapshot_id = %s;",
+                    (self.snapshot,),
+                ).fetchone()
+        except Exception as e:
+            self._disable(e)
+            return 0
+
+        if row:
+            self.last_batch, self.loaded_offers = row
+            info(f"Reprise du chargement de {self.snapshot} après le lot {self.last_batch} "
+                 f"({self.loaded_offers} offres déjà chargées).")
+        return self.loaded_offers
+
+    def commit_batch(self, offers: int, batch_size: int) -> None:
+        """Enregistre la validation du lot suivant (lots validés dans l'ordre du fichier)."""
+        self.last_batch += 1
+        self.loaded_offers += offers
+        if not self.enabled:
+            return
+        try:
+            with pooled_connection() as conn:
+                conn.execute("""
+                    INSERT INTO load_checkpoints (snapshot_id, last_batch, batch_size, loaded_offers, updated_at)
+                    VALUES (%s, %s, %s, %s, NOW())
+                    ON CONFLICT (snapshot_id) DO UPDATE SET
+                        last_batch = EXCLUDED.last_batch,
+                        batch_size = EXCLUDED.batch_size,
+                        loaded_offers = EXCLUDED.loaded_offers,
+                        updated_at = EXCLUDED.updated_at;
+                """, (self.snapshot, self.last_batch, batch_size, self.loaded_offers))
+        except Exception as e:
+            self._disable(e)
+
+    def complete(self) -> None:
+        """Supprime le point de reprise : le fichier a été entièrement chargé."""
+        if not self.enabled:
+            return
+        try:
+            with pooled_connection() as conn:
+                conn.execute("DELETE FROM load_checkpoints WHERE snapshot_id = %s;", (self.snapshot,))
+        except Exception as e:
+            self._disable(e)
+
+    def _disable(self, error) -> None:
+        warning(f"Points de reprise du chargement indisponibles : {error}")
+        self.enabled = False
@@ -0,0 +1,173 @@
+"""
+Cache en mémoire des dimensions (sources, entreprises, localisations) pour le chargement offre par offre.
+
+Les tables sont préchargées au début du chargement sous forme de dictionnaires clé naturelle → ID.
+Avant chaque lot, les clés encore inconnues sont insérées en une requête par table ; les offres du
+lot résolvent ensuite leurs clés étrangères en mémoire, sans aller-retour vers la base.
+
+Les clés sont normalisées comme dans insert_source / insert_company / insert_location.
+Une clé absente du cache (valeur rejetée par la base lors de l'insertion groupée) est insérée
+offre par offre par ces fonctions, qui lèvent alors la même erreur qu'auparavant.
+Les offres sans entreprise sont chargées sans company_id, comme dans le chargement en masse.
+"""
+
+from logger.logger import info, warning
+
+
+# Longueurs maximales des colonnes (schema.sql) : les clés plus longues ne sont pas insérées par lot
+MAX_SOURCE_LENGTH = 50
+MAX_NAME_LENGTH = 255
+MAX_CODE_POSTAL_LENGTH = 10
+
+
+def _clean(value):
+    """Supprime les espaces en début et fin de chaîne ; une chaîne vide devient None."""
+    return (value.strip() or None) if isinstance(value, str) else value
+
+
+def source_key(name):
+    return _clean(name)
+
+
+def company_key(name):
+    return _clean(name)
+
+
+def location_key(location, code_postal, country):
+    return _clean(location), _clean(code_postal), _clean(country)
+
+
+def _fits(value, max_length):
+    return value is None or len(value) <= max_length
+
+
+def _coordinate(value):
+    """Coordonnée en float (les tableaux envoyés à la base sont homogènes) ; "" devient None."""
+    return None if value in (None, "") else float(value)
+
+
+class DimensionCache:
+    """
+    Dictionnaires clé naturelle → ID des tables sources, companies et locations.
+    Seul le thread principal écrit dans le cache (préchargement et ajout par lot) ;
+    les threads de chargement ne font que le lire.
+    """
+
+    def __init__(self):
+        self.sources = {}
+        self.companies = {}
+        self.locations = {}
+
+    def preload(self, conn) -> None:
+        """Charge le contenu des trois tables de dimensions."""
+        with conn.cursor() as cur:
+            cur.execute("SELECT name, source_id FROM sources;")
+            self.sources = dict(cur.fetchall())
+
+            cur.execute("SELECT name, company_id FROM companies WHERE name IS NOT NULL;")
+            self.companies = dict(cur.fetchall())
+
+            cur.execute("SELECT location, code_postal, country, location_id FROM locations;")
+            self.locations = {(loc, cp, country): location_id for loc, cp, country, location_id in cur.fetchall()}
+
+        info(
+            f"Dimensions préchargées : {len(self.sources)} sources, {len(self.companies)} entreprises, "
+            f"{len(self.locations)} localisations."
+        )
+
+    def add_missing(self, conn, jobs) -> None:
+        """Insère en une requête par table les dimensions des offres du lot absentes du cache."""
+        missing_sources = set()
+        missing_companies = set()
+        missing_locations = {}
+
+        for job in jobs:
+            source = source_key(job.get("source"))
+            loc_key = location_key(job.get("location"), job.get("code_postal"), job.get("country"))
+            # Offres qui seront ignorées par insert_job_offer : rien à insérer
+            if not _clean(job.get("title")) or source is None or (loc_key[0] is None and loc_key[2] is None):
+                continue
+
+            if source not in self.sources and _fits(source, MAX_SOURCE_LENGTH):
+                missing_sources.add(source)
+
+            company = company_key(job.get("company"))
+            if company is not None and company not in self.companies and _fits(company, MAX_NAME_LENGTH):
+                missing_companies.add(company)
+
+            if (
+                loc_key not in self.locations and loc_key not in missing_locations
+                and _fits(loc_key[0], MAX_NAME_LENGTH)
+                and _fits(loc_key[1], MAX_CODE_POSTAL_LENGTH)
+                and _fits(loc_key[2], MAX_NAME_LENGTH)
+            ):
+                try:
+                    missing_locations[loc_key] = (_coordinate(job.get("longitude")), _coordinate(job.get("latitude")))
+                except (TypeError, ValueError):
+                    continue  # Coordonnées invalides : insertion offre par offre
+
+        if not (missing_sources or missing_companies or missing_locations):
+            return
+
+        try:
+            with conn.cursor() as cur:
+                if missing_sources:
+                    cur.execute("""
+                        INSERT INTO sources (name) SELECT unnest(%s::text[])
+                        ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+                        RETURNING name, source_id;
+                    """, (list(missing_sources),))
+                    new_sources = dict(cur.fetchall())
+                else:
+                    new_sources = {}
+
+                if missing_companies:
+                    cur.execute("""
+                        INSERT INTO companies (name) SELECT unnest(%s::text[])
+                        ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+                        RETURNING name, company_id;
+                    """, (list(missing_companies),))
+                    new_companies = dict(cur.fetchall())
+                else:
+                    new_companies = {}
+
+                if missing_locations:
+                    keys = list(missing_locations)
+                    cur.execute("""
+                        INSERT INTO locations (location, code_postal, country, longitude, latitude)
+                        SELECT * FROM unnest(%s::text[], %s::text[], %s::text[], %s::float8[], %s::float8[])
+                        ON CONFLICT (location, code_postal, country) DO UPDATE SET location = EXCLUDED.location
+                        RETURNING location, code_postal, country, location_id;
+                    """, (
+                        [key[0] for key in keys],
+                        [key[1] for key in keys],
+                        [key[2] for key in keys],
+                        [missing_locations[key][0] for key in keys],
+                        [missing_locations[key][1] for key in keys],
+                    ))
+                    new_locations = {(loc, cp, country): location_id for loc, cp, country, location_id in cur.fetchall()}
+                else:
+                    new_locations = {}
+            conn.commit()
+        except Exception as e:
+            # Le lot sera chargé sans cache pour les clés manquantes (insertion offre par offre)
+            conn.rollback()
+            warning(f"Insertion groupée des dimensions impossible : {e}")
+            return
+
+        # Le cache n'est complété qu'une fois les insertions validées
+        self.sources.update(new_sources)
+        self.companies.update(new_companies)
+        self.locations.update(new_locations)
+
+    def lookup_source(self, name):
+        """ID d'une source en cache, ou None."""
+        return self.sources.get(source_key(name))
+
+    def lookup_company(self, name):
+        """ID d'une entreprise en cache, ou None."""
+        return self.companies.get(company_key(name))
+
+    def lookup_location(self, location, code_postal, country):
+        """ID d'une localisation en cache, ou None."""
+        return self.locations.get(location_key(location, code_postal, country))
@@ -4,6 +4,7 @@ from fetch_functions.utils import load_json_safely, save_to_json
 from fetch_functions.adzuna_api import fetch_jobs_from_adzuna
 from fetch_functions.france_travail_api import get_bearer_token, fetch_jobs_from_france_travail
 from fetch_functions.jsearch_api import fetch_jobs_from_jsearch
+from pipelines.run_report import track_stage
 
 
 # Déterminer le chemin racine du projet (Job_Market)
@@ -38,6 +39,7 @@ appellations = load_json_safely(APPELLATIONS_FILE)
 job_appellations = [app["code"] for app in appellations] if appellations else []
 
 
+@track_stage("extract_adzuna")
 def extract_from_adzuna():
     """Orchestration : récupère les offres d'emploi de toutes les APIs et les unifie."""
     info("Début de l'extraction des offres d'emploi depuis Adzuna...")
@@ -55,6 +57,7 @@ def extract_from_adzuna():
         error(f'{e}')
 
 
+@track_stage("extract_ft")
 def extract_from_ft():
     # Extraction depuis France Travail avec les appellations sélectionnées.
     info("Début de l'extraction des offres d'emploi depuis France Travail...")
@@ -80,6 +83,7 @@ def extract_from_ft():
         error(f'{e}')
 
 
+@track_stage("extract_jsearch")
 def extract_from_jsearch():
     # Extraction depuis JSearch
     info("Début de l'extraction des offres d'emploi depuis JSearch...")
@@ -1,10 +1,67 @@
-import json
+import os
 import datetime
-from db.db_connection import connect_db
+import time
+from functools import partial
+import psycopg
+from db.db_connection import pooled_connection, check_connection
 from logger.logger import info, warning, critical
 from pipelines.transform import PROCESSED_DATA_DIR
-from fetch_functions.utils import get_latest_file
-
+from fetch_functions.utils import get_latest_file, load_json_safely
+from pipelines.records import OfferKey, ProcessedOffer
+from pipelines.run_report import add_stage_details, track_stage
+from pipelines.checkpoints import LoadCheckpoint, snapshot_id
+from pipelines.dimension_cache import DimensionCache, company_key
+from pipelines.read_models import refresh_offer_rollups, refresh_offer_search
+from more_itertools import chunked
+from storage.description_store import open_description_store, get_description
+
+
+# Mode de chargement : "bulk" (COPY + upserts ensemblistes, défaut), "threaded" (offre par offre)
+# ou "async" (lots concurrents sur connexions asynchrones en mode pipeline, voir load_async)
+LOAD_MODE = os.environ.get("LOAD_MODE", "bulk")
+
+# Taille des lots du chargement offre par offre (dimensions manquantes insérées par lot)
+LOAD_BATCH_SIZE = int(os.environ.get("LOAD_BATCH_SIZE", 1000))
+
+# Nombre de threads du chargement offre par offre
+LOAD_THREADS = int(os.environ.get("LOAD_THREADS", 4))
+
+# Taille des lots du chargement en masse (une transaction et un point de reprise par lot)
+BULK_BATCH_SIZE = int(os.environ.get("BULK_BATCH_SIZE", 50000))
+
+SOURCE_TABLES = {
+    "Adzuna": "adzuna_offers",
+    "France Travail": "france_travail_offers",
+    "JSearch": "jsearch_offers"
+}
+
+# Upsert d'une offre dans job_offers (paramètres : valeurs retournées par insert_job_offer).
+# Une offre active dont l'empreinte est inchangée n'est pas réécrite (ni journalisée) :
+# aucune ligne n'est alors retournée.
+UPSERT_JOB_OFFER_SQL = """
+    INSERT INTO job_offers (source_id, external_id, company_id, location_id, salary_min, salary_max, created_at, status)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, 'active')
+    ON CONFLICT (external_id, source_id)
+    DO UPDATE SET
+        company_id = EXCLUDED.company_id,
+        location_id = EXCLUDED.location_id,
+        salary_min = EXCLUDED.salary_min,
+        salary_max = EXCLUDED.salary_max,
+        created_at = EXCLUDED.created_at,
+        status = 'active'
+    WHERE job_offers.status IS DISTINCT FROM 'active'
+       OR job_offers.content_hash IS DISTINCT FROM job_offer_content_hash(
+              EXCLUDED.company_id, EXCLUDED.location_id, EXCLUDED.salary_min,
+              EXCLUDED.salary_max, EXCLUDED.created_at
+          )
+    RETURNING job_id
+"""
+
+STAGING_COLUMNS = (
+    "position", "source", "external_id", "title", "company", "location", "code_postal",
+    "longitude", "latitude", "country", "salary_min", "salary_max", "created_at",
+    "contract_type", "sector", "description", "apply_url",
+)
 
 def insert_source(cur, source_name):
     """Insère une source et retourne son ID.
@@ -54,26 +111,25 @@ def insert_location(cur, location, code_postal, longitude, latitude, country):
     latitude = latitude if latitude != "" else None
     country = country.strip() if country and country.strip() != "" else None
 
-    # Comparaison avec IS NOT DISTINCT FROM pour gérer les NULL
-    cur.execute(
-            "SELECT location_id FROM locations WHERE location IS NOT DISTINCT FROM %s AND code_postal IS NOT DISTINCT FROM %s AND country IS NOT DISTINCT FROM %s;",
-        (location, code_postal, country)
-    )
-    existing = cur.fetchone()
-    if existing:
-        return existing[0]
-
+    # Un seul aller-retour : la contrainte unique_location (NULLS NOT DISTINCT) résout les conflits,
+    # y compris entre threads ; en cas de conflit, la ligne existante est retournée sans changement.
     cur.execute(
-        "INSERT INTO locations (location, code_postal, longitude, latitude, country) VALUES (%s, %s, %s, %s, %s) RETURNING location_id;",
+        """
+        INSERT INTO locations (location, code_postal, longitude, latitude, country) VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (location, code_postal, country) DO UPDATE SET location = EXCLUDED.location
+        RETURNING location_id;
+        """,
         (location, code_postal, longitude, latitude, country)
     )
     return cur.fetchone()[0]
 
 
 
-def insert_job_offer(cur, job):
+def insert_job_offer(cur, job, dimensions=None):
     """
     Prépare une offre d'emploi pour l'insertion.
+    - Si un cache de dimensions est fourni, les IDs de source, d'entreprise et de localisation y sont
+      résolus en mémoire ; seules les clés absentes du cache sont insérées.
     - Si le champ 'title' est manquant, l'offre est ignorée.
     - Si 'created_at' n'est pas fourni, la date et l'heure actuelles sont utilisées.
     - La source est obligatoire.
@@ -87,7 +143,9 @@ def insert_job_offer(cur, job):
     if not job.get("created_at"):
         job["created_at"] = datetime.datetime.now()
 
-    source_id = insert_source(cur, job.get("source"))
+    source_id = dimensions.lookup_source(job.get("source")) if dimensions else None
+    if source_id is None:
+        source_id = insert_source(cur, job.get("source"))
     if source_id is None:
         warning("Offre {} ignorée en raison d'une source manquante.".format(job.get("external_id", "N/A")))
         return None
@@ -100,10 +158,17 @@ def insert_job_offer(cur, job):
         warning("Offre {} ignorée car localisation et pays sont absents.".format(job.get("external_id", "N/A")))
         return None
 
-    company_id = insert_company(cur, job.get("company"))
+    if dimensions is None:
+        company_id = insert_company(cur, job.get("company"))
+    elif company_key(job.get("company")) is None:
+        company_id = None
+    else:
+        company_id = dimensions.lookup_company(job.get("company")) or insert_company(cur, job.get("company"))
 
     # Appel à insert_location avec la valeur de country.
-    location_id = insert_location(cur, location_value, job.get("code_postal"), job.get("longitude"), job.get("latitude"), country_value)
+    location_id = dimensions.lookup_location(location_value, job.get("code_postal"), country_value) if dimensions else None
+    if location_id is None:
+        location_id = insert_location(cur, location_value, job.get("code_postal"), job.get("longitude"), job.get("latitude"), country_value)
 
     return (
         source_id,
@@ -119,12 +184,7 @@ def insert_job_offer(cur, job):
 
 def upsert_specific_source_table(cur, job_id, job):
     """Insère ou met à jour les données spécifiques à chaque source dans la table correspondante."""
-    source_table_map = {
-        "Adzuna": "adzuna_offers",
-        "France Travail": "france_travail_offers",
-        "JSearch": "jsearch_offers"
-    }
-    table_name = source_table_map.get(job.get("source"))
+    table_name = SOURCE_TABLES.get(job.get("source"))
     if not table_name:
         return
     cur.execute(f"""
@@ -135,88 +195,354 @@ def upsert_specific_source_table(cur, job_id, job):
             contract_type = EXCLUDED.contract_type,
             sector = EXCLUDED.sector,
             description = EXCLUDED.description,
-            apply_url = EXCLUDED.apply_url;
+            apply_url = EXCLUDED.apply_url
+        WHERE {table_name}.content_hash IS DISTINCT FROM offer_detail_content_hash(
+            EXCLUDED.title, EXCLUDED.contract_type, EXCLUDED.sector, EXCLUDED.description, EXCLUDED.apply_url
+        );
     """, (job_id, job.get("title"), job.get("contract_type"), job.get("sector"), job.get("description"), job.get("apply_url")))
 
 
 
-def process_job(job):
+def process_job(job, descriptions=None, dimensions=None):
     """
     Traite une offre d'emploi : insertion ou mise à jour dans job_offers et dans la table spécifique si applicable.
-    Retourne un tuple (succès: bool, external_id: str).
+    La description est lue à la demande dans le stockage `descriptions` lorsqu'il est fourni,
+    les clés étrangères dans le cache `dimensions`.
+    Retourne un tuple (succès: bool, external_id: str) ; une offre n'est ignorée (succès False) que si elle
+    est rejetée pour ses données. Une erreur de base ou de connexion est propagée : le lot n'est pas validé
+    et le point de reprise n'avance pas.
     """
+    if descriptions is not None:
+        job = {**job, "description": get_description(job, descriptions) or None}
+
     try:
-        with connect_db() as conn:
+        with pooled_connection() as conn:
             with conn.cursor() as cur:
-                job_data = insert_job_offer(cur, job)
+                job_data = insert_job_offer(cur, job, dimensions)
                 if job_data is None:
                     warning("Offre {} ignorée (données insuffisantes).".format(job.get("external_id", "N/A")))
                     return False, job.get("external_id", "N/A")
 
-                # Upsert dans job_offers
-                cur.execute("""
-                    INSERT INTO job_offers (source_id, external_id, company_id, location_id, salary_min, salary_max, created_at, status)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, 'active')
-                    ON CONFLICT (external_id, source_id)
-                    DO UPDATE SET 
-                        company_id = EXCLUDED.company_id,
-                        location_id = EXCLUDED.location_id,
-                        salary_min = EXCLUDED.salary_min,
-                        salary_max = EXCLUDED.salary_max,
-                        created_at = EXCLUDED.created_at,
-                        status = 'active'
-                    RETURNING job_id;
-                """, job_data)
+                # Upsert dans job_offers : une offre active et inchangée n'est pas réécrite (ni journalisée).
+                # Son job_id est alors lu dans la même requête.
+                cur.execute(f"""
+                    WITH upserted AS ({UPSERT_JOB_OFFER_SQL})
+                    SELECT job_id FROM upserted
+                    UNION ALL
+                    SELECT job_id FROM job_offers WHERE external_id = %s::text AND source_id = %s
+                    LIMIT 1;
+                """, (*job_data, job_data[1], job_data[0]))
                 job_id = cur.fetchone()[0]
 
                 # Upsert dans la table spécifique en fonction de la source
                 upsert_specific_source_table(cur, job_id, job)
             conn.commit()
         return True, job.get("external_id", "N/A")
+    except (psycopg.DataError, psycopg.IntegrityError) as e:
+        # Offre rejetée par la base (valeur invalide, contrainte non respectée) : ignorée
+        warning("Offre {} rejetée par la base : {}".format(job.get("external_id", "N/A"), e))
+        return False, job.get("external_id", "N/A")
     except Exception as e:
         critical("Erreur lors de l'insertion/mise à jour de l'offre {} : {}".format(job.get("external_id", "N/A"), e))
-        return False, job.get("external_id", "N/A")
+        raise
 
 
 
-def load_jobs_multithreaded(jobs, max_threads):
+def load_jobs_multithreaded(jobs, max_threads, descriptions=None, checkpoint=None):
     """
-    Charge les offres en parallèle via multithreading.
-    Traite chaque offre individuellement en ouvrant une connexion par thread.
+    Charge les offres en parallèle via multithreading, par lots de LOAD_BATCH_SIZE offres.
+    Les dimensions sont préchargées en mémoire et celles qui manquent sont insérées avant chaque lot.
+    Traite chaque offre individuellement avec une connexion empruntée au pool.
+    Un lot est terminé lorsque toutes ses offres sont validées : le point de reprise
+    `checkpoint` (s'il est fourni) est alors avancé. Une erreur de base ou de connexion interrompt
+    le chargement (exception propagée) sans avancer le point de reprise du lot en cours.
     Avant de lancer le traitement, vérifie que la connexion à la base est fonctionnelle.
     Log le nombre total d'offres insérées et la liste des offres ignorées.
     """
-    try:
-        with connect_db():
-            info("Connexion à la base de données vérifiée avec succès.")
-    except Exception as e:
-        critical("Impossible d'établir une connexion à la base de données : {}".format(e))
-        return 0, []
+    if not check_connection():
+        critical("Impossible d'établir une connexion à la base de données.")
+        raise ConnectionError("base de données injoignable")
+    info("Connexion à la base de données vérifiée avec succès.")
 
     total_inserted = 0
     skipped_offers = []
+    batch_reports = []
     info("⚡ Insertion en parallèle avec {} threads...".format(max_threads))
 
+    dimensions = DimensionCache()
+    with pooled_connection() as conn:
+        dimensions.preload(conn)
+
     from concurrent.futures import ThreadPoolExecutor
     with ThreadPoolExecutor(max_workers=max_threads) as executor:
-        results = list(executor.map(process_job, jobs))
+        for batch in chunked(jobs, LOAD_BATCH_SIZE):
+            batch_start = time.perf_counter()
+            with pooled_connection() as conn:
+                dimensions.add_missing(conn, batch)
+
+            batch_inserted = 0
+            batch_skipped = 0
+            results = executor.map(partial(process_job, descriptions=descriptions, dimensions=dimensions), batch)
+            try:
+                for success, external_id in results:
+                    if success:
+                        batch_inserted += 1
+                    else:
+                        batch_skipped += 1
+                        skipped_offers.append(external_id)
+            except Exception:
+                critical("Lot {} interrompu : point de reprise non avancé.".format(len(batch_reports)))
+                add_stage_details(threaded_batches=batch_reports)
+                raise
+
+            total_inserted += batch_inserted
+            if checkpoint is not None:
+                checkpoint.commit_batch(len(batch), LOAD_BATCH_SIZE)
+            batch_reports.append(batch_report(len(batch_reports), len(batch), batch_inserted, batch_skipped, batch_start))
+
+    add_stage_details(threaded_batches=batch_reports)
+    info("{} offres insérées avec succès.".format(total_inserted))
+    info(f"{len(skipped_offers)} Offres ignorées")
+    return total_inserted, skipped_offers
 
-    for success, external_id in results:
-        if success:
-            total_inserted += 1
-        else:
-            skipped_offers.append(external_id)
 
-    info("{} offres insérées avec succès.".format(total_inserted))
+def batch_report(index, offers, inserted, skipped, started_at):
+    """Entrée du rapport d'exécution pour un lot chargé."""
+    return {
+        "batch": index,
+        "offers": offers,
+        "inserted": inserted,
+        "skipped": skipped,
+        "duration_s": round(time.perf_counter() - started_at, 3),
+    }
+
+
+
+def _numeric_or_none(value):
+    """Les valeurs numériques vides ("") sont chargées comme NULL, comme dans insert_location."""
+    return None if value == "" else value
+
+
+def copy_jobs_to_staging(cur, jobs, descriptions=None):
+    """
+    Copie les offres dans la table de transit via COPY (un seul aller-retour réseau en flux).
+    Les descriptions sont lues dans le stockage au fil de la copie.
+    """
+    cur.execute("TRUNCATE staging_job_offers;")
+    with cur.copy(f"COPY staging_job_offers ({', '.join(STAGING_COLUMNS)}) FROM STDIN") as copy:
+        for position, job in enumerate(jobs):
+            copy.write_row((
+                position,
+                job.get("source"),
+                job.get("external_id"),
+                job.get("title"),
+                job.get("company"),
+                job.get("location"),
+                job.get("code_postal"),
+                _numeric_or_none(job.get("longitude")),
+                _numeric_or_none(job.get("latitude")),
+                job.get("country"),
+                _numeric_or_none(job.get("salary_min")),
+                _numeric_or_none(job.get("salary_max")),
+                job.get("created_at") or None,
+                job.get("contract_type"),
+                job.get("sector"),
+                get_description(job, descriptions) or None,
+                job.get("apply_url"),
+            ))
+
+
+def discard_invalid_staged_jobs(cur):
+    """
+    Écarte les offres que le chargement offre par offre ignorerait (titre, source ou localisation
+    manquants) ou rejetterait (valeurs trop longues pour les colonnes), ainsi que les doublons
+    (source, external_id) du fichier, dont seule la dernière occurrence est conservée.
+    Retourne la liste des external_id écartés.
+    """
+    cur.execute("""
+        DELETE FROM staging_job_offers
+         WHERE NULLIF(btrim(title), '') IS NULL
+            OR NULLIF(btrim(source), '') IS NULL
+            OR external_id IS NULL
+            OR (NULLIF(btrim(location), '') IS NULL AND NULLIF(btrim(country), '') IS NULL)
+            OR char_length(btrim(source)) > 50
+            OR char_length(external_id) > 255
+            OR char_length(title) > 255
+            OR char_length(btrim(company)) > 255
+            OR char_length(btrim(location)) > 255
+            OR char_length(btrim(code_postal)) > 10
+            OR char_length(btrim(country)) > 255
+            OR char_length(contract_type) > 50
+            OR char_length(sector) > 255
+            OR abs(salary_min) >= 2147483647.5
+            OR abs(salary_max) >= 2147483647.5
+        RETURNING coalesce(external_id, 'N/A');
+    """)
+    skipped_offers = [row[0] for row in cur.fetchall()]
+
+    cur.execute("""
+        DELETE FROM staging_job_offers s
+         USING staging_job_offers d
+         WHERE btrim(d.source) = btrim(s.source)
+           AND d.external_id = s.external_id
+           AND d.position > s.position;
+    """)
+    return skipped_offers
+
+
+def upsert_staged_dimensions(cur):
+    """Insère en une requête par table les sources, entreprises et localisations encore inconnues."""
+    cur.execute("""
+        INSERT INTO sources (name)
+        SELECT DISTINCT btrim(source) FROM staging_job_offers
+        ON CONFLICT (name) DO NOTHING;
+    """)
+
+    # Les offres sans entreprise sont chargées avec company_id NULL
+    cur.execute("""
+        INSERT INTO companies (name)
+        SELECT DISTINCT NULLIF(btrim(company), '') FROM staging_job_offers
+         WHERE NULLIF(btrim(company), '') IS NOT NULL
+        ON CONFLICT (name) DO NOTHING;
+    """)
+
+    # Une localisation est identifiée par (location, code_postal, country), NULL compris
+    # (contrainte unique_location) : les coordonnées retenues sont celles de la première offre du fichier.
+    cur.execute("""
+        INSERT INTO locations (location, code_postal, longitude, latitude, country)
+        SELECT DISTINCT ON (location, code_postal, country)
+               location, code_postal, longitude, latitude, country
+          FROM (
+                SELECT NULLIF(btrim(location), '') AS location,
+                       NULLIF(btrim(code_postal), '') AS code_postal,
+                       NULLIF(btrim(country), '') AS country,
+                       longitude, latitude, position
+                  FROM staging_job_offers
+               ) s
+         ORDER BY location, code_postal, country, position
+        ON CONFLICT (location, code_postal, country) DO NOTHING;
+    """)
+
+
+def upsert_staged_job_offers(cur):
+    """
+    Résout les identifiants des dimensions et insère ou met à jour toutes les offres de la table
+    de transit dans job_offers, puis dans la table spécifique de leur source.
+    Les lignes dont l'empreinte (content_hash) est inchangée ne sont pas réécrites.
+    Retourne le nombre d'offres insérées, modifiées ou réactivées.
+    """
+    cur.execute("""
+        INSERT INTO job_offers (source_id, external_id, company_id, location_id, salary_min, salary_max, created_at, status)
+        SELECT src.source_id, s.external_id, c.company_id, l.location_id, s.salary_min, s.salary_max,
+               coalesce(s.created_at::timestamp, localtimestamp), 'active'
+          FROM staging_job_offers s
+          JOIN sources src ON src.name = btrim(s.source)
+          LEFT JOIN companies c ON c.name = NULLIF(btrim(s.company), '')
+          JOIN locations l
+            ON coalesce(l.location, '') = coalesce(NULLIF(btrim(s.location), ''), '')
+           AND coalesce(l.code_postal, '') = coalesce(NULLIF(btrim(s.code_postal), ''), '')
+           AND coalesce(l.country, '') = coalesce(NULLIF(btrim(s.country), ''), '')
+        ON CONFLICT (external_id, source_id)
+        DO UPDATE SET
+            company_id = EXCLUDED.company_id,
+            location_id = EXCLUDED.location_id,
+            salary_min = EXCLUDED.salary_min,
+            salary_max = EXCLUDED.salary_max,
+            created_at = EXCLUDED.created_at,
+            status = 'active'
+        WHERE job_offers.status IS DISTINCT FROM 'active'
+           OR job_offers.content_hash IS DISTINCT FROM job_offer_content_hash(
+                  EXCLUDED.company_id, EXCLUDED.location_id, EXCLUDED.salary_min,
+                  EXCLUDED.salary_max, EXCLUDED.created_at
+              );
+    """)
+    total_upserted = cur.rowcount
+
+    for source_name, table_name in SOURCE_TABLES.items():
+        cur.execute(f"""
+            INSERT INTO {table_name} (job_id, title, contract_type, sector, description, apply_url)
+            SELECT j.job_id, s.title, s.contract_type, s.sector, s.description, s.apply_url
+              FROM staging_job_offers s
+              JOIN sources src ON src.name = btrim(s.source)
+              JOIN job_offers j ON j.source_id = src.source_id AND j.external_id = s.external_id
+             WHERE btrim(s.source) = %s
+            ON CONFLICT (job_id) DO UPDATE SET
+                title = EXCLUDED.title,
+                contract_type = EXCLUDED.contract_type,
+                sector = EXCLUDED.sector,
+                description = EXCLUDED.description,
+                apply_url = EXCLUDED.apply_url
+            WHERE {table_name}.content_hash IS DISTINCT FROM offer_detail_content_hash(
+                EXCLUDED.title, EXCLUDED.contract_type, EXCLUDED.sector, EXCLUDED.description, EXCLUDED.apply_url
+            );
+        """, (source_name,))
+
+    return total_upserted
+
+
+def load_jobs_bulk(jobs, descriptions=None, checkpoint=None):
+    """
+    Charge les offres en masse, par lots de BULK_BATCH_SIZE offres, chaque lot en une transaction :
+    COPY dans la table de transit (UNLOGGED) puis quelques INSERT ... ON CONFLICT ensemblistes
+    pour les dimensions, job_offers et les tables spécifiques aux sources.
+    Après chaque lot validé, le point de reprise `checkpoint` (s'il est fourni) est avancé.
+    Si la table de transit est absente (schéma non migré), le chargement offre par offre prend le relais
+    à partir du lot courant. Toute autre erreur annule le lot et est propagée, sans avancer le point de reprise.
+    Retourne (nombre d'offres insérées ou mises à jour, liste des offres ignorées).
+    """
+    info("⚡ Chargement en masse (COPY) de {} offres...".format(len(jobs)))
+    total_inserted = 0
+    skipped_offers = []
+    batch_reports = []
+
+    for offset in range(0, len(jobs), BULK_BATCH_SIZE):
+        batch = jobs[offset:offset + BULK_BATCH_SIZE]
+        batch_start = time.perf_counter()
+        try:
+            # Transaction validée en sortie de bloc, annulée si une étape échoue
+            with pooled_connection() as conn:
+                with conn.cursor() as cur:
+                    copy_jobs_to_staging(cur, batch, descriptions)
+                    batch_skipped = discard_invalid_staged_jobs(cur)
+                    upsert_staged_dimensions(cur)
+                    batch_inserted = upsert_staged_job_offers(cur)
+                    cur.execute("TRUNCATE staging_job_offers;")
+        except psycopg.errors.UndefinedTable as e:
+            warning("Table de transit absente, bascule sur le chargement offre par offre : {}".format(e))
+            add_stage_details(bulk_batches=batch_reports)
+            inserted, skipped = load_jobs_multithreaded(
+                jobs[offset:], max_threads=LOAD_THREADS, descriptions=descriptions, checkpoint=checkpoint
+            )
+            return total_inserted + inserted, skipped_offers + skipped
+        except Exception:
+            critical("Lot {} interrompu : point de reprise non avancé.".format(len(batch_reports)))
+            add_stage_details(bulk_batches=batch_reports)
+            raise
+
+        total_inserted += batch_inserted
+        skipped_offers.extend(batch_skipped)
+        if checkpoint is not None:
+            checkpoint.commit_batch(len(batch), BULK_BATCH_SIZE)
+        batch_reports.append(batch_report(len(batch_reports), len(batch), batch_inserted, len(batch_skipped), batch_start))
+
+    add_stage_details(bulk_batches=batch_reports)
+    info("{} offres insérées ou modifiées (offres inchangées non réécrites).".format(total_inserted))
     info(f"{len(skipped_offers)} Offres ignorées")
+    if skipped_offers:
+        warning("Offres ignorées (données insuffisantes ou invalides) : {}".format(skipped_offers[:20]))
     return total_inserted, skipped_offers
 
 
 
+@track_stage("update_jobs_status")
 def mark_missing_offers_inactive():
     """
-    Passe en inactive toutes les offres actives dont l'external_id
+    Passe en inactive toutes les offres actives dont le couple (source, external_id)
     n'apparaît plus dans le dernier fichier transformé.
+
+    Seules les clés des offres sont décodées. Elles sont copiées (COPY) dans une table
+    temporaire indexée sur (source_id, external_id), puis une anti-jointure désactive les
+    offres absentes ; le nombre d'offres actives avant mise à jour est lu dans la même requête.
     """
     # 1) Récupère le dernier JSON
     latest_path = get_latest_file(PROCESSED_DATA_DIR)
@@ -224,57 +550,80 @@ def mark_missing_offers_inactive():
         warning("Aucun fichier transformé trouvé.")
         return
 
-    # 2) Compose la liste des IDs importés (normalisation !)
-    with open(latest_path, "r", encoding="utf-8") as f:
-        jobs = json.load(f)
-    imported_ids = [str(job["external_id"]).strip() for job in jobs if job.get("external_id")]
-    imported_ids = list(set(imported_ids))  # retire les doublons éventuels (normalement aucun)
+    # 2) Clés des offres importées (normalisation !), sans doublons
+    offer_keys = load_json_safely(latest_path, list[OfferKey]) or []
+    imported_keys = {
+        (offer.source, str(offer.external_id).strip())
+        for offer in offer_keys
+        if offer.external_id
+    }
 
-    if not imported_ids:
+    if not imported_keys:
         warning("Aucun external_id trouvé dans le fichier transformé.")
         return
 
-    conn = connect_db()
-    try:
+    with pooled_connection() as conn:
         with conn.cursor() as cur:
-            # Log avant update
-            cur.execute("SELECT COUNT(*) FROM job_offers WHERE status = 'active';")
-            active_before = cur.fetchone()[0]
-            info(f"Nombre d'offres actives avant update: {active_before}")
+            cur.execute("SELECT name, source_id FROM sources;")
+            source_ids = dict(cur.fetchall())
 
-            # 3) Exécute l'UPDATE pour passer à inactif ce qui ne figure pas dans le dernier batch
             cur.execute("""
-                UPDATE job_offers
-                   SET status = 'inactive'
-                 WHERE status = 'active'
-                   AND NOT (external_id = ANY(%s));
-            """, (imported_ids,))
-
-            info(f"{cur.rowcount} offres marquées inactive.")
-
-            # Log après update
-            cur.execute("SELECT COUNT(*) FROM job_offers WHERE status = 'active';")
-            active_after = cur.fetchone()[0]
-            info(f"Nombre d'offres actives après update: {active_after}")
-
-            # Audit : y a-t-il encore des actives non présentes dans le batch courant ?
+                CREATE TEMP TABLE imported_offers (
+                    source_id INT NOT NULL,
+                    external_id TEXT NOT NULL,
+                    PRIMARY KEY (source_id, external_id)
+                ) ON COMMIT DROP;
+            """)
+            with cur.copy("COPY imported_offers (source_id, external_id) FROM STDIN") as copy:
+                for source, external_id in imported_keys:
+                    # Source inconnue en base : aucune offre active à conserver pour elle
+                    if source in source_ids:
+                        copy.write_row((source_ids[source], external_id))
+            cur.execute("ANALYZE imported_offers;")
+
+            # 3) Passe à inactif ce qui ne figure pas dans le dernier batch.
+            # La sous-requête de comptage voit l'état antérieur à l'UPDATE (même instantané).
             cur.execute("""
-                SELECT external_id FROM job_offers
-                 WHERE status = 'active'
-                   AND NOT (external_id = ANY(%s))
-                 LIMIT 10;
-            """, (imported_ids,))
-            ghosts = cur.fetchall()
-            if ghosts:
-                warning(f"Des offres actives n'apparaissent pas dans le dernier fichier: {ghosts}")
-        conn.commit()
-    finally:
-        conn.close()
-
-
-
+                WITH deactivated AS (
+                    UPDATE job_offers j
+                       SET status = 'inactive'
+                     WHERE j.status = 'active'
+                       AND NOT EXISTS (
+                           SELECT 1 FROM imported_offers i
+                            WHERE i.source_id = j.source_id
+                              AND i.external_id = j.external_id
+                       )
+                    RETURNING j.job_id
+                ),
+                -- Report immédiat dans le modèle de lecture (exécuté même sans être référencé)
+                deactivated_search AS (
+                    UPDATE offer_search o
+                       SET status = 'inactive'
+                      FROM deactivated d
+                     WHERE o.job_id = d.job_id
+                )
+                SELECT (SELECT count(*) FROM job_offers WHERE status = 'active'),
+                       (SELECT count(*) FROM deactivated);
+            """)
+            active_before, deactivated = cur.fetchone()
+
+    active_after = active_before - deactivated
+    info(f"Nombre d'offres actives avant update: {active_before}")
+    info(f"{deactivated} offres marquées inactive.")
+    info(f"Nombre d'offres actives après update: {active_after}")
+    add_stage_details(active_before=active_before, deactivated=deactivated, active_after=active_after)
+    refresh_offer_rollups()
+
+
+
+@track_stage("load")
 def load_jobs_to_db():
-    """Charge les offres du dernier fichier transformé et les insère en base de données en parallèle."""
+    """
+    Charge les offres du dernier fichier transformé et les insère en base de données,
+    en masse (LOAD_MODE=bulk, défaut), en parallèle offre par offre (LOAD_MODE=threaded)
+    ou par lots asynchrones en mode pipeline (LOAD_MODE=async), puis synchronise le modèle de lecture offer_search
+    et les agrégats des tableaux de bord.
+    """
     file_path = get_latest_file(PROCESSED_DATA_DIR)
     if not file_path:
         warning("Aucun fichier valide à charger.")
@@ -282,20 +631,39 @@ def load_jobs_to_db():
 
     info("Chargement du fichier : {}".format(file_path))
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            jobs = json.load(file)
+        jobs = load_json_safely(file_path, list[ProcessedOffer])
 
         if not jobs:
-            warning("Le fichier JSON est vide.")
+            warning("Le fichier JSON est vide ou illisible.")
             return
 
+        # Reprise après une tentative interrompue sur le même fichier
+        checkpoint = LoadCheckpoint(snapshot_id(file_path))
+        resumed_offers = min(checkpoint.resume(), len(jobs))
+        add_stage_details(snapshot_id=checkpoint.snapshot, resumed_offers=resumed_offers)
+        jobs = jobs[resumed_offers:]
+
         info("{} offres à insérer...".format(len(jobs)))
-        load_jobs_multithreaded(jobs, max_threads=4)
+        descriptions = open_description_store(file_path)
+        try:
+            if LOAD_MODE == "threaded":
+                load_jobs_multithreaded(jobs, max_threads=LOAD_THREADS, descriptions=descriptions, checkpoint=checkpoint)
+            elif LOAD_MODE == "async":
+                from pipelines.load_async import load_jobs_async
+                load_jobs_async(jobs, descriptions=descriptions, checkpoint=checkpoint)
+            else:
+                load_jobs_bulk(jobs, descriptions=descriptions, checkpoint=checkpoint)
+            checkpoint.complete()
+            refresh_offer_search()
+            refresh_offer_rollups()
+        finally:
+            if descriptions is not None:
+                descriptions.close()
 
-    except (json.JSONDecodeError, FileNotFoundError) as e:
-        critical("Erreur lors de la lecture du fichier JSON : {}".format(e))
     except Exception as e:
+        # Échec de la tâche : la relance reprend après le dernier lot entièrement validé
         critical("Erreur générale : {}".format(e))
+        raise
 
 
 
@@ -0,0 +1,263 @@
+"""
+Chargement asynchrone des offres (LOAD_MODE=async).
+
+Les offres sont traitées par lots de LOAD_BATCH_SIZE, chaque lot dans sa propre transaction,
+sur une connexion asynchrone (psycopg AsyncConnection) en mode pipeline : toutes les requêtes
+du lot sont envoyées sans attendre la réponse de la précédente, la connexion ne se synchronise
+qu'en fin de lot. Au plus ASYNC_LOAD_CONCURRENCY lots sont en cours simultanément.
+
+Chaque offre est écrite par une seule requête (job_offers puis table spécifique à la source),
+les clés étrangères étant résolues par le cache de dimensions (voir dimension_cache).
+Les offres dont une dimension manque au cache, ainsi que celles d'un lot en échec,
+sont reprises offre par offre par process_job, comme dans le chargement multithreadé.
+Une erreur de base ou de connexion lors de cette reprise interrompt le chargement : aucun nouveau lot
+n'est lancé et le point de reprise n'avance pas au-delà du lot en échec.
+"""
+
+import asyncio
+import datetime
+import os
+import time
+
+from more_itertools import chunked
+
+from db.db_connection import check_connection, create_async_pool, pooled_connection
+from logger.logger import critical, info, warning
+from pipelines.dimension_cache import DimensionCache, company_key
+from pipelines.load import LOAD_BATCH_SIZE, SOURCE_TABLES, UPSERT_JOB_OFFER_SQL, batch_report, process_job
+from pipelines.run_report import add_stage_details
+from storage.description_store import get_description
+
+
+# Nombre maximal de lots en cours (et de connexions asynchrones ouvertes)
+ASYNC_LOAD_CONCURRENCY = int(os.environ.get("ASYNC_LOAD_CONCURRENCY", 4))
+
+# Offre dont une dimension n'est pas en cache : reprise par process_job
+NOT_CACHED = object()
+
+
+def _offer_statement(table_name):
+    """
+    Requête d'écriture d'une offre : upsert dans job_offers, puis dans la table spécifique.
+    Paramètres : valeurs de job_offers, (external_id, source_id), puis title, contract_type,
+    sector, description et apply_url.
+    """
+    return f"""
+        WITH upserted AS ({UPSERT_JOB_OFFER_SQL}),
+        job AS (
+            SELECT job_id FROM upserted
+            UNION ALL
+            SELECT job_id FROM job_offers WHERE external_id = %s::text AND source_id = %s
+            LIMIT 1
+        )
+        INSERT INTO {table_name} (job_id, title, contract_type, sector, description, apply_url)
+        SELECT job_id, %s, %s, %s, %s, %s FROM job
+        ON CONFLICT (job_id) DO UPDATE SET
+            title = EXCLUDED.title,
+            contract_type = EXCLUDED.contract_type,
+            sector = EXCLUDED.sector,
+            description = EXCLUDED.description,
+            apply_url = EXCLUDED.apply_url
+        WHERE {table_name}.content_hash IS DISTINCT FROM offer_detail_content_hash(
+            EXCLUDED.title, EXCLUDED.contract_type, EXCLUDED.sector, EXCLUDED.description, EXCLUDED.apply_url
+        );
+    """
+
+
+OFFER_STATEMENTS = {source: _offer_statement(table_name) for source, table_name in SOURCE_TABLES.items()}
+
+
+def cached_job_data(job, dimensions):
+    """
+    Valeurs de job_offers d'une offre, résolues uniquement à partir du cache de dimensions.
+    Applique les mêmes règles que insert_job_offer.
+    Retourne None si l'offre est ignorée, NOT_CACHED si une dimension est absente du cache.
+    """
+    if not job.get("title") or job.get("title").strip() == "":
+        warning("Offre {} ignorée car le titre est manquant.".format(job.get("external_id", "N/A")))
+        return None
+
+    source_id = dimensions.lookup_source(job.get("source"))
+    if source_id is None:
+        return NOT_CACHED
+
+    location_value = job.get("location", "")
+    country_value = job.get("country", "")
+    if (not location_value or location_value.strip() == "") and (not country_value or country_value.strip() == ""):
+        warning("Offre {} ignorée car localisation et pays sont absents.".format(job.get("external_id", "N/A")))
+        return None
+
+    if company_key(job.get("company")) is None:
+        company_id = None
+    else:
+        company_id = dimensions.lookup_company(job.get("company"))
+        if company_id is None:
+            return NOT_CACHED
+
+    location_id = dimensions.lookup_location(location_value, job.get("code_postal"), country_value)
+    if location_id is None:
+        return NOT_CACHED
+
+    return (
+        source_id,
+        job["external_id"],
+        company_id,
+        location_id,
+        job.get("salary_min"),
+        job.get("salary_max"),
+        job.get("created_at") or datetime.datetime.now(),
+    )
+
+
+def _process_jobs(jobs, descriptions, dimensions):
+    """Reprise offre par offre (connexions synchrones du pool), exécutée dans un thread."""
+    return [process_job(job, descriptions=descriptions, dimensions=dimensions) for job in jobs]
+
+
+async def load_batch(pool, batch, descriptions, dimensions):
+    """
+    Charge un lot d'offres dans une transaction, en mode pipeline.
+    Retourne (nombre d'offres insérées ou mises à jour, liste des offres ignorées).
+    """
+    statements = {}
+    prepared_jobs = []
+    fallback_jobs = []
+    skipped_offers = []
+
+    for job in batch:
+        job_data = cached_job_data(job, dimensions)
+        if job_data is NOT_CACHED:
+            fallback_jobs.append(job)
+            continue
+        if job_data is None:
+            warning("Offre {} ignorée (données insuffisantes).".format(job.get("external_id", "N/A")))
+            skipped_offers.append(job.get("external_id", "N/A"))
+            continue
+
+        prepared_jobs.append(job)
+        query = OFFER_STATEMENTS.get(job.get("source"))
+        if query is None:
+            # Source sans table spécifique : seule job_offers est alimentée
+            statements.setdefault(UPSERT_JOB_OFFER_SQL, []).append(job_data)
+            continue
+        statements.setdefault(query, []).append((
+            *job_data,
+            job_data[1],
+            job_data[0],
+            job.get("title"),
+            job.get("contract_type"),
+            job.get("sector"),
+            get_description(job, descriptions) or None,
+            job.get("apply_url"),
+        ))
+
+    total_inserted = 0
+    if statements:
+        try:
+            async with pool.connection() as aconn:
+                async with aconn.transaction():
+                    # Les requêtes du lot partent sans attendre de réponse ; synchronisation en fin de bloc
+                    async with aconn.pipeline():
+                        async with aconn.cursor() as cur:
+                            for query, params in statements.items():
+                                await cur.executemany(query, params)
+            total_inserted = len(prepared_jobs)
+        except Exception as e:
+            # Transaction du lot annulée : aucune de ses offres n'a été écrite
+            warning("Échec du lot ({} offres), reprise offre par offre : {}".format(len(prepared_jobs), e))
+            fallback_jobs.extend(prepared_jobs)
+
+    if fallback_jobs:
+        results = await asyncio.to_thread(_process_jobs, fallback_jobs, descriptions, dimensions)
+        for success, external_id in results:
+            if success:
+                total_inserted += 1
+            else:
+                skipped_offers.append(external_id)
+
+    return total_inserted, skipped_offers
+
+
+def _add_missing_dimensions(dimensions, batch):
+    with pooled_connection() as conn:
+        dimensions.add_missing(conn, batch)
+
+
+async def _load_jobs(jobs, descriptions, checkpoint):
+    dimensions = DimensionCache()
+    with pooled_connection() as conn:
+        dimensions.preload(conn)
+
+    semaphore = asyncio.Semaphore(ASYNC_LOAD_CONCURRENCY)
+    # Les lots se terminent dans le désordre : le point de reprise n'avance que sur
+    # la suite continue des lots terminés depuis le début du fichier.
+    finished = {}
+    next_to_commit = 0
+    commit_lock = asyncio.Lock()
+    batch_reports = []
+    failures = []
+
+    async def bounded_batch(pool, index, batch):
+        nonlocal next_to_commit
+        batch_start = time.perf_counter()
+        try:
+            inserted, skipped = await load_batch(pool, batch, descriptions, dimensions)
+        except Exception as e:
+            # Lot non validé : il n'entre pas dans `finished`, le point de reprise s'arrête avant lui
+            critical("Lot {} interrompu : point de reprise non avancé.".format(index))
+            failures.append(e)
+            raise
+        finally:
+            semaphore.release()
+        batch_reports.append(batch_report(index, len(batch), inserted, len(skipped), batch_start))
+
+        async with commit_lock:
+            finished[index] = len(batch)
+            while next_to_commit in finished:
+                if checkpoint is not None:
+                    await asyncio.to_thread(checkpoint.commit_batch, finished.pop(next_to_commit), LOAD_BATCH_SIZE)
+                next_to_commit += 1
+        return inserted, skipped
+
+    async with create_async_pool(max_size=ASYNC_LOAD_CONCURRENCY) as pool:
+        tasks = []
+        for index, batch in enumerate(chunked(jobs, LOAD_BATCH_SIZE)):
+            # Le lot suivant n'est préparé que lorsqu'une place se libère
+            await semaphore.acquire()
+            if failures:
+                # Un lot a échoué : les suivants ne sont pas lancés
+                semaphore.release()
+                break
+            # Dimensions manquantes insérées avant le lancement du lot (connexion synchrone, dans un thread)
+            await asyncio.to_thread(_add_missing_dimensions, dimensions, batch)
+            tasks.append(asyncio.create_task(bounded_batch(pool, index, batch)))
+        # Les lots en cours se terminent (et valident leur point de reprise) avant la remontée de l'erreur
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    add_stage_details(async_batches=sorted(batch_reports, key=lambda report: report["batch"]))
+    if failures:
+        raise failures[0]
+    total_inserted = sum(inserted for inserted, _ in results)
+    skipped_offers = [external_id for _, skipped in results for external_id in skipped]
+    return total_inserted, skipped_offers
+
+
+def load_jobs_async(jobs, descriptions=None, checkpoint=None):
+    """
+    Charge les offres par lots concurrents sur des connexions asynchrones en mode pipeline.
+    Le point de reprise `checkpoint` (s'il est fourni) est avancé au fil des lots validés.
+    Vérifie d'abord que la base est joignable. Une erreur de base ou de connexion est propagée.
+    Retourne (nombre d'offres insérées ou mises à jour, liste des offres ignorées).
+    """
+    if not check_connection():
+        critical("Impossible d'établir une connexion à la base de données.")
+        raise ConnectionError("base de données injoignable")
+
+    info("⚡ Chargement asynchrone par lots de {} offres ({} lots simultanés au plus)...".format(
+        LOAD_BATCH_SIZE, ASYNC_LOAD_CONCURRENCY
+    ))
+    total_inserted, skipped_offers = asyncio.run(_load_jobs(jobs, descriptions, checkpoint))
+
+    info("{} offres insérées avec succès.".format(total_inserted))
+    info(f"{len(skipped_offers)} Offres ignorées")
+    return total_inserted, skipped_offers
@@ -0,0 +1,43 @@
+"""
+Maintenance de la base de données, exécutée en fin de DAG.
+
+Journal job_offers_log (partitionné par mois sur log_timestamp) :
+- création à l'avance des partitions des LOG_PARTITIONS_AHEAD prochains mois, pour que
+  les écritures ne tombent pas dans la partition par défaut ;
+- suppression des partitions antérieures aux LOG_RETENTION_MONTHS derniers mois
+  (DROP TABLE d'une partition : instantané, sans DELETE ni VACUUM). 0 désactive la rétention.
+"""
+
+import os
+
+from db.db_connection import pooled_connection
+from logger.logger import info
+from pipelines.run_report import add_stage_details, track_stage
+
+
+LOG_RETENTION_MONTHS = int(os.environ.get("LOG_RETENTION_MONTHS", 12))
+LOG_PARTITIONS_AHEAD = int(os.environ.get("LOG_PARTITIONS_AHEAD", 3))
+
+
+@track_stage("log_maintenance")
+def maintain_job_offers_log():
+    """Crée les partitions à venir du journal et supprime celles qui dépassent la rétention."""
+    with pooled_connection() as conn:
+        created = conn.execute(
+            "SELECT create_job_offers_log_partitions(%s);", (LOG_PARTITIONS_AHEAD,)
+        ).fetchone()[0]
+
+        dropped = 0
+        if LOG_RETENTION_MONTHS > 0:
+            dropped = conn.execute(
+                "SELECT drop_job_offers_log_partitions(%s);", (LOG_RETENTION_MONTHS,)
+            ).fetchone()[0]
+
+    info(f"Journal des offres : {created} partitions créées, {dropped} partitions supprimées "
+         f"(rétention {LOG_RETENTION_MONTHS} mois).")
+    add_stage_details(log_partitions_created=created, log_partitions_dropped=dropped)
+    return created, dropped
+
+
+if __name__ == "__main__":
+    maintain_job_offers_log()
@@ -0,0 +1,111 @@
+"""
+Modèles de lecture alimentés par le chargement.
+
+offer_search : une ligne par offre réunissant job_offers, ses dimensions (source, entreprise,
+localisation) et sa table spécifique (titre, contrat, secteur, description, lien), avec un
+tsvector pondéré (titre A, description B) indexé en GIN. Recherche et reporting n'interrogent
+qu'une table et un index, sans jointure ni UNION des tables par source.
+
+La synchronisation est ensembliste et incrémentale : seules les offres nouvelles, ou dont
+l'empreinte (content_hash de job_offers ou de la table spécifique) ou le statut a changé
+depuis la dernière synchronisation, sont écrites. Les désactivations sont reportées par
+mark_missing_offers_inactive dans la même requête que la mise à jour de job_offers.
+
+mv_offer_rollups : agrégats des tableaux de bord (offres par source, jour, statut et département),
+calculés à partir de offer_search et rafraîchis après le chargement et après la désactivation.
+"""
+
+import time
+
+from db.db_connection import pooled_connection
+from logger.logger import info, warning
+from pipelines.run_report import add_stage_details
+
+
+SYNC_OFFER_SEARCH_SQL = """
+    INSERT INTO offer_search (
+        job_id, source, external_id, title, company, location, code_postal, country,
+        contract_type, sector, salary_min, salary_max, created_at, status, description, apply_url,
+        job_hash, detail_hash
+    )
+    SELECT j.job_id, s.name, j.external_id, d.title, c.name, l.location, l.code_postal, l.country,
+           d.contract_type, d.sector, j.salary_min, j.salary_max, j.created_at, j.status, d.description, d.apply_url,
+           j.content_hash, d.content_hash
+      FROM job_offers j
+      JOIN sources s ON s.source_id = j.source_id
+      JOIN (
+            SELECT job_id, title, contract_type, sector, description, apply_url, content_hash FROM adzuna_offers
+            UNION ALL
+            SELECT job_id, title, contract_type, sector, description, apply_url, content_hash FROM france_travail_offers
+            UNION ALL
+            SELECT job_id, title, contract_type, sector, description, apply_url, content_hash FROM jsearch_offers
+           ) d ON d.job_id = j.job_id
+      LEFT JOIN companies c ON c.company_id = j.company_id
+      LEFT JOIN locations l ON l.location_id = j.location_id
+      LEFT JOIN offer_search o ON o.job_id = j.job_id
+     WHERE o.job_id IS NULL
+        OR o.job_hash IS DISTINCT FROM j.content_hash
+        OR o.detail_hash IS DISTINCT FROM d.content_hash
+        OR o.status IS DISTINCT FROM j.status
+    ON CONFLICT (job_id) DO UPDATE SET
+        source = EXCLUDED.source,
+        external_id = EXCLUDED.external_id,
+        title = EXCLUDED.title,
+        company = EXCLUDED.company,
+        location = EXCLUDED.location,
+        code_postal = EXCLUDED.code_postal,
+        country = EXCLUDED.country,
+        contract_type = EXCLUDED.contract_type,
+        sector = EXCLUDED.sector,
+        salary_min = EXCLUDED.salary_min,
+        salary_max = EXCLUDED.salary_max,
+        created_at = EXCLUDED.created_at,
+        status = EXCLUDED.status,
+        description = EXCLUDED.description,
+        apply_url = EXCLUDED.apply_url,
+        job_hash = EXCLUDED.job_hash,
+        detail_hash = EXCLUDED.detail_hash;
+"""
+
+
+def sync_offer_search(cur) -> int:
+    """Reporte dans offer_search les offres nouvelles ou modifiées ; retourne le nombre de lignes écrites."""
+    cur.execute(SYNC_OFFER_SEARCH_SQL)
+    return cur.rowcount
+
+
+def refresh_offer_search() -> None:
+    """
+    Synchronise offer_search après un chargement, dans sa propre transaction.
+    Un échec est signalé sans interrompre le chargement : la synchronisation suivante rattrapera l'écart.
+    """
+    started_at = time.perf_counter()
+    try:
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                synced = sync_offer_search(cur)
+    except Exception as e:
+        warning(f"Synchronisation de offer_search impossible : {e}")
+        return
+
+    duration = round(time.perf_counter() - started_at, 3)
+    info(f"offer_search synchronisée : {synced} offres écrites en {duration} s.")
+    add_stage_details(offer_search_synced=synced, offer_search_duration_s=duration)
+
+
+def refresh_offer_rollups() -> None:
+    """
+    Rafraîchit les agrégats des tableaux de bord (mv_offer_rollups) à partir de offer_search.
+    CONCURRENTLY : les lectures (Grafana) ne sont pas bloquées pendant le rafraîchissement.
+    """
+    started_at = time.perf_counter()
+    try:
+        with pooled_connection() as conn:
+            conn.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_offer_rollups;")
+    except Exception as e:
+        warning(f"Rafraîchissement de mv_offer_rollups impossible : {e}")
+        return
+
+    duration = round(time.perf_counter() - started_at, 3)
+    info(f"mv_offer_rollups rafraîchie en {duration} s.")
+    add_stage_details(offer_rollups_duration_s=duration)
@@ -0,0 +1,83 @@
+"""
+Construction de l'index de recommandation, une fois par exécution du DAG.
+
+Le dernier fichier transformé est vectorisé (TF-IDF) ici plutôt qu'au démarrage et à chaque /reload
+de chaque processus de l'API. La mise à jour est incrémentale (voir recommender/incremental.py) :
+seules les offres nouvelles ou modifiées depuis la version précédente de l'index sont normalisées et
+vectorisées. Si RECOMMENDER_SEMANTIC_INDEX=1, l'index du mode sémantique (projection LSA et index IVF,
+voir recommender/semantic.py) est construit à partir des mêmes vecteurs. Le résultat est écrit sous forme d'index versionné (voir recommender/loader.py) que l'API
+charge par projection en mémoire.
+"""
+
+import time
+
+from fetch_functions.utils import get_latest_file
+from logger.logger import info, warning
+from pipelines.run_report import add_stage_details, track_stage
+from pipelines.transform import PROCESSED_DATA_DIR
+from recommender.incremental import update_index
+from recommender.loader import read_index_state, write_index_artifact
+from recommender.recommender import load_processed_offers
+from recommender.semantic import SEMANTIC_INDEX_ENABLED, build_semantic_index
+from storage.description_store import open_description_store
+
+
+# Pondérations des champs (voir combine_offer_text), identiques à celles de la reconstruction par l'API
+INDEX_WEIGHTS = {"weight_title": 2, "weight_location": 1, "weight_description": 1}
+
+
+@track_stage("recommender_index")
+def build_recommender_index():
+    """Met à jour l'index à partir du dernier fichier transformé et publie une nouvelle version ; retourne son nom."""
+    latest_file = get_latest_file(PROCESSED_DATA_DIR)
+    if latest_file is None:
+        warning("Aucun fichier transformé : index de recommandation non construit.")
+        return None
+
+    started_at = time.perf_counter()
+    offers = load_processed_offers(latest_file)
+    previous = read_index_state(INDEX_WEIGHTS)
+    descriptions = open_description_store(latest_file)
+    vectorizer, vectors, state, stats = update_index(offers, descriptions, INDEX_WEIGHTS, previous)
+    if descriptions is not None:
+        descriptions.close()
+    update_duration = round(time.perf_counter() - started_at, 3)
+
+    semantic_index = None
+    semantic_duration = None
+    if SEMANTIC_INDEX_ENABLED:
+        # Projection et centroïdes réappris au compactage, comme l'IDF ; réutilisés sinon
+        semantic_started_at = time.perf_counter()
+        previous_semantic = previous["semantic"] if previous is not None and not stats["compacted"] else None
+        semantic_index = build_semantic_index(vectors, previous_semantic)
+        semantic_duration = round(time.perf_counter() - semantic_started_at, 3)
+        info("Index sémantique : {} dimensions, {} listes ({}) en {} s.".format(
+            semantic_index.dimensions, semantic_index.lists,
+            "projection reprise" if previous_semantic is not None else "projection apprise", semantic_duration
+        ))
+
+    write_started_at = time.perf_counter()
+    version = write_index_artifact(latest_file, offers, vectorizer, vectors, state, weights=INDEX_WEIGHTS,
+                                   semantic_index=semantic_index)
+    info("Index {} : {} offres reprises, {} vectorisées, {} retirées{}.".format(
+        version, stats["reused"], stats["vectorized"], stats["removed"], ", compacté" if stats["compacted"] else ""
+    ))
+    add_stage_details(
+        index_version=version,
+        index_previous_version=previous["version"] if previous else None,
+        index_offers=vectors.shape[0],
+        index_reused=stats["reused"],
+        index_vectorized=stats["vectorized"],
+        index_removed=stats["removed"],
+        index_compacted=stats["compacted"],
+        index_drift=stats["drift"],
+        index_update_duration_s=update_duration,
+        index_semantic_lists=semantic_index.lists if semantic_index is not None else None,
+        index_semantic_duration_s=semantic_duration,
+        index_write_duration_s=round(time.perf_counter() - write_started_at, 3),
+    )
+    return version
+
+
+if __name__ == "__main__":
+    build_recommender_index()
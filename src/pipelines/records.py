@@ -0,0 +1,142 @@
+"""
+Schémas des offres brutes (Adzuna, France Travail, JSearch) et des offres transformées.
+
+Les fichiers bruts sont décodés directement dans ces structures par msgspec : seuls les champs
+lus par la transformation sont conservés, les autres sont ignorés pendant le décodage sans
+jamais être matérialisés. Les Struct (sans suivi par le ramasse-miettes) sont bien plus
+compactes que des dictionnaires.
+
+Les types restent permissifs (champs optionnels, nombres entiers ou décimaux) : les API ne
+garantissent pas la présence de chaque champ, et un champ absent prend la même valeur par
+défaut qu'avec l'ancien `job.get(...)`.
+"""
+
+from typing import Optional, TypedDict, Union
+
+import msgspec
+
+
+Number = Union[int, float, None]
+Identifier = Union[str, int, None]
+
+
+# --- Adzuna ---
+
+class AdzunaCompany(msgspec.Struct, gc=False):
+    display_name: Optional[str] = None
+
+
+class AdzunaCategory(msgspec.Struct, gc=False):
+    label: Optional[str] = None
+
+
+class AdzunaLocation(msgspec.Struct, gc=False):
+    display_name: Optional[str] = ""
+    area: list[str] = []
+
+
+class AdzunaJob(msgspec.Struct, gc=False):
+    id: Identifier = None
+    title: Optional[str] = None
+    company: Optional[AdzunaCompany] = msgspec.field(default_factory=AdzunaCompany)
+    location: Optional[AdzunaLocation] = None
+    longitude: Number = None
+    latitude: Number = None
+    contract_type: Optional[str] = None
+    salary_min: Number = None
+    salary_max: Number = None
+    category: Optional[AdzunaCategory] = msgspec.field(default_factory=AdzunaCategory)
+    created: Optional[str] = None
+    redirect_url: Optional[str] = None
+
+
+# --- France Travail ---
+
+class FranceTravailCompany(msgspec.Struct, gc=False):
+    nom: Optional[str] = None
+
+
+class FranceTravailLocation(msgspec.Struct, gc=False):
+    libelle: Optional[str] = ""
+    codePostal: Optional[str] = None
+    latitude: Number = None
+    longitude: Number = None
+
+
+class FranceTravailSalary(msgspec.Struct, gc=False):
+    libelle: Optional[str] = None
+
+
+class FranceTravailOrigin(msgspec.Struct, gc=False):
+    urlOrigine: Optional[str] = None
+
+
+class FranceTravailJob(msgspec.Struct, gc=False):
+    id: Identifier = None
+    intitule: Optional[str] = None
+    entreprise: Optional[FranceTravailCompany] = msgspec.field(default_factory=FranceTravailCompany)
+    lieuTravail: Optional[FranceTravailLocation] = None
+    typeContrat: Optional[str] = None
+    salaire: Optional[FranceTravailSalary] = msgspec.field(default_factory=FranceTravailSalary)
+    secteurActiviteLibelle: Optional[str] = None
+    description: Optional[str] = None
+    dateCreation: Optional[str] = None
+    origineOffre: Optional[FranceTravailOrigin] = msgspec.field(default_factory=FranceTravailOrigin)
+
+
+# --- JSearch ---
+
+class JSearchJob(msgspec.Struct, gc=False):
+    job_id: Optional[str] = None
+    job_title: Optional[str] = None
+    employer_name: Optional[str] = None
+    job_location: Optional[str] = None
+    job_longitude: Number = None
+    job_latitude: Number = None
+    job_employment_type: Optional[str] = None
+    job_min_salary: Number = None
+    job_max_salary: Number = None
+    job_description: Optional[str] = None
+    job_posted_at: Optional[str] = None
+    job_apply_link: Optional[str] = None
+
+
+RAW_RECORD_TYPES = {
+    "adzuna": AdzunaJob,
+    "france_travail": FranceTravailJob,
+    "jsearch": JSearchJob,
+}
+
+
+# --- Offres transformées (data/processed_data) ---
+
+class ProcessedOffer(TypedDict, total=False):
+    """
+    Offre transformée. Décodée en dictionnaire : le chargement en base, le moteur de
+    recommandation et l'API manipulent les offres sous cette forme.
+    """
+    source: str
+    external_id: Identifier
+    title: Optional[str]
+    company: Optional[str]
+    location: Optional[str]
+    code_postal: Optional[str]
+    longitude: Number
+    latitude: Number
+    contract_type: Optional[str]
+    salary_min: Number
+    salary_max: Number
+    sector: Optional[str]
+    description: Optional[str]
+    country: Optional[str]
+    created_at: Optional[str]
+    apply_url: Optional[str]
+
+
+class OfferKey(msgspec.Struct, gc=False):
+    """
+    Clé d'une offre transformée. Décoder un fichier transformé dans ce schéma ne
+    matérialise que la source et l'identifiant des offres.
+    """
+    source: Optional[str] = None
+    external_id: Identifier = None
@@ -0,0 +1,184 @@
+"""
+Suivi de la mémoire par étape du pipeline et rapport d'exécution.
+
+Chaque étape décorée par `track_stage` enregistre sa durée, son RSS (avant, après, pic),
+le pic de mémoire tracée par tracemalloc et les principaux sites d'allocation.
+Les métriques sont écrites dans un rapport propre à l'exécution du DAG :
+`data/reports/<run_id>/<étape>.json` (un fichier par étape, les tâches Airflow
+tournant dans des processus distincts et parfois en parallèle).
+
+Un budget mémoire configurable permet aux étapes gourmandes (transformation,
+déduplication) de basculer sur leurs chemins par lots plutôt que d'être tuées (OOM).
+
+Variables d'environnement :
+- MEMORY_BUDGET_MB : budget mémoire en Mo (0 ou absent = pas de budget).
+- MEMORY_TRACEMALLOC : active (1, défaut) ou désactive (0) tracemalloc.
+- MEMORY_TOP_ALLOCATIONS : nombre de sites d'allocation conservés par étape (défaut 10).
+"""
+
+import functools
+import os
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+from fetch_functions.utils import save_to_json, sanitize_filename
+from logger.logger import info, warning
+
+
+BASE_DIR = os.environ.get("PROJECT_ROOT", os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+REPORTS_DIR = os.path.join(BASE_DIR, "data/reports")
+
+MEMORY_BUDGET_MB = float(os.environ.get("MEMORY_BUDGET_MB", 0) or 0)
+TRACEMALLOC_ENABLED = os.environ.get("MEMORY_TRACEMALLOC", "1") == "1"
+TOP_ALLOCATIONS = int(os.environ.get("MEMORY_TOP_ALLOCATIONS", 10))
+
+# Identifiant d'exécution : Airflow exporte le run_id du DAG dans l'environnement de chaque tâche.
+# Hors Airflow, chaque processus constitue sa propre exécution.
+_PROCESS_RUN_ID = datetime.now().strftime("manual_%Y%m%d_%H%M%S")
+
+# Métriques de l'étape en cours, complétées par les étapes elles-mêmes via add_stage_details
+_current_stage = None
+
+
+def get_run_id() -> str:
+    """Retourne l'identifiant de l'exécution courante (run_id Airflow ou horodatage du processus)."""
+    return os.environ.get("AIRFLOW_CTX_DAG_RUN_ID") or _PROCESS_RUN_ID
+
+
+def get_rss_mb() -> float:
+    """RSS courant du processus, en Mo."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return get_peak_rss_mb()
+
+
+def get_peak_rss_mb() -> float:
+    """
+    Pic de RSS du processus, en Mo.
+    Lit VmHWM (réinitialisable par étape) et se rabat sur ru_maxrss (pic depuis le lancement).
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _reset_peak_rss() -> bool:
+    """Réinitialise VmHWM afin que le pic mesuré soit propre à l'étape (Linux uniquement)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def memory_budget_exceeded() -> bool:
+    """Indique si le RSS courant dépasse le budget mémoire configuré."""
+    if MEMORY_BUDGET_MB <= 0:
+        return False
+    exceeded = get_rss_mb() > MEMORY_BUDGET_MB
+    if exceeded and _current_stage is not None:
+        _current_stage["budget_exceeded"] = True
+    return exceeded
+
+
+def add_stage_details(**details) -> None:
+    """Ajoute des informations (compteurs, timings...) au rapport de l'étape en cours."""
+    if _current_stage is not None:
+        _current_stage.update(details)
+
+
+def _top_allocations(limit: int) -> list[dict]:
+    """Principaux sites d'allocation encore vivants en fin d'étape, selon tracemalloc."""
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+    return [
+        {
+            "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_mb": round(stat.size / (1024 * 1024), 3),
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def save_stage_report(stage_name: str, metrics: dict) -> None:
+    """Écrit les métriques d'une étape dans le rapport de l'exécution courante."""
+    run_dir = os.path.join(REPORTS_DIR, sanitize_filename(get_run_id()))
+    save_to_json(metrics, run_dir, stage_name, filename=f"{stage_name}.json")
+
+
+@contextmanager
+def stage_memory(stage_name: str):
+    """
+    Mesure la mémoire consommée par une étape du pipeline et enregistre le rapport en sortie.
+    """
+    global _current_stage
+    started_tracing = TRACEMALLOC_ENABLED and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+    peak_reset = _reset_peak_rss()
+    metrics = {
+        "stage": stage_name,
+        "run_id": get_run_id(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "rss_before_mb": round(get_rss_mb(), 1),
+        "memory_budget_mb": MEMORY_BUDGET_MB or None,
+        "budget_exceeded": False,
+    }
+    previous_stage, _current_stage = _current_stage, metrics
+    start = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics["duration_s"] = round(time.perf_counter() - start, 3)
+        metrics["rss_after_mb"] = round(get_rss_mb(), 1)
+        metrics["peak_rss_mb"] = round(get_peak_rss_mb(), 1)
+        metrics["peak_rss_scope"] = "stage" if peak_reset else "process"
+
+        if tracemalloc.is_tracing():
+            metrics["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+            metrics["top_allocations"] = _top_allocations(TOP_ALLOCATIONS)
+            if started_tracing:
+                tracemalloc.stop()
+
+        _current_stage = previous_stage
+        info(
+            f"[{stage_name}] pic RSS {metrics['peak_rss_mb']} Mo "
+            f"(avant {metrics['rss_before_mb']} Mo, après {metrics['rss_after_mb']} Mo) "
+            f"en {metrics['duration_s']} s"
+        )
+        if metrics["budget_exceeded"]:
+            warning(f"[{stage_name}] budget mémoire de {MEMORY_BUDGET_MB} Mo dépassé, chemin par lots utilisé.")
+        try:
+            save_stage_report(stage_name, metrics)
+        except Exception as e:
+            warning(f"Rapport mémoire non sauvegardé pour {stage_name} : {e}")
+
+
+def track_stage(stage_name: str):
+    """Décorateur appliquant `stage_memory` à une fonction d'étape du pipeline."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_memory(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,7 +1,6 @@
 import os
 import json
 import re
-import unicodedata
 from concurrent.futures.thread import ThreadPoolExecutor
 from typing import List, Dict, Any
 import pandas as pd
@@ -12,12 +11,26 @@ from more_itertools.more import chunked
 from fetch_functions.utils import save_to_json, load_json_safely, get_latest_file
 from logger.logger import warning, info, error
 from pipelines.extract import BASE_DIR, RAW_DATA_DIR, RESSOURCES_DIR
+from pipelines.run_report import track_stage, memory_budget_exceeded, add_stage_details
+from normalization.dates import DateNormalizer
+from normalization.text import normalize_label_cached
+from normalization.html import strip_html
+from pipelines.records import RAW_RECORD_TYPES, AdzunaJob, FranceTravailJob, JSearchJob
+from storage.description_store import description_store_path, offer_key, write_description_store
 
 
 # Définition des chemins
 PROCESSED_DATA_DIR = os.path.join(BASE_DIR, "data/processed_data")
 INSEE_FILE = os.path.join(RESSOURCES_DIR, "communes_cp.csv")
 
+# Taille des lots de transformation : réduite lorsque le budget mémoire est dépassé
+CHUNK_SIZE = 10000
+LOW_MEMORY_CHUNK_SIZE = int(os.environ.get("LOW_MEMORY_CHUNK_SIZE", 1000))
+
+# Normaliseurs de dates : un par source, le format étant détecté une fois par fichier traité
+DEFAULT_DATE_NORMALIZER = DateNormalizer()
+DATE_NORMALIZERS = {source: DateNormalizer() for source in ("adzuna", "france_travail", "jsearch")}
+
 
 
 def normalize_text(text):
@@ -28,42 +41,11 @@ def normalize_text(text):
       - espaces multiples → un seul
       - SAINT → ST
       - arrondissements ou "<Ville> <n>" → "VILLE NN" (zéro-pad)
-    """
-    if not text or not isinstance(text, str):
-        return None
-
-    # Unicode → ASCII, uppercase
-    s = unicodedata.normalize("NFD", text) \
-                     .encode("ascii", "ignore") \
-                     .decode("utf-8") \
-                     .upper()
-
-    # Tirets/apostrophes → espaces, condense espaces
-    s = re.sub(r"[-']", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-
-    # SAINT → ST
-    s = re.sub(r"\bSAINT\b", "ST", s)
-
-    # Arrondissements explicites : "9E ARRONDISSEMENT, PARIS" → "PARIS 09"
-    m = re.search(
-        r"(\d{1,2})[EÈ]M[EÈ]?\s*ARRONDISSEMENT,?\s*(\w+)",
-        s,
-        re.IGNORECASE
-    )
-    if m:
-        num   = m.group(1).zfill(2)
-        ville = m.group(2).upper()
-        return f"{ville} {num}"
-
-    # "<Ville> <n>" en fin de chaîne : "PARIS 8" ou "PARIS 08"
-    m2 = re.search(r"^(?P<ville>.+?)\s+(?P<num>\d{1,2})$", s)
-    if m2:
-        ville = m2.group("ville").strip()
-        num   = m2.group("num").zfill(2)
-        return f"{ville} {num}"
 
-    return s
+    Appliquée uniquement à des champs courts et répétitifs (villes, entreprises, pays) :
+    le noyau partagé avec le moteur de recommandation est utilisé avec son cache LRU.
+    """
+    return normalize_label_cached(text)
 
 
 
@@ -191,10 +173,7 @@ def match_commune_insee(commune):
 
 def clean_description(text):
     """Nettoie la description en supprimant les balises HTML et les espaces inutiles."""
-    if not text:
-        return None
-    text = re.sub(r"<[^>]+>", " ", text).replace("\n", " ").replace("\r", " ").replace("&nbsp;", " ")
-    return re.sub(r"\s+", " ", text).strip()
+    return strip_html(text)
 
 
 
@@ -308,8 +287,8 @@ def extract_location_france_travail(location_data):
     if not location_data:
         return None, None
 
-    libelle = location_data.get("libelle", "")
-    code_post = location_data.get("codePostal")
+    libelle = location_data.libelle
+    code_post = location_data.codePostal
 
     # Si le code postal est présent, récupérer `Libellé_d_acheminement`
     if code_post:
@@ -359,8 +338,8 @@ def extract_location_adzuna(location_data):
     if not location_data:
         return None, None, None
 
-    display_name = location_data.get("display_name", "")
-    area_list = location_data.get("area", [])
+    display_name = location_data.display_name
+    area_list = location_data.area
 
     # Si la liste area contient exactement 1 élément, c'est uniquement le pays.
     if len(area_list) == 1:
@@ -451,136 +430,95 @@ def extract_location_jsearch(location_name):
 
 
 
-def convert_to_timestamp(date_str):
+def convert_to_timestamp(date_str, normalizer=None):
     """
     Convertit une date sous différents formats en un timestamp PostgreSQL-compatible.
+    Le normaliseur de la source (format détecté une fois par lot) est utilisé s'il est fourni.
 
     :param date_str: Chaîne de caractères représentant une date.
+    :param normalizer: DateNormalizer de la source en cours de traitement (optionnel).
     :return: Chaîne de caractères au format 'YYYY-MM-DD HH:MI:SS' ou None si la conversion échoue.
     """
-    if not date_str:
-        return None
-
-    # Liste des formats de dates possibles
-    date_formats = [
-        "%Y-%m-%dT%H:%M:%SZ",    # Format ISO 8601 (Adzuna, France Travail)
-        "%Y-%m-%dT%H:%M:%S.%fZ", # Format ISO avec millisecondes
-        "%d/%m/%Y %H:%M:%S",     # Format français avec heure
-        "%Y-%m-%d %H:%M:%S",     # Format SQL classique
-        "%d-%m-%Y",              # Format court (jour-mois-année)
-        "%Y/%m/%d",              # Format alternatif (année/mois/jour)
-    ]
-
-    for fmt in date_formats:
-        try:
-            dt = datetime.strptime(date_str, fmt)
-            return dt.strftime("%Y-%m-%d %H:%M:%S")  # Format PostgreSQL
-        except ValueError:
-            continue
-
-    # Si aucun format ne correspond, on retourne None
-    return None
+    return (normalizer or DEFAULT_DATE_NORMALIZER).to_timestamp(date_str)
 
 
 
-def convert_relative_time(relative_str):
+def convert_relative_time(relative_str, normalizer=None):
     """
     Convertit une chaîne du format "il y a X jours" ou "il y a X heures"
-    en un timestamp PostgreSQL-compatible ("%Y-%m-%d %H:%M:%S").
+    en un timestamp PostgreSQL-compatible ("%Y-%m-%d %H:%M:%S"),
+    relativement à l'heure de référence de l'exécution.
     """
-    import re
-    from datetime import datetime, timedelta
+    return (normalizer or DEFAULT_DATE_NORMALIZER).from_relative(relative_str)
 
-    if not relative_str or not isinstance(relative_str, str):
-        return None
-
-    # Mettre la chaîne en minuscules et supprimer les espaces superflus
-    relative_str = relative_str.lower().strip()
-
-    # Rechercher le pattern "il y a <nombre> <unité>"
-    match = re.search(r"il y a (\d+)\s*(jours?|heures?)", relative_str)
-    if match:
-        number = int(match.group(1))
-        unit = match.group(2)
-        now = datetime.now()
-        if "jour" in unit:
-            delta = timedelta(days = number)
-        elif "heure" in unit:
-            delta = timedelta(hours = number)
-        else:
-            return None
-        created_time = now - delta
-        return created_time.strftime("%Y-%m-%d %H:%M:%S")
-
-    return None
 
 
-
-def transform_adzuna_jobs(job):
-    loc_adz, cp_adz, country = extract_location_adzuna(job.get("location"))
+def transform_adzuna_jobs(job: AdzunaJob):
+    loc_adz, cp_adz, country = extract_location_adzuna(job.location)
     return {
         "source": "Adzuna",
-        "external_id": job.get("id"),
-        "title": clean_title(job.get("title")),
-        "company": harmonize_company_name(job.get("company", {}).get("display_name")),
+        "external_id": job.id,
+        "title": clean_title(job.title),
+        "company": harmonize_company_name(job.company.display_name),
         "location": loc_adz,
         "code_postal": cp_adz,
-        "longitude": job.get("longitude"),
-        "latitude": job.get("latitude"),
-        "contract_type": job.get("contract_type"),
-        "salary_min": job.get("salary_min"),
-        "salary_max": job.get("salary_max"),
-        "sector": job.get("category", {}).get("label"),
+        "longitude": job.longitude,
+        "latitude": job.latitude,
+        "contract_type": job.contract_type,
+        "salary_min": job.salary_min,
+        "salary_max": job.salary_max,
+        "sector": job.category.label,
         "description": None,
         "country": country,
-        "created_at": convert_to_timestamp(job.get("created")),
-        "apply_url": job.get("redirect_url")
+        "created_at": convert_to_timestamp(job.created, DATE_NORMALIZERS["adzuna"]),
+        "apply_url": job.redirect_url
     }
 
 
 
-def transform_france_travail_jobs(job):
-    loc_ft, cp_ft = extract_location_france_travail(job.get("lieuTravail"))
+def transform_france_travail_jobs(job: FranceTravailJob):
+    loc_ft, cp_ft = extract_location_france_travail(job.lieuTravail)
+    salary_min, salary_max = extract_salary_france_travail(job.salaire.libelle)
     return {
         "source": "France Travail",
-        "external_id": job.get("id"),
-        "title": clean_title(job.get("intitule")),
-        "company": harmonize_company_name(job.get("entreprise", {}).get("nom")),
+        "external_id": job.id,
+        "title": clean_title(job.intitule),
+        "company": harmonize_company_name(job.entreprise.nom),
         "location": loc_ft,
         "code_postal": cp_ft,
-        "longitude": job.get("lieuTravail", {}).get("longitude"),
-        "latitude": job.get("lieuTravail", {}).get("latitude"),
-        "contract_type": job.get("typeContrat"),
-        "salary_min": extract_salary_france_travail(job.get("salaire", {}).get("libelle"))[0],
-        "salary_max": extract_salary_france_travail(job.get("salaire", {}).get("libelle"))[1],
-        "sector": job.get("secteurActiviteLibelle"),
-        "description": clean_description(job.get("description")),
+        "longitude": job.lieuTravail.longitude if job.lieuTravail else None,
+        "latitude": job.lieuTravail.latitude if job.lieuTravail else None,
+        "contract_type": job.typeContrat,
+        "salary_min": salary_min,
+        "salary_max": salary_max,
+        "sector": job.secteurActiviteLibelle,
+        "description": clean_description(job.description),
         "country": "FRANCE",
-        "created_at": convert_to_timestamp(job.get("dateCreation")),
-        "apply_url": job.get("origineOffre", {}).get("urlOrigine"),
+        "created_at": convert_to_timestamp(job.dateCreation, DATE_NORMALIZERS["france_travail"]),
+        "apply_url": job.origineOffre.urlOrigine,
     }
 
 
 
-def transform_jsearch_jobs(job):
-    loc_js, cp_js, country = extract_location_jsearch(job.get("job_location"))
+def transform_jsearch_jobs(job: JSearchJob):
+    loc_js, cp_js, country = extract_location_jsearch(job.job_location)
     return {
         "source": "JSearch",
-        "external_id": clean_title(job.get("job_id")),
-        "title": job.get("job_title"),
-        "company": harmonize_company_name(job.get("employer_name")),
+        "external_id": clean_title(job.job_id),
+        "title": job.job_title,
+        "company": harmonize_company_name(job.employer_name),
         "location": loc_js,
         "code_postal": cp_js,
-        "longitude": job.get("job_longitude"),
-        "latitude": job.get("job_latitude"),
-        "contract_type": job.get("job_employment_type"),
-        "salary_min": job.get("job_min_salary"),
-        "salary_max": job.get("job_max_salary"),
+        "longitude": job.job_longitude,
+        "latitude": job.job_latitude,
+        "contract_type": job.job_employment_type,
+        "salary_min": job.job_min_salary,
+        "salary_max": job.job_max_salary,
         "sector": None,
-        "description": clean_description(job.get("job_description")),
+        "description": clean_description(job.job_description),
         "country": country,
-        "created_at": convert_relative_time(job.get("job_posted_at")),
-        "apply_url": job.get("job_apply_link")
+        "created_at": convert_relative_time(job.job_posted_at, DATE_NORMALIZERS["jsearch"]),
+        "apply_url": job.job_apply_link
     }
 
 
@@ -609,46 +547,74 @@ def process_source_files(source: str, source_dir: str) -> List[Dict[str, Any]]:
     if latest_path is None:
         return []
 
-    # Charge les données brutes
-    data = load_json_safely(latest_path) or []
+    # Nouveau lot : le format de date sera détecté sur les premières offres
+    DATE_NORMALIZERS[source].start_batch()
+
+    # Charge les données brutes, décodées directement dans le schéma de la source
+    data = load_json_safely(latest_path, list[RAW_RECORD_TYPES[source]]) or []
     info(f"{len(data)} offres brutes chargées pour {source}")
 
     # Transforme chaque offre en parallèle
     transformed_jobs = []
-    CHUNK_SIZE = 10000
 
-    for i, batch in enumerate(chunked(data, CHUNK_SIZE), start=1):
-        info(f"Traitement du batch {i}")
-        with ThreadPoolExecutor() as executor:
-            results = list(
-                executor.map(TRANSFORMATION_FUNCTIONS[source], batch))
-            transformed_jobs.extend(results)
+    if memory_budget_exceeded():
+        # Chemin par lots : petits lots, offres brutes libérées au fur et à mesure
+        # et doublons intra-source écartés dès la transformation.
+        info(f"Budget mémoire dépassé, transformation par lots de {LOW_MEMORY_CHUNK_SIZE} pour {source}")
+        add_stage_details(**{f"{source}_low_memory_path": True})
+        seen_keys = set()
+        i = 0
+        while data:
+            i += 1
+            batch = data[:LOW_MEMORY_CHUNK_SIZE]
+            del data[:LOW_MEMORY_CHUNK_SIZE]
+            info(f"Traitement du batch {i}")
+            with ThreadPoolExecutor() as executor:
+                results = executor.map(TRANSFORMATION_FUNCTIONS[source], batch)
+                transformed_jobs.extend(deduplicate_jobs(results, seen_keys))
+            del batch
+    else:
+        for i, batch in enumerate(chunked(data, CHUNK_SIZE), start=1):
+            info(f"Traitement du batch {i}")
+            with ThreadPoolExecutor() as executor:
+                results = list(
+                    executor.map(TRANSFORMATION_FUNCTIONS[source], batch))
+                transformed_jobs.extend(results)
 
     info(f"{len(transformed_jobs)} offres transformées pour {source} "
          f"(fichier: {os.path.basename(latest_path)})")
     return transformed_jobs
 
 
-def deduplicate_jobs(jobs):
+def deduplicate_jobs(jobs, seen_keys=None):
     """
     Supprime les doublons dans une liste de jobs en se basant sur `external_id` et 'source'.
+    Si `seen_keys` est fourni, les clés déjà rencontrées (lots précédents) sont aussi écartées
+    et l'ensemble est complété, ce qui permet de dédupliquer un flux lot par lot.
     """
-    unique_jobs = {}
+    if seen_keys is None:
+        seen_keys = set()
+    unique_jobs = []
     for job in jobs:
         key = (job["external_id"], job["source"])  # Unicité basée sur l'ID et la source
-        if key not in unique_jobs:
-            unique_jobs[key] = job
-    return list(unique_jobs.values())
+        if key not in seen_keys:
+            seen_keys.add(key)
+            unique_jobs.append(job)
+    return unique_jobs
 
 
 
-def deduplicate_after_merge(jobs):
+def deduplicate_after_merge(jobs, unique_jobs=None):
     """
     Supprime les doublons après fusion des sources, en se basant sur `title` et `company`,
     tout en donnant la priorité aux offres issues de France Travail (source="France Travail")
     ou, à défaut, à celles qui contiennent des informations de salaire lorsque disponibles.
+
+    Si `unique_jobs` (dictionnaire clé → offre) est fourni, les offres y sont fusionnées :
+    les sources peuvent ainsi être dédupliquées une à une sans conserver toutes les offres.
     """
-    unique_jobs = {}
+    if unique_jobs is None:
+        unique_jobs = {}
     for job in jobs:
         # Clé de déduplication : (titre normalisé, entreprise harmonisée)
         title_key = job.get("title", "").strip().lower()
@@ -679,6 +645,7 @@ def deduplicate_after_merge(jobs):
 
 
 
+@track_stage("transform")
 def transform_jobs():
     """
     Orchestration du traitement des offres d'emploi :
@@ -686,8 +653,17 @@ def transform_jobs():
     - Transforme chaque offre en parallèle via ThreadPoolExecutor.
     - Applique déduplication intra et inter-sources.
     - Sauvegarde le résultat final.
+
+    Au-delà du budget mémoire, la déduplication inter-sources est appliquée au fil de l'eau
+    après chaque source au lieu de conserver toutes les offres jusqu'à la fusion.
     """
     all_transformed_jobs = []
+    merged_jobs = {}
+
+    # Heure de référence unique pour toute l'exécution (dates relatives JSearch)
+    reference_time = datetime.now()
+    for normalizer in DATE_NORMALIZERS.values():
+        normalizer.start_batch(reference_time)
 
     # Vérifier si le dictionnaire INSEE est bien chargé
     if not communes_dict:
@@ -709,10 +685,19 @@ def transform_jobs():
             f"{len(unique_jobs)} offres uniques."
         )
 
-        all_transformed_jobs.extend(unique_jobs)
+        del transformed_jobs
+
+        if merged_jobs or memory_budget_exceeded():
+            # Chemin économe : fusion immédiate, les doublons inter-sources ne sont pas conservés
+            deduplicate_after_merge(all_transformed_jobs, merged_jobs)
+            deduplicate_after_merge(unique_jobs, merged_jobs)
+            all_transformed_jobs = []
+        else:
+            all_transformed_jobs.extend(unique_jobs)
+        del unique_jobs
 
     # Déduplication inter-sources après fusion
-    final_jobs = deduplicate_after_merge(all_transformed_jobs)
+    final_jobs = deduplicate_after_merge(all_transformed_jobs, merged_jobs)
     info(
         f"Déduplication inter-sources appliquée, "
         f"{len(final_jobs)} offres finales."
@@ -721,7 +706,16 @@ def transform_jobs():
     # Sauvegarde des offres transformées
     try:
         if final_jobs:
-            save_to_json(final_jobs, directory=PROCESSED_DATA_DIR, source="transformed")
+            filename = f"transformed_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+            # Les descriptions sont stockées à part (compressées) avant l'écriture du fichier des offres
+            store_path = description_store_path(os.path.join(PROCESSED_DATA_DIR, filename))
+            stored = write_description_store(
+                store_path, ((offer_key(job), job.pop("description", None)) for job in final_jobs)
+            )
+            info(f"{stored} descriptions sauvegardées dans {store_path}.bin")
+
+            save_to_json(final_jobs, directory=PROCESSED_DATA_DIR, source="transformed", filename=filename)
             info(f"Transformation terminée : {len(final_jobs)} offres sauvegardées.")
 
     except Exception as exception:
@@ -1,6 +1,9 @@
-import re
-import unicodedata
 from sklearn.feature_extraction.text import TfidfVectorizer
+from normalization.text import normalize_search_text, normalize_search_text_cached
+
+# Champs courts et très répétitifs d'une offre à l'autre : seuls normalisés via le cache LRU.
+# Les autres (titre, description, identifiants, dates...) sont quasi uniques et l'évinceraient.
+REPEATED_FIELDS = {"company", "location", "code_postal", "contract_type", "country", "sector", "source"}
 
 
 def text_normalization(text: str) -> str:
@@ -8,17 +11,7 @@ def text_normalization(text: str) -> str:
     Normalise le texte en supprimant les accents, en le passant en minuscules
     et en supprimant les caractères spéciaux.
     """
-    if not text or not isinstance(text, str):
-        return ""
-    # Supprimer les accents
-    text = unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8")
-    # Mettre en minuscules
-    text = text.lower()
-    # Supprimer les caractères non alphanumériques (sauf espaces)
-    text = re.sub(r"[^a-z0-9\s]", "", text)
-    # Supprimer les espaces multiples
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    return normalize_search_text(text)
 
 
 def prepare_offer_data(offer: dict) -> dict:
@@ -35,7 +28,10 @@ def prepare_offer_data(offer: dict) -> dict:
             # On garde la valeur brute
             cleaned[key] = value if value else ""
         elif isinstance(value, str) and value:
-            cleaned[key] = text_normalization(value)
+            if key in REPEATED_FIELDS:
+                cleaned[key] = normalize_search_text_cached(value)
+            else:
+                cleaned[key] = text_normalization(value)
         else:
             cleaned[key] = ""
     return cleaned
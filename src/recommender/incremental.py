@@ -0,0 +1,188 @@
+"""
+Mise à jour incrémentale de l'index de recommandation.
+
+Les termes sont hachés (HashingVectorizer, RECOMMENDER_HASH_FEATURES colonnes) : il n'y a pas de vocabulaire
+à apprendre, une offre se vectorise indépendamment des autres. L'index conserve d'une version à l'autre :
+- les fréquences documentaires (df) de chaque colonne et le nombre d'offres indexées ;
+- l'IDF "gelé" appliqué aux vecteurs, recalculé uniquement lors d'un compactage ;
+- une empreinte du texte de chaque offre (titre, localisation, description bruts).
+
+À chaque exécution de l'ETL, seules les offres nouvelles ou dont l'empreinte a changé sont normalisées et
+vectorisées ; les autres reprennent leur ligne de la version précédente. Les offres disparues du fichier
+transformé (ou modifiées) sont retirées : leurs termes sont décomptés de df. Un terme qui apparaît reçoit
+aussitôt son IDF (aucune ligne existante ne le contient) ; un terme qui disparaît est ignoré, comme un terme
+hors vocabulaire d'un TfidfVectorizer.
+
+Les IDF des autres termes restent gelés jusqu'au compactage suivant (obsolescence bornée), déclenché lorsque la
+part d'offres ajoutées ou retirées depuis le dernier compactage dépasse RECOMMENDER_INDEX_MAX_DRIFT, ou après
+RECOMMENDER_INDEX_COMPACT_EVERY constructions. Le compactage recalcule l'IDF à partir de df et repondère les
+vecteurs existants (sans retraiter les textes).
+"""
+
+import hashlib
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from recommender.recommender import combine_offer_text
+from storage.description_store import get_description, offer_key
+
+
+HASH_FEATURES = int(os.environ.get("RECOMMENDER_HASH_FEATURES", 2 ** 20))
+INDEX_MAX_DRIFT = float(os.environ.get("RECOMMENDER_INDEX_MAX_DRIFT", 0.2))
+INDEX_COMPACT_EVERY = int(os.environ.get("RECOMMENDER_INDEX_COMPACT_EVERY", 10))
+
+# Découpage en termes identique au TfidfVectorizer utilisé jusqu'ici
+TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+
+def smooth_idf(df, offers_count: int):
+    """IDF lissé, comme TfidfTransformer(smooth_idf=True)."""
+    return np.log((1 + offers_count) / (1 + df)) + 1
+
+
+def weigh(counts, idf):
+    """Pondère des occurrences de termes par l'IDF et normalise chaque ligne (L2)."""
+    weighted = csr_matrix(counts, dtype=np.float64, copy=True)
+    weighted.data *= idf[weighted.indices]
+    weighted.eliminate_zeros()
+    return normalize(weighted) if weighted.shape[0] else weighted
+
+
+def document_frequencies(vectors, n_features: int):
+    """Nombre de lignes contenant chaque colonne."""
+    return np.bincount(vectors.indices, minlength=n_features).astype(np.int64)
+
+
+class HashingTfidfVectorizer:
+    """
+    Vectorizer TF-IDF sur termes hachés : même découpage et même pondération que TfidfVectorizer
+    (IDF lissé, normalisation L2), avec un IDF fourni plutôt qu'appris.
+    Les colonnes d'IDF nul (termes absents du corpus) sont ignorées.
+    """
+
+    def __init__(self, idf, n_features: int = HASH_FEATURES, token_pattern: str = TOKEN_PATTERN, lowercase: bool = True):
+        self.idf_ = idf
+        self.n_features = n_features
+        self.token_pattern = token_pattern
+        self.lowercase = lowercase
+        self.hashing = HashingVectorizer(
+            n_features=n_features, token_pattern=token_pattern, lowercase=lowercase,
+            alternate_sign=False, norm=None,
+        )
+
+    def get_params(self) -> dict:
+        return {"n_features": self.n_features, "token_pattern": self.token_pattern, "lowercase": self.lowercase}
+
+    def counts(self, texts):
+        """Occurrences des termes hachés de chaque texte."""
+        if len(texts) == 0:
+            return csr_matrix((0, self.n_features), dtype=np.float64)
+        return self.hashing.transform(texts)
+
+    def transform(self, texts):
+        return weigh(self.counts(texts), self.idf_)
+
+
+def offer_text_hash(offer: dict, description_store=None) -> int:
+    """Empreinte (64 bits) des champs bruts qui composent le texte vectorisé d'une offre."""
+    fields = (offer.get("title"), offer.get("location"), get_description(offer, description_store))
+    payload = "\x1f".join(value or "" for value in fields).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), "little")
+
+
+def update_index(offers: list, description_store, weights: dict, previous=None):
+    """
+    Vecteurs des offres d'un fichier transformé, en réutilisant ceux de la version précédente de l'index.
+
+    :param previous: État de la version précédente (voir loader.read_index_state) ou None (construction complète).
+    :return: (vectorizer, vecteurs dans l'ordre de `offers`, état à enregistrer, statistiques de la mise à jour).
+    """
+    keys = [offer_key(offer) for offer in offers]
+    text_hashes = np.fromiter(
+        (offer_text_hash(offer, description_store) for offer in offers), dtype=np.uint64, count=len(offers)
+    )
+
+    if previous is None:
+        n_features = HASH_FEATURES
+        idf = np.zeros(n_features)
+        df = np.zeros(n_features, dtype=np.int64)
+        state = {"builds_since_compaction": 0, "changes_since_compaction": 0, "offers_at_compaction": 0}
+        previous_rows = {}
+    else:
+        n_features = previous["n_features"]
+        idf = np.array(previous["idf"])
+        df = np.array(previous["df"])
+        state = dict(previous["compaction"])
+        previous_rows = {key: row for row, key in enumerate(previous["offer_keys"])}
+
+    # Ligne de la version précédente réutilisable pour chaque offre (-1 : à vectoriser)
+    reused_rows = np.fromiter((previous_rows.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+    known = reused_rows >= 0
+    if known.any():
+        # Offre modifiée (empreinte différente) : revectorisée
+        changed = np.asarray(previous["text_hashes"])[reused_rows[known]] != text_hashes[known]
+        reused_rows[np.flatnonzero(known)[changed]] = -1
+
+    fresh_positions = np.flatnonzero(reused_rows < 0)
+    vectorizer = HashingTfidfVectorizer(idf, n_features)
+    counts = vectorizer.counts([
+        combine_offer_text(offers[position], description_store, **weights) for position in fresh_positions
+    ])
+
+    # Décompte des lignes retirées (offres disparues ou modifiées), ajout des nouvelles
+    removed_rows = 0
+    if previous is not None:
+        kept = np.zeros(len(previous["offer_keys"]), dtype=bool)
+        kept[reused_rows[reused_rows >= 0]] = True
+        removed = np.flatnonzero(~kept)
+        removed_rows = removed.size
+        df -= document_frequencies(previous["vectors"][removed], n_features)
+    df += document_frequencies(counts, n_features)
+
+    # Termes apparus : IDF immédiat (aucune ligne existante ne les contient) ; termes disparus : ignorés
+    idf[(df > 0) & (idf == 0)] = smooth_idf(df, len(offers))[(df > 0) & (idf == 0)]
+    idf[df == 0] = 0
+
+    fresh = weigh(counts, idf)
+    if previous is not None:
+        reused = previous["vectors"][reused_rows[reused_rows >= 0]]
+        vectors = vstack([reused, fresh], format="csr")
+        # Lignes remises dans l'ordre du fichier transformé
+        order = np.empty(len(offers), dtype=np.int64)
+        order[np.flatnonzero(reused_rows >= 0)] = np.arange(reused.shape[0])
+        order[fresh_positions] = reused.shape[0] + np.arange(fresh_positions.size)
+        vectors = vectors[order]
+    else:
+        vectors = fresh
+
+    state["builds_since_compaction"] += 1
+    state["changes_since_compaction"] += int(fresh_positions.size + removed_rows)
+    drift = state["changes_since_compaction"] / max(state["offers_at_compaction"], 1)
+    compacted = previous is None or drift > INDEX_MAX_DRIFT or state["builds_since_compaction"] >= INDEX_COMPACT_EVERY
+
+    if compacted:
+        # IDF recalculé ; vecteurs existants repondérés : normalize(w / idf_gelé * idf_nouveau)
+        new_idf = np.where(df > 0, smooth_idf(df, len(offers)), 0)
+        if previous is not None:
+            vectors = csr_matrix(vectors, copy=True)
+            vectors.data *= new_idf[vectors.indices] / idf[vectors.indices]
+            vectors = normalize(vectors)
+        idf = new_idf
+        vectorizer = HashingTfidfVectorizer(idf, n_features)
+        state = {"builds_since_compaction": 0, "changes_since_compaction": 0, "offers_at_compaction": len(offers)}
+
+    new_state = {
+        "n_features": n_features, "df": df, "idf": idf, "text_hashes": text_hashes, "compaction": state,
+    }
+    stats = {
+        "reused": int((reused_rows >= 0).sum()),
+        "vectorized": int(fresh_positions.size),
+        "removed": int(removed_rows),
+        "compacted": bool(compacted),
+        "drift": round(drift, 4),
+    }
+    return vectorizer, vectors, new_state, stats
@@ -0,0 +1,66 @@
+"""
+Index inversé des vecteurs TF-IDF des offres : terme → liste des offres qui le contiennent.
+
+C'est la matrice des offres en colonnes (CSC) : pour le terme j, `indices[indptr[j]:indptr[j + 1]]`
+sont les offres contenant j et `data[...]` leurs poids TF-IDF. Le score d'une requête n'est accumulé
+que sur les listes de ses termes : une requête courte ("data engineer paris") ne parcourt que
+trois listes, quelle que soit la taille du corpus. Les offres hors de ces listes ont un score nul.
+"""
+
+import numpy as np
+from scipy.sparse import csc_matrix
+
+
+class InvertedIndex:
+    """Listes d'offres par terme (tableaux CSC, éventuellement projetés en mémoire)."""
+
+    def __init__(self, indptr, indices, data, offers_count: int):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.offers_count = offers_count
+
+    @classmethod
+    def from_vectors(cls, offer_vectors):
+        """Construit l'index à partir de la matrice des offres (copie en colonnes)."""
+        postings = csc_matrix(offer_vectors)
+        postings.sort_indices()
+        return cls(postings.indptr, postings.indices, postings.data, postings.shape[0])
+
+    def postings_length(self, query_vector) -> int:
+        """Nombre d'entrées parcourues pour une requête."""
+        terms = query_vector.indices
+        return int((self.indptr[terms + 1] - self.indptr[terms]).sum())
+
+    def score(self, query_vector, allowed=None):
+        """
+        Similarité cosinus (produit scalaire des vecteurs normalisés L2) de la requête avec les offres
+        contenant au moins un de ses termes.
+        `allowed` (masque booléen par offre) restreint le calcul aux offres autorisées (filtres de recherche).
+        Retourne (indices des offres, par ordre croissant ; scores correspondants).
+        """
+        terms = query_vector.indices
+        weights = query_vector.data
+        starts = self.indptr[terms]
+        ends = self.indptr[terms + 1]
+
+        if terms.size == 0:
+            # Aucun terme de la requête dans le vocabulaire
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        if terms.size == 1 and allowed is None:
+            # Une seule liste, déjà triée par offre
+            return (np.asarray(self.indices[starts[0]:ends[0]]),
+                    np.asarray(self.data[starts[0]:ends[0]]) * weights[0])
+
+        rows = np.concatenate([self.indices[start:end] for start, end in zip(starts, ends)])
+        contributions = np.concatenate([
+            self.data[start:end] * weight for start, end, weight in zip(starts, ends, weights)
+        ])
+        if allowed is not None:
+            # Entrées des offres exclues écartées avant l'accumulation
+            kept = allowed[rows]
+            rows, contributions = rows[kept], contributions[kept]
+        if terms.size == 1:
+            return rows, contributions
+        offer_ids, positions = np.unique(rows, return_inverse=True)
+        return offer_ids, np.bincount(positions, weights=contributions, minlength=offer_ids.size)
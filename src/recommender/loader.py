@@ -1,15 +1,290 @@
-import pickle
-import numpy as np
+"""
+Index de recommandation persistant et versionné.
+
+L'index TF-IDF est construit par l'ETL (tâche build_recommender_index), juste après la transformation,
+en ne vectorisant que les offres nouvelles ou modifiées (voir incremental.py), et écrit dans
+`data/recommender_index/` :
+- `<version>/idf.npy` : IDF de chaque colonne de termes hachés (nul pour les termes absents du corpus) ;
+- `<version>/df.npy`, `<version>/text_hashes.npy` : fréquences documentaires et empreintes des textes des offres,
+  lues par la construction suivante pour la mise à jour incrémentale ;
+- `<version>/vectors_data.npy`, `vectors_indices.npy`, `vectors_indptr.npy` : matrice CSR des offres,
+  un tableau par fichier afin d'être projetés en mémoire (un .npz, compressé ou non, ne se projette pas) ;
+- `<version>/postings_data.npy`, `postings_indices.npy`, `postings_indptr.npy` : la même matrice en colonnes (CSC),
+  c'est-à-dire l'index inversé terme → offres (voir inverted_index.py) ;
+- `<version>/offer_keys.json` : clé d'offre ("<source>:<external_id>") de chaque ligne de la matrice ;
+- `<version>/semantic_*.npy` (si RECOMMENDER_SEMANTIC_INDEX=1) : projection LSA et index IVF du mode
+  sémantique (voir semantic.py), plongements des offres rangés par liste ;
+- `<version>/manifest.json` : fichier transformé d'origine, dimensions, pondérations, paramètres
+  du vectorizer, état du compactage et empreinte sha256 / taille de chaque fichier ;
+- `CURRENT` : nom de la version servie.
+
+Une version est écrite dans un dossier temporaire puis renommée, et CURRENT remplacé en dernier :
+l'API ne lit jamais d'index partiel. Les RECOMMENDER_INDEX_KEEP dernières versions sont conservées.
+
+L'API charge la version courante sans renormaliser ni réentraîner : vectorizer reconstruit à partir
+de l'IDF, matrice et index inversé projetés en mémoire. Si l'index est absent, illisible ou construit
+sur un autre fichier que le dernier fichier transformé, elle reconstruit le moteur comme auparavant.
+"""
+
+import hashlib
 import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from fetch_functions.utils import get_latest_file
+from logger.logger import info, warning
+from recommender.incremental import HASH_FEATURES, HashingTfidfVectorizer
+from recommender.inverted_index import InvertedIndex
+from recommender.recommender import build_recommendation_engine_from_folder, load_processed_offers
+from recommender.semantic import SEMANTIC_ARRAYS, SemanticIndex
+from storage.description_store import offer_key, open_description_store
+
+
+BASE_DIR = os.environ.get("PROJECT_ROOT", os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+INDEX_DIR = os.environ.get("RECOMMENDER_INDEX_DIR", os.path.join(BASE_DIR, "data/recommender_index"))
+INDEX_KEEP_VERSIONS = int(os.environ.get("RECOMMENDER_INDEX_KEEP", 3))
+# Vérification des empreintes sha256 au chargement (lit tous les fichiers : annule le gain du mmap)
+INDEX_VERIFY_CHECKSUMS = os.environ.get("RECOMMENDER_INDEX_VERIFY", "0") == "1"
+
+INDEX_FORMAT_VERSION = 3
+CURRENT_POINTER = "CURRENT"
+MANIFEST_FILENAME = "manifest.json"
+VECTOR_ARRAYS = ("data", "indices", "indptr")
+
+
+class IndexArtifactError(Exception):
+    """Index de recommandation absent, incomplet ou incohérent."""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path: str, data) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def _read_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def current_version(index_dir: str = INDEX_DIR):
+    """Nom de la version courante de l'index, ou None."""
+    try:
+        with open(os.path.join(index_dir, CURRENT_POINTER), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_index_artifact(snapshot_path: str, offers: list, vectorizer, vectors, state: dict,
+                         weights: dict = None, semantic_index: SemanticIndex = None, index_dir: str = INDEX_DIR) -> str:
+    """
+    Écrit une nouvelle version de l'index et en fait la version courante.
+
+    :param snapshot_path: Fichier transformé à partir duquel l'index a été construit.
+    :param offers: Offres du fichier, dans l'ordre des lignes de `vectors`.
+    :param state: État de la mise à jour incrémentale (voir incremental.update_index).
+    :param weights: Pondérations des champs utilisées pour la vectorisation (reportées dans le manifeste).
+    :param semantic_index: Index du mode sémantique (voir semantic.build_semantic_index), facultatif.
+    :return: Nom de la version écrite.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    version = datetime.now().strftime("v%Y%m%d_%H%M%S_%f")
+    tmp_dir = os.path.join(index_dir, f"{version}.tmp")
+    os.makedirs(tmp_dir)
+
+    vectors = csr_matrix(vectors)
+
+    np.save(os.path.join(tmp_dir, "idf.npy"), vectorizer.idf_)
+    np.save(os.path.join(tmp_dir, "df.npy"), state["df"])
+    np.save(os.path.join(tmp_dir, "text_hashes.npy"), state["text_hashes"])
+    for name in VECTOR_ARRAYS:
+        np.save(os.path.join(tmp_dir, f"vectors_{name}.npy"), getattr(vectors, name))
+    postings = InvertedIndex.from_vectors(vectors)
+    for name in VECTOR_ARRAYS:
+        np.save(os.path.join(tmp_dir, f"postings_{name}.npy"), getattr(postings, name))
+    _write_json(os.path.join(tmp_dir, "offer_keys.json"), [offer_key(offer) for offer in offers])
+    if semantic_index is not None:
+        for name in SEMANTIC_ARRAYS:
+            np.save(os.path.join(tmp_dir, f"semantic_{name}.npy"), getattr(semantic_index, name))
+
+    files = {
+        filename: {"sha256": _sha256(os.path.join(tmp_dir, filename)),
+                   "size": os.path.getsize(os.path.join(tmp_dir, filename))}
+        for filename in sorted(os.listdir(tmp_dir))
+    }
+    manifest = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "snapshot": os.path.basename(snapshot_path),
+        "offers": vectors.shape[0],
+        "features": vectors.shape[1],
+        "terms": int(np.count_nonzero(vectorizer.idf_)),
+        "nnz": int(vectors.nnz),
+        "weights": weights or {},
+        "vectorizer": vectorizer.get_params(),
+        "compaction": state["compaction"],
+        "semantic": {"dimensions": semantic_index.dimensions, "lists": semantic_index.lists}
+        if semantic_index is not None else None,
+        "files": files,
+    }
+    _write_json(os.path.join(tmp_dir, MANIFEST_FILENAME), manifest)
+
+    # Publication : renommage du dossier puis remplacement du pointeur
+    os.rename(tmp_dir, os.path.join(index_dir, version))
+    with open(os.path.join(index_dir, f"{CURRENT_POINTER}.tmp"), "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(os.path.join(index_dir, f"{CURRENT_POINTER}.tmp"), os.path.join(index_dir, CURRENT_POINTER))
+
+    prune_index_versions(index_dir)
+    info(f"Index de recommandation {version} écrit : {manifest['offers']} offres, {manifest['terms']} termes.")
+    return version
+
+
+def prune_index_versions(index_dir: str = INDEX_DIR, keep: int = INDEX_KEEP_VERSIONS) -> list:
+    """Supprime les versions les plus anciennes (jamais la version courante) ; retourne les versions supprimées."""
+    current = current_version(index_dir)
+    versions = sorted(
+        name for name in os.listdir(index_dir)
+        if os.path.isdir(os.path.join(index_dir, name)) and name.startswith("v") and not name.endswith(".tmp")
+    )
+    removed = [name for name in versions[:-keep] if name != current] if keep > 0 else []
+    for name in removed:
+        shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+    return removed
+
+
+def restore_vectorizer(idf, params: dict) -> HashingTfidfVectorizer:
+    """Vectorizer TF-IDF prêt pour transform(), reconstruit sans réentraînement."""
+    return HashingTfidfVectorizer(idf, **params)
+
+
+def _open_version(version: str, index_dir: str, verify: bool):
+    """Manifeste et dossier d'une version vérifiée (format, présence et taille des fichiers)."""
+    version = version or current_version(index_dir)
+    if version is None:
+        raise IndexArtifactError(f"aucune version dans {index_dir}")
+    version_dir = os.path.join(index_dir, version)
+
+    try:
+        manifest = _read_json(os.path.join(version_dir, MANIFEST_FILENAME))
+    except (OSError, ValueError) as e:
+        raise IndexArtifactError(f"manifeste illisible pour {version} : {e}")
+    if manifest.get("format_version") != INDEX_FORMAT_VERSION:
+        raise IndexArtifactError(f"format {manifest.get('format_version')} non pris en charge ({version})")
+
+    for filename, expected in manifest["files"].items():
+        path = os.path.join(version_dir, filename)
+        if not os.path.exists(path) or os.path.getsize(path) != expected["size"]:
+            raise IndexArtifactError(f"{filename} absent ou tronqué ({version})")
+        if verify and _sha256(path) != expected["sha256"]:
+            raise IndexArtifactError(f"empreinte de {filename} invalide ({version})")
+    return manifest, version_dir
+
+
+def _load_vectors(manifest: dict, version_dir: str):
+    data, indices, indptr = (
+        np.load(os.path.join(version_dir, f"vectors_{name}.npy"), mmap_mode="r") for name in VECTOR_ARRAYS
+    )
+    return csr_matrix((data, indices, indptr), shape=(manifest["offers"], manifest["features"]), copy=False)
+
+
+def _load_semantic_index(manifest: dict, version_dir: str):
+    """Index du mode sémantique projeté en mémoire, ou None s'il n'a pas été construit ou est incomplet."""
+    if not manifest.get("semantic"):
+        return None
+    paths = [os.path.join(version_dir, f"semantic_{name}.npy") for name in SEMANTIC_ARRAYS]
+    missing = [os.path.basename(path) for path in paths if not os.path.exists(path)]
+    if missing:
+        # Mode facultatif : l'index TF-IDF reste utilisable
+        warning(f"Index sémantique de {manifest['version']} incomplet ({', '.join(missing)}) : mode sémantique désactivé.")
+        return None
+    return SemanticIndex(*(np.load(path, mmap_mode="r") for path in paths))
+
+
+def read_index_artifact(version: str = None, index_dir: str = INDEX_DIR, verify: bool = INDEX_VERIFY_CHECKSUMS):
+    """
+    Lit une version de l'index (la version courante par défaut).
+    Retourne (manifeste, vectorizer, matrice CSR et index inversé projetés en mémoire, clés d'offres,
+    index sémantique projeté en mémoire ou None).
+    Lève IndexArtifactError si l'index est absent, incomplet ou d'un format inconnu.
+    """
+    manifest, version_dir = _open_version(version, index_dir, verify)
+    idf = np.load(os.path.join(version_dir, "idf.npy"), mmap_mode="r")
+    vectors = _load_vectors(manifest, version_dir)
+    inverted_index = InvertedIndex(*(
+        np.load(os.path.join(version_dir, f"postings_{name}.npy"), mmap_mode="r") for name in ("indptr", "indices", "data")
+    ), offers_count=manifest["offers"])
+    offer_keys = _read_json(os.path.join(version_dir, "offer_keys.json"))
+
+    vectorizer = restore_vectorizer(idf, manifest["vectorizer"])
+    return manifest, vectorizer, vectors, inverted_index, offer_keys, _load_semantic_index(manifest, version_dir)
+
+
+def read_index_state(weights: dict, index_dir: str = INDEX_DIR):
+    """
+    État de la version courante nécessaire à la mise à jour incrémentale (voir incremental.update_index),
+    ou None si elle est absente ou incompatible (format, pondérations, nombre de colonnes) :
+    l'index est alors reconstruit entièrement.
+    """
+    try:
+        manifest, version_dir = _open_version(None, index_dir, verify=False)
+    except IndexArtifactError as e:
+        info(f"Pas d'index précédent exploitable ({e}) : construction complète.")
+        return None
+    if manifest["weights"] != weights or manifest["features"] != HASH_FEATURES:
+        info(f"Index {manifest['version']} construit avec d'autres paramètres : construction complète.")
+        return None
+
+    return {
+        "version": manifest["version"],
+        "n_features": manifest["features"],
+        "idf": np.load(os.path.join(version_dir, "idf.npy")),
+        "df": np.load(os.path.join(version_dir, "df.npy")),
+        "text_hashes": np.load(os.path.join(version_dir, "text_hashes.npy")),
+        "vectors": _load_vectors(manifest, version_dir),
+        "offer_keys": _read_json(os.path.join(version_dir, "offer_keys.json")),
+        "compaction": manifest["compaction"],
+        "semantic": _load_semantic_index(manifest, version_dir),
+    }
 
-def load_model_data():
-    with open("models/vectorizer.pkl", "rb") as f:
-        vectorizer = pickle.load(f)
 
-    with open("models/vectors.npy", "rb") as f:
-        vectors = np.load(f)
+def load_recommendation_engine(folder_path: str, index_dir: str = INDEX_DIR):
+    """
+    Charge le moteur de recommandation depuis l'index persistant s'il correspond au dernier
+    fichier transformé du dossier ; sinon le reconstruit (build_recommendation_engine_from_folder).
+    Retourne (offres, vectorizer, matrice des offres, stockage des descriptions, index inversé,
+    index sémantique ou None s'il n'a pas été construit).
+    """
+    latest_file = get_latest_file(folder_path)
+    try:
+        manifest, vectorizer, vectors, inverted_index, offer_keys, semantic_index = read_index_artifact(
+            index_dir=index_dir
+        )
+        if latest_file is None or manifest["snapshot"] != os.path.basename(latest_file):
+            raise IndexArtifactError(f"index construit sur {manifest['snapshot']}, dernier fichier : {latest_file}")
 
-    with open("data/processed_offers.json", "r") as f:
-        offers = json.load(f)
+        offers = load_processed_offers(latest_file)
+        # Les lignes de la matrice doivent correspondre une à une aux offres du fichier
+        if len(offers) != len(offer_keys) or any(offer_key(o) != key for o, key in zip(offers, offer_keys)):
+            raise IndexArtifactError(f"offres de {manifest['snapshot']} différentes de celles de l'index")
+    except IndexArtifactError as e:
+        warning(f"Index de recommandation inutilisable ({e}) : reconstruction du moteur.")
+        offers, vectorizer, vectors, descriptions = build_recommendation_engine_from_folder(folder_path)
+        return offers, vectorizer, vectors, descriptions, InvertedIndex.from_vectors(vectors), None
 
-    return vectorizer, vectors, offers
+    info(f"Index de recommandation {manifest['version']} chargé : {manifest['offers']} offres, "
+         f"{manifest['terms']} termes{', mode sémantique disponible' if semantic_index is not None else ''}.")
+    return offers, vectorizer, vectors, open_description_store(latest_file), inverted_index, semantic_index
@@ -1,17 +1,52 @@
-import json
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
 from recommender.data_preparation import prepare_offer_data, text_normalization, vectorize_texts, transform_text
 from pipelines.transform import PROCESSED_DATA_DIR
-from fetch_functions.utils import get_latest_file
+from fetch_functions.utils import get_latest_file, load_json_safely
+from pipelines.records import ProcessedOffer
+from storage.description_store import open_description_store, get_description
 
 
 def compute_similarity(query_vector, offer_vectors):
     """
     Calcule la similarité cosinus entre le vecteur de la requête et les vecteurs d'offres.
     Renvoie un tableau de scores.
+
+    Les vecteurs TF-IDF (offres et requête) étant normalisés L2, la similarité cosinus se réduit
+    à un produit scalaire creux, sans renormalisation ni copie de la matrice des offres.
+    """
+    scores = offer_vectors @ query_vector.T
+    return scores.toarray().ravel()
+
+
+
+def top_k_indices(scores, top_n: int, score_threshold: float, offer_ids=None):
+    """
+    Indices des top_n meilleurs scores au moins égaux au seuil, par score décroissant
+    (à score égal, dans l'ordre du corpus, comme un tri stable).
+    `offer_ids` (croissants) donne l'offre de chaque score lorsque seules certaines offres
+    ont été scorées (index inversé) ; sinon `scores` couvre tout le corpus.
+
+    Seules les offres au-dessus du seuil sont considérées ; argpartition isole les top_n
+    sans trier le reste, puis seuls ces gagnants (et les ex aequo du dernier rang) sont triés.
     """
-    scores = cosine_similarity(query_vector, offer_vectors)
-    return scores.flatten()
+    above_threshold = scores >= score_threshold
+    if offer_ids is None:
+        candidates = np.flatnonzero(above_threshold)
+        candidate_scores = scores[candidates]
+    else:
+        candidates = offer_ids[above_threshold]
+        candidate_scores = scores[above_threshold]
+    if top_n <= 0 or candidates.size == 0:
+        return candidates[:0]
+
+    if candidates.size > top_n:
+        winners = np.argpartition(-candidate_scores, top_n - 1)[:top_n]
+        # Les ex aequo du dernier score retenu sont conservés : l'ordre du corpus les départage
+        kept = candidate_scores >= candidate_scores[winners].min()
+        candidates, candidate_scores = candidates[kept], candidate_scores[kept]
+
+    order = np.lexsort((candidates, -candidate_scores))[:top_n]
+    return candidates[order]
 
 
 
@@ -19,64 +54,177 @@ def load_processed_offers(file_path: str):
     """
     Charge les offres transformées depuis un fichier JSON.
     """
-    with open(file_path, 'r', encoding = 'utf-8') as f:
-        processed_offers = json.load(f)
-    return processed_offers
+    return load_json_safely(file_path, list[ProcessedOffer]) or []
 
 
 
-def build_recommendation_engine_from_folder(folder_path: str,
-                                            weight_title: int = 2,
-                                            weight_location: int = 1,
-                                            weight_description: int = 1):
+def combine_offer_text(offer: dict, description_store=None,
+                       weight_title: int = 2,
+                       weight_location: int = 1,
+                       weight_description: int = 1) -> str:
     """
-    Construit le moteur de recommandation à partir du dernier fichier JSON transformé
-    trouvé dans le dossier donné.
+    Texte d'une offre soumis à la vectorisation : champs normalisés et répétés selon leur poids.
+    La description (lue dans le stockage séparé) et la localisation ne comptent que si elles sont présentes.
+    """
+    # Normalisation des données du fichier selon les règles de normalisation présentes dans data_preparation.py :
+    data = prepare_offer_data({**offer, "description": get_description(offer, description_store)})
+
+    # Combination des champs pour obtenir une sortie composée de toutes les informations :
+    current_weight_description = weight_description if data["description"] else 0
+    current_weight_location = weight_location if data["location"] else 0
+
+    return " ".join(
+        [data["title"]] * weight_title +
+        [data["location"]] * current_weight_location +
+        [data["description"]] * current_weight_description
+    )
+
+
+
+def build_recommendation_engine(snapshot_path: str,
+                                weight_title: int = 2,
+                                weight_location: int = 1,
+                                weight_description: int = 1):
+    """
+    Construit le moteur de recommandation à partir d'un fichier JSON transformé.
     Chaque offre est prétraitée et les champs sont pondérés pour la vectorisation.
 
     Pour chaque offre, la pondération de la description est ajustée :
       - Si la description est présente, on utilise le poids passé en paramètre.
       - Sinon, on ne prend pas en compte ce champ (poids = 0).
+
+    Les descriptions sont lues une à une dans le stockage séparé et ne sont pas conservées :
+    le stockage est renvoyé pour récupérer à la demande celles des offres recommandées.
+    """
+    processed_offers = load_processed_offers(snapshot_path)
+    description_store = open_description_store(snapshot_path)
+
+    combined_text_list = [
+        combine_offer_text(_offer, description_store, weight_title, weight_location, weight_description)
+        for _offer in processed_offers
+    ]
+
+    offers_vectorizer, processed_offer_vectors = vectorize_texts(combined_text_list)
+
+    return processed_offers, offers_vectorizer, processed_offer_vectors, description_store
+
+
+
+def build_recommendation_engine_from_folder(folder_path: str,
+                                            weight_title: int = 2,
+                                            weight_location: int = 1,
+                                            weight_description: int = 1):
+    """
+    Construit le moteur de recommandation à partir du dernier fichier JSON transformé
+    trouvé dans le dossier donné (voir build_recommendation_engine).
     """
     latest_file = get_latest_file(folder_path)
-    processed_offers = load_processed_offers(latest_file)
+    return build_recommendation_engine(latest_file, weight_title, weight_location, weight_description)
 
-    combined_text_list = []
 
-    for _offer in processed_offers:
-        # Normalisation des données du fichier selon les règles de normalisation présentes dans data_preparation.py :
-        data = prepare_offer_data(_offer)
 
-        # Combination des champs pour obtenir une sortie composée de toutes les informations :
-        current_weight_description = weight_description if data["description"] else 0
-        current_weight_location = weight_location if data["location"] else 0
+def recommend_offer_indices(user_input: str, offers_vectorizer, processed_offer_vectors, processed_offers: list, top_n=5,
+                            score_threshold: float = 0.3, inverted_index=None, allowed_offers=None) -> list:
+    """
+    Indices (dans processed_offers) des offres recommandées pour une requête utilisateur,
+    par score décroissant. Voir recommend_offers.
+    `allowed_offers` (masque booléen par offre) limite le calcul des scores aux offres autorisées.
+    """
+    # Pré-traiter l'input utilisateur
+    user_input_normalized = text_normalization(user_input)
+    query_vector = transform_text(offers_vectorizer, user_input_normalized)
 
-        combined_text = " ".join(
-            [data["title"]] * weight_title +
-            [data["location"]] * current_weight_location +
-            [data["description"]] * current_weight_description
-        )
-        combined_text_list.append(combined_text)
+    # Offres dont le score atteint le seuil, triées par score décroissant, limitées aux top n
+    if inverted_index is not None and score_threshold > 0:
+        offer_ids, scores = inverted_index.score(query_vector, allowed_offers)
+        top_indices = top_k_indices(scores, top_n, score_threshold, offer_ids)
+    elif allowed_offers is not None:
+        # Seules les lignes des offres autorisées sont scorées
+        offer_ids = np.flatnonzero(allowed_offers)
+        scores = compute_similarity(query_vector, processed_offer_vectors[offer_ids])
+        top_indices = top_k_indices(scores, top_n, score_threshold, offer_ids)
+    else:
+        scores = compute_similarity(query_vector, processed_offer_vectors)
+        top_indices = top_k_indices(scores, top_n, score_threshold)
+
+    return [
+        i
+        for i in top_indices.tolist()
+        if processed_offers[i].get("location")  # ne garde que celles qui ont location non vide
+    ]
 
-    offers_vectorizer, processed_offer_vectors = vectorize_texts(combined_text_list)
 
-    # 4. Sauvegarde des offres normalisées
-    #output_filename = os.path.basename(f'{latest_file}_normalized')
-    #output_path = os.path.join(NORMALIZED_OFFERS_DIR, output_filename)
 
-    #with open(output_path, "w") as f:
-    #    json.dump(normalized_offers, f, indent=2, ensure_ascii=False)
+def recommend_offer_indices_semantic(user_input: str, offers_vectorizer, semantic_index, processed_offers: list,
+                                     top_n=5, score_threshold: float = 0.5, allowed_offers=None) -> list:
+    """
+    recommend_offer_indices en mode sémantique : la requête TF-IDF est projetée dans l'espace LSA et comparée
+    aux offres des listes IVF les plus proches (voir semantic.SemanticIndex.search). Résultat approché.
+    """
+    query_vector = transform_text(offers_vectorizer, text_normalization(user_input))
+    top_indices = semantic_index.search(query_vector, top_n, score_threshold, allowed_offers)
+    return [i for i in top_indices.tolist() if processed_offers[i].get("location")]
 
-    return processed_offers, offers_vectorizer, processed_offer_vectors, combined_text_list
 
 
+def batch_top_k_indices(query_vectors, offer_vectors, top_n: int, score_threshold: float, allowed_offers=None) -> list:
+    """
+    top_k_indices pour chaque ligne de `query_vectors`, toutes les requêtes étant scorées
+    par un seul produit creux (offres x requêtes).
+    `allowed_offers` donne, pour chaque requête, le masque booléen des offres autorisées (ou None).
+    """
+    # Une colonne de scores par requête ; en CSC, chaque colonne liste ses offres par ordre croissant
+    scores = (offer_vectors @ query_vectors.T).tocsc()
+    scores.sort_indices()
+    allowed_offers = allowed_offers or [None] * query_vectors.shape[0]
+
+    results = []
+    for column, allowed in enumerate(allowed_offers):
+        if score_threshold > 0:
+            # Seules les offres de score non nul peuvent atteindre le seuil
+            start, end = scores.indptr[column], scores.indptr[column + 1]
+            offer_ids, column_scores = scores.indices[start:end], scores.data[start:end]
+            if allowed is not None:
+                kept = allowed[offer_ids]
+                offer_ids, column_scores = offer_ids[kept], column_scores[kept]
+            results.append(top_k_indices(column_scores, top_n, score_threshold, offer_ids))
+        else:
+            column_scores = scores[:, column].toarray().ravel()
+            if allowed is not None:
+                offer_ids = np.flatnonzero(allowed)
+                results.append(top_k_indices(column_scores[offer_ids], top_n, score_threshold, offer_ids))
+            else:
+                results.append(top_k_indices(column_scores, top_n, score_threshold))
+    return results
+
+
+
+def recommend_offer_indices_batch(user_inputs: list, offers_vectorizer, processed_offer_vectors, processed_offers: list,
+                                  top_n=5, score_threshold: float = 0.3, allowed_offers=None) -> list:
+    """
+    recommend_offer_indices pour plusieurs requêtes : toutes sont vectorisées dans une même matrice
+    et scorées par un seul produit creux, au lieu d'un parcours du corpus par requête.
+    `allowed_offers` : masque booléen des offres autorisées pour chaque requête (ou None).
+    Retourne une liste d'indices d'offres par requête, dans l'ordre des requêtes.
+    """
+    query_vectors = offers_vectorizer.transform([text_normalization(user_input) for user_input in user_inputs])
+    return [
+        [i for i in top_indices.tolist() if processed_offers[i].get("location")]
+        for top_indices in batch_top_k_indices(query_vectors, processed_offer_vectors, top_n, score_threshold,
+                                               allowed_offers)
+    ]
 
-def recommend_offers(user_input: str, offers_vectorizer, processed_offer_vectors, processed_offers: list, top_n=5, score_threshold: float = 0.3):
+
+
+def recommend_offers(user_input: str, offers_vectorizer, processed_offer_vectors, processed_offers: list, top_n=5, score_threshold: float = 0.3,
+                     inverted_index=None):
     """
     Génère une liste d'offres recommandées à partir d'une requête utilisateur.
 
     - La requête est vectorisée (TF-IDF) et comparée à l'ensemble des offres via similarité cosinus.
     - Seules les offres dépassant le seuil de similarité sont retenues, triées par score décroissant.
+    - Avec un index inversé, seules les offres contenant au moins un terme de la requête sont scorées
+      (les autres ont un score nul, donc sous tout seuil strictement positif).
 
     Args:
         user_input (str): Mot-clé de recherche fourni par l'utilisateur.
@@ -85,37 +233,22 @@ def recommend_offers(user_input: str, offers_vectorizer, processed_offer_vectors
         processed_offers (list): Liste des dictionnaires d'offres.
         top_n (int, optional): Nombre maximum d'offres à retourner. Défaut à 5.
         score_threshold (float, optional): Seuil minimal de similarité cosinus pour considérer une offre.
+        inverted_index (InvertedIndex, optional): Listes d'offres par terme de processed_offer_vectors.
 
     Returns:
         list: Liste des offres recommandées (dictionnaires).
     """
-    # Pré-traiter l'input utilisateur
-    user_input_normalized = text_normalization(user_input)
-    query_vector = transform_text(offers_vectorizer, user_input_normalized)
-    scores = compute_similarity(query_vector, processed_offer_vectors)
-
-    # On filtre uniquement les offres dont le score de similarité est au moins égal au seuil
-    scored_offers = [(i, score) for i, score in enumerate(scores) if score >= score_threshold]
-
-    # Trier par ordre décroissant de score
-    scored_offers.sort(key = lambda x: x[1], reverse = True)
-
-    # Extraire les indices pour les top n offres (si elles existent)
-    top_indices = [i for i, score in scored_offers][:top_n]
-
-    recommended_offers = [
+    return [
         processed_offers[i]
-        for i in top_indices
-        if processed_offers[i].get("location")  # ne garde que celles qui ont location non vide
+        for i in recommend_offer_indices(user_input, offers_vectorizer, processed_offer_vectors, processed_offers,
+                                         top_n, score_threshold, inverted_index)
     ]
 
-    return recommended_offers
-
 
 
 if __name__ == "__main__":
     # Utilisation du dossier processed_data défini via PROCESSED_DATA_DIR
-    offers, vectorizer, offer_vectors, texts = build_recommendation_engine_from_folder(PROCESSED_DATA_DIR)
+    offers, vectorizer, offer_vectors, descriptions = build_recommendation_engine_from_folder(PROCESSED_DATA_DIR)
 
     # Requête utilisateur
     user_query = input("Chercher un job par intitulé de poste : \n -> ")
@@ -126,4 +259,4 @@ if __name__ == "__main__":
 
     print("Offres recommandées :")
     for offer in recommendations:
-        print(offer)
+        print({**offer, "description": get_description(offer, descriptions)})
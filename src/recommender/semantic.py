@@ -0,0 +1,187 @@
+"""
+Mode sémantique de la recherche : projection LSA des vecteurs TF-IDF et recherche approchée des plus proches voisins.
+
+- Projection : TruncatedSVD réduit la matrice TF-IDF des offres (termes hachés, très large et creuse) à
+  RECOMMENDER_SEMANTIC_DIMENSIONS dimensions denses (float32). Elle n'est apprise que sur les colonnes
+  présentes dans le corpus ; une requête y est projetée par le même produit, puis normalisée (L2).
+- Index IVF : les plongements des offres sont répartis en RECOMMENDER_SEMANTIC_LISTS listes par k-means
+  (racine du nombre d'offres par défaut) et rangés liste par liste, de sorte que chaque liste est une tranche
+  contiguë du fichier projeté en mémoire. Une requête est comparée aux centroïdes, puis aux seules offres
+  des listes les plus proches (voir default_probes).
+
+L'index est construit par l'ETL avec l'index TF-IDF (RECOMMENDER_SEMANTIC_INDEX=1) et enregistré dans la
+même version (voir loader.py). Entre deux compactages de l'index TF-IDF, la projection et les centroïdes
+de la version précédente sont réutilisés : seules la projection des offres et leur répartition dans les
+listes sont recalculées. Les termes apparus depuis le dernier compactage sont ignorés par ce mode.
+"""
+
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+
+from recommender.recommender import top_k_indices
+
+
+SEMANTIC_INDEX_ENABLED = os.environ.get("RECOMMENDER_SEMANTIC_INDEX", "0") == "1"
+SEMANTIC_DIMENSIONS = int(os.environ.get("RECOMMENDER_SEMANTIC_DIMENSIONS", 256))
+# 0 : racine carrée du nombre d'offres
+SEMANTIC_LISTS = int(os.environ.get("RECOMMENDER_SEMANTIC_LISTS", 0))
+# Listes parcourues par requête ; 0 : assez de listes pour examiner RECOMMENDER_SEMANTIC_CANDIDATES offres.
+# Compromis rappel/latence (bench_semantic, rappel@10 par rapport à la recherche LSA exhaustive) :
+# 20 000 offres examinées donnent un rappel d'environ 0.9 sur 100k et 300k offres, pour une latence
+# 4 à 8 fois moindre que la recherche exhaustive. Un nombre fixe de listes perd en rappel quand le
+# corpus grandit (8 listes : 0.38 sur 5k offres). En deçà de ce nombre d'offres, toutes les listes
+# sont parcourues : la recherche exhaustive ne coûte que quelques millisecondes.
+SEMANTIC_PROBES = int(os.environ.get("RECOMMENDER_SEMANTIC_PROBES", 0))
+SEMANTIC_CANDIDATES = int(os.environ.get("RECOMMENDER_SEMANTIC_CANDIDATES", 20_000))
+
+# Offres échantillonnées par liste pour l'apprentissage du k-means
+KMEANS_SAMPLES_PER_LIST = 64
+# Offres réparties par bloc (produit plongements x centroïdes)
+ASSIGNMENT_CHUNK = 65_536
+
+SEMANTIC_ARRAYS = ("columns", "projection", "centroids", "list_offsets", "list_offers", "embeddings")
+
+
+def normalize_rows(embeddings):
+    """Normalise chaque ligne (L2) ; les lignes nulles restent nulles."""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.where(norms > 0, norms, 1).astype(embeddings.dtype)
+
+
+def restrict_columns(vectors, columns):
+    """Vecteurs TF-IDF (colonnes hachées) réduits aux colonnes `columns` (croissantes), en float32."""
+    vectors = csr_matrix(vectors)
+    positions = np.minimum(np.searchsorted(columns, vectors.indices), max(len(columns) - 1, 0))
+    kept = columns[positions] == vectors.indices if len(columns) else np.zeros(vectors.nnz, dtype=bool)
+    rows = np.repeat(np.arange(vectors.shape[0]), np.diff(vectors.indptr))
+    return csr_matrix(
+        (vectors.data[kept].astype(np.float32), (rows[kept], positions[kept])),
+        shape=(vectors.shape[0], len(columns)),
+    )
+
+
+def project(vectors, columns, projection):
+    """
+    Plongements normalisés (float32) de vecteurs TF-IDF.
+    `projection` (termes x dimensions) est contiguë par terme : le produit creux n'en lit que les lignes
+    des termes présents, sans transposition ni copie de la matrice.
+    """
+    return normalize_rows(np.asarray(restrict_columns(vectors, columns) @ projection, dtype=np.float32))
+
+
+def centroid_bias(centroids):
+    """Plus proche centroïde (distance euclidienne) : argmax de q.c - |c|² / 2."""
+    return -0.5 * np.einsum("ij,ij->i", centroids, centroids)
+
+
+def default_probes(lists: int, offers: int, candidates: int = SEMANTIC_CANDIDATES) -> int:
+    """Listes à parcourir pour examiner environ `candidates` offres (toutes si le corpus est plus petit)."""
+    if offers <= candidates:
+        return lists
+    return max(1, min(lists, int(np.ceil(lists * candidates / offers))))
+
+
+def assign_lists(embeddings, centroids):
+    """Liste (plus proche centroïde) de chaque plongement."""
+    bias = centroid_bias(centroids)
+    return np.concatenate([
+        np.argmax(embeddings[start:start + ASSIGNMENT_CHUNK] @ centroids.T + bias, axis=1)
+        for start in range(0, embeddings.shape[0], ASSIGNMENT_CHUNK)
+    ] or [np.empty(0, dtype=np.intp)])
+
+
+class SemanticIndex:
+    """Projection LSA et index IVF des offres (tableaux éventuellement projetés en mémoire)."""
+
+    def __init__(self, columns, projection, centroids, list_offsets, list_offers, embeddings,
+                 probes: int = SEMANTIC_PROBES):
+        self.columns = columns
+        self.projection = projection
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_offers = list_offers
+        self.embeddings = embeddings
+        self.probes = probes or default_probes(self.lists, len(list_offers))
+        self.centroid_bias = centroid_bias(centroids)
+
+    @property
+    def dimensions(self) -> int:
+        return self.projection.shape[1]
+
+    @property
+    def lists(self) -> int:
+        return self.centroids.shape[0]
+
+    def search(self, query_vector, top_n: int, score_threshold: float, allowed=None, probes: int = None):
+        """
+        Offres les plus proches d'une requête TF-IDF (similarité cosinus des plongements), par score décroissant.
+        Seules les listes des `probes` centroïdes les plus proches sont parcourues (toutes : recherche exacte).
+        `allowed` (masque booléen par offre) écarte les offres exclues par les filtres.
+        """
+        query = project(query_vector, self.columns, self.projection)[0]
+        if not query.any():
+            # Aucun terme de la requête dans la projection
+            return np.empty(0, dtype=np.intp)
+
+        probes = min(probes or self.probes, self.lists)
+        centroid_scores = self.centroids @ query + self.centroid_bias
+        probed = np.argpartition(-centroid_scores, probes - 1)[:probes]
+
+        offer_ids, scores = [], []
+        for list_id in probed:
+            start, end = self.list_offsets[list_id], self.list_offsets[list_id + 1]
+            # Tranche contiguë des plongements de la liste
+            offer_ids.append(np.asarray(self.list_offers[start:end]))
+            scores.append(self.embeddings[start:end] @ query)
+        offer_ids, scores = np.concatenate(offer_ids), np.concatenate(scores)
+        if allowed is not None:
+            kept = allowed[offer_ids]
+            offer_ids, scores = offer_ids[kept], scores[kept]
+        return top_k_indices(scores, top_n, score_threshold, offer_ids)
+
+
+def fit_projection(vectors, dimensions: int = SEMANTIC_DIMENSIONS):
+    """Apprend la projection LSA : (colonnes présentes dans le corpus, projection termes x dimensions en float32)."""
+    columns = np.unique(csr_matrix(vectors).indices)
+    restricted = restrict_columns(vectors, columns)
+    n_components = max(1, min(dimensions, restricted.shape[0] - 1, restricted.shape[1] - 1))
+    svd = TruncatedSVD(n_components=n_components, algorithm="randomized", random_state=0)
+    svd.fit(restricted)
+    return columns, np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+
+
+def fit_centroids(embeddings, lists: int = SEMANTIC_LISTS):
+    """Centroïdes des listes IVF (k-means sur un échantillon des plongements)."""
+    lists = lists or int(round(np.sqrt(embeddings.shape[0])))
+    lists = max(1, min(lists, embeddings.shape[0]))
+    rng = np.random.default_rng(0)
+    sample_size = min(embeddings.shape[0], lists * KMEANS_SAMPLES_PER_LIST)
+    sample = embeddings[np.sort(rng.choice(embeddings.shape[0], sample_size, replace=False))]
+    kmeans = MiniBatchKMeans(n_clusters=lists, n_init=1, batch_size=4096, random_state=0)
+    kmeans.fit(sample)
+    return kmeans.cluster_centers_.astype(np.float32)
+
+
+def build_semantic_index(vectors, previous: SemanticIndex = None) -> SemanticIndex:
+    """
+    Index sémantique des offres (lignes de `vectors`).
+
+    :param previous: Index de la version précédente dont la projection et les centroïdes sont réutilisés,
+                     ou None pour les apprendre.
+    """
+    if previous is None:
+        columns, projection = fit_projection(vectors)
+    else:
+        columns, projection = np.asarray(previous.columns), np.asarray(previous.projection)
+    embeddings = project(vectors, columns, projection)
+    centroids = fit_centroids(embeddings) if previous is None else np.asarray(previous.centroids)
+    assignments = assign_lists(embeddings, centroids)
+
+    # Offres rangées liste par liste (ordre du corpus au sein d'une liste)
+    list_offers = np.argsort(assignments, kind="stable")
+    list_offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=centroids.shape[0]))))
+    return SemanticIndex(columns, projection, centroids, list_offsets, list_offers, embeddings[list_offers])
@@ -3,7 +3,7 @@
 echo "🚀 Initialisation personnalisée..."
 
 SQL_DIR="/src/sql"
-FILES=("schema.sql" "indexes.sql" "triggers.sql")
+FILES=("schema.sql" "indexes.sql" "triggers.sql" "views.sql")
 
 for file in "${FILES[@]}"; do
   path="$SQL_DIR/$file"
@@ -6,19 +6,12 @@ CREATE INDEX idx_job_offers_location ON job_offers(location_id);
 -- Index sur created_at pour optimiser les tris et recherches par date
 CREATE INDEX idx_job_offers_created_at ON job_offers(created_at DESC);
 
--- Index full-text pour la recherche avancée sur les titres et descriptions
+-- Modèle de lecture offer_search : recherche plein texte (titre et description pondérés)
+-- et filtres courants. Remplace les index GIN par table de source, calculés à chaque écriture.
+CREATE INDEX idx_offer_search_vector ON offer_search USING GIN (search_vector);
+CREATE INDEX idx_offer_search_status_created_at ON offer_search(status, created_at DESC);
+CREATE INDEX idx_offer_search_salary ON offer_search(salary_min, salary_max);
+CREATE INDEX idx_offer_search_code_postal ON offer_search(code_postal);
 
--- Adzuna
-CREATE INDEX idx_title_search_adzuna ON adzuna_offers USING GIN (to_tsvector('french', title));
-CREATE INDEX idx_description_search_adzuna ON adzuna_offers USING GIN (to_tsvector('french', description));
-
--- France Travail
-CREATE INDEX idx_title_search_france_travail ON france_travail_offers USING GIN (to_tsvector('french', title));
-CREATE INDEX idx_description_search_france_travail ON france_travail_offers USING GIN (to_tsvector('french', description));
-
--- JSearch
-CREATE INDEX idx_title_search_jsearch ON jsearch_offers USING GIN (to_tsvector('french', title));
-CREATE INDEX idx_description_search_jsearch ON jsearch_offers USING GIN (to_tsvector('french', description));
-
--- Logs
-CREATE INDEX idx_job_id_logs_ ON job_offers_log(job_id)
\ No newline at end of file
+-- Logs : index partitionné (créé sur chaque partition), historique d'une offre par action
+CREATE INDEX idx_job_offers_log_job_action ON job_offers_log(job_id, action);
\ No newline at end of file
@@ -0,0 +1,43 @@
+-- Migration 001 : clé naturelle unique sur locations (location, code_postal, country).
+--
+-- Les chargements parallèles pouvaient créer plusieurs lignes pour la même localisation.
+-- Les doublons sont fusionnés sur la plus ancienne (plus petit location_id) : les offres
+-- sont rattachées à celle-ci, puis les doublons supprimés et la contrainte ajoutée.
+--
+-- Exécution : psql -U "$JOBS_POSTGRES_USER" -d "$JOBS_POSTGRES_DB" -f src/sql/migrations/001_locations_natural_key.sql
+
+BEGIN;
+
+-- Le rattachement des offres n'est pas une mise à jour métier : pas de journalisation
+ALTER TABLE job_offers DISABLE TRIGGER USER;
+
+CREATE TEMP TABLE location_duplicates ON COMMIT DROP AS
+SELECT location_id, keeper_id
+  FROM (
+        SELECT location_id,
+               min(location_id) OVER (PARTITION BY location, code_postal, country) AS keeper_id
+          FROM locations
+       ) ranked
+ WHERE location_id <> keeper_id;
+
+UPDATE job_offers j
+   SET location_id = d.keeper_id
+  FROM location_duplicates d
+ WHERE j.location_id = d.location_id;
+
+DELETE FROM locations l
+ USING location_duplicates d
+ WHERE l.location_id = d.location_id;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'unique_location') THEN
+        ALTER TABLE locations
+            ADD CONSTRAINT unique_location UNIQUE NULLS NOT DISTINCT (location, code_postal, country) INCLUDE (location_id);
+    END IF;
+END
+$$;
+
+ALTER TABLE job_offers ENABLE TRIGGER USER;
+
+COMMIT;
@@ -0,0 +1,47 @@
+-- Migration 002 : empreinte du contenu des offres (job_offers et tables par source).
+--
+-- Le chargement ne réécrit plus une offre inchangée : seules les offres nouvelles, modifiées
+-- ou réactivées sont écrites, et donc journalisées dans job_offers_log.
+-- L'ajout des colonnes générées réécrit les tables concernées (verrou exclusif le temps de la migration).
+--
+-- Exécution : psql -U "$JOBS_POSTGRES_USER" -d "$JOBS_POSTGRES_DB" -f src/sql/migrations/002_offer_content_hash.sql
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION job_offer_content_hash(
+    company_id INT, location_id INT, salary_min INT, salary_max INT, created_at TIMESTAMP
+) RETURNS UUID
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT md5(ROW(company_id, location_id, salary_min, salary_max, extract(epoch FROM created_at))::text)::uuid;
+$$;
+
+CREATE OR REPLACE FUNCTION offer_detail_content_hash(
+    title TEXT, contract_type TEXT, sector TEXT, description TEXT, apply_url TEXT
+) RETURNS UUID
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT md5(ROW(title, contract_type, sector, description, apply_url)::text)::uuid;
+$$;
+
+ALTER TABLE job_offers
+    ADD COLUMN IF NOT EXISTS content_hash UUID GENERATED ALWAYS AS (
+        job_offer_content_hash(company_id, location_id, salary_min, salary_max, created_at)
+    ) STORED;
+
+ALTER TABLE adzuna_offers
+    ADD COLUMN IF NOT EXISTS content_hash UUID GENERATED ALWAYS AS (
+        offer_detail_content_hash(title, contract_type, sector, description, apply_url)
+    ) STORED;
+
+ALTER TABLE france_travail_offers
+    ADD COLUMN IF NOT EXISTS content_hash UUID GENERATED ALWAYS AS (
+        offer_detail_content_hash(title, contract_type, sector, description, apply_url)
+    ) STORED;
+
+ALTER TABLE jsearch_offers
+    ADD COLUMN IF NOT EXISTS content_hash UUID GENERATED ALWAYS AS (
+        offer_detail_content_hash(title, contract_type, sector, description, apply_url)
+    ) STORED;
+
+COMMIT;
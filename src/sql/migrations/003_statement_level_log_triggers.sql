@@ -0,0 +1,59 @@
+-- Migration 003 : journalisation de job_offers par instruction (tables de transition).
+--
+-- Remplace le déclencheur ligne par ligne trg_job_offers_changes par trg_job_offers_inserts
+-- et trg_job_offers_updates (mêmes actions : insert_job_offers, update_job_offers, delete_job_offers).
+-- Contenu identique à src/sql/triggers.sql.
+--
+-- Exécution : psql -U "$JOBS_POSTGRES_USER" -d "$JOBS_POSTGRES_DB" -f src/sql/migrations/003_statement_level_log_triggers.sql
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION log_job_offers_inserts()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO job_offers_log (job_id, action, created_at)
+    SELECT job_id, 'insert_job_offers', created_at
+      FROM new_rows;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION log_job_offers_updates()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO job_offers_log (job_id, action, created_at, updated_at, deleted_at)
+    SELECT o.job_id,
+           -- 1) Si on désactive l'offre (status passe d'active à inactive) : suppression
+           -- 2) Sinon, c'est un update classique
+           CASE WHEN o.status = 'active' AND n.status = 'inactive'
+                THEN 'delete_job_offers' ELSE 'update_job_offers' END,
+           o.created_at,
+           CASE WHEN o.status = 'active' AND n.status = 'inactive' THEN NULL ELSE NOW() END,
+           CASE WHEN o.status = 'active' AND n.status = 'inactive' THEN NOW() END
+      FROM old_rows o
+      JOIN new_rows n ON n.job_id = o.job_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Ancien déclencheur ligne par ligne
+DROP TRIGGER IF EXISTS trg_job_offers_changes ON job_offers;
+DROP FUNCTION IF EXISTS log_job_offers_changes();
+
+DROP TRIGGER IF EXISTS trg_job_offers_inserts ON job_offers;
+CREATE TRIGGER trg_job_offers_inserts
+AFTER INSERT ON job_offers
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION log_job_offers_inserts();
+
+DROP TRIGGER IF EXISTS trg_job_offers_updates ON job_offers;
+CREATE TRIGGER trg_job_offers_updates
+AFTER UPDATE ON job_offers
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION log_job_offers_updates();
+
+COMMIT;
@@ -0,0 +1,11 @@
+-- Migration 004 : points de reprise du chargement (load_checkpoints).
+--
+-- Exécution : psql -U "$JOBS_POSTGRES_USER" -d "$JOBS_POSTGRES_DB" -f src/sql/migrations/004_load_checkpoints.sql
+
+CREATE TABLE IF NOT EXISTS load_checkpoints (
+    snapshot_id TEXT PRIMARY KEY,     -- nom du fichier transformé
+    last_batch INT NOT NULL,          -- numéro du dernier lot validé (à partir de 0)
+    batch_size INT NOT NULL,
+    loaded_offers INT NOT NULL,       -- offres du fichier déjà chargées (reprise à partir de la suivante)
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,109 @@
+-- Migration 005 : modèle de lecture dénormalisé offer_search.
+--
+-- Crée la table et ses index, la remplit à partir des tables existantes (les chargements suivants
+-- la synchronisent), supprime les index GIN par table de source et corrige
+-- vw_job_offers_desc_country (Adzuna manquant, France Travail compté deux fois).
+--
+-- Exécution : psql -U "$JOBS_POSTGRES_USER" -d "$JOBS_POSTGRES_DB" -f src/sql/migrations/005_offer_search.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS offer_search (
+    job_id INT PRIMARY KEY REFERENCES job_offers(job_id) ON DELETE CASCADE,
+    source VARCHAR(50) NOT NULL,
+    external_id VARCHAR(255) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    company VARCHAR(255),
+    location VARCHAR(255),
+    code_postal VARCHAR(10),
+    country VARCHAR(255),
+    contract_type VARCHAR(50),
+    sector VARCHAR(255),
+    salary_min INT,
+    salary_max INT,
+    created_at TIMESTAMP NOT NULL,
+    status TEXT,
+    description TEXT,
+    apply_url TEXT,
+    -- Empreintes des lignes sources lors de la dernière synchronisation
+    job_hash UUID,
+    detail_hash UUID,
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('french', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('french', coalesce(description, '')), 'B')
+    ) STORED
+);
+
+CREATE INDEX IF NOT EXISTS idx_offer_search_vector ON offer_search USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_offer_search_status_created_at ON offer_search(status, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_offer_search_salary ON offer_search(salary_min, salary_max);
+CREATE INDEX IF NOT EXISTS idx_offer_search_code_postal ON offer_search(code_postal);
+
+-- Remplissage initial (même requête que pipelines/read_models.py)
+INSERT INTO offer_search (
+    job_id, source, external_id, title, company, location, code_postal, country,
+    contract_type, sector, salary_min, salary_max, created_at, status, description, apply_url,
+    job_hash, detail_hash
+)
+SELECT j.job_id, s.name, j.external_id, d.title, c.name, l.location, l.code_postal, l.country,
+       d.contract_type, d.sector, j.salary_min, j.salary_max, j.created_at, j.status, d.description, d.apply_url,
+       j.content_hash, d.content_hash
+  FROM job_offers j
+  JOIN sources s ON s.source_id = j.source_id
+  JOIN (
+        SELECT job_id, title, contract_type, sector, description, apply_url, content_hash FROM adzuna_offers
+        UNION ALL
+        SELECT job_id, title, contract_type, sector, description, apply_url, content_hash FROM france_travail_offers
+        UNION ALL
+        SELECT job_id, title, contract_type, sector, description, apply_url, content_hash FROM jsearch_offers
+       ) d ON d.job_id = j.job_id
+  LEFT JOIN companies c ON c.company_id = j.company_id
+  LEFT JOIN locations l ON l.location_id = j.location_id
+  LEFT JOIN offer_search o ON o.job_id = j.job_id
+ WHERE o.job_id IS NULL
+    OR o.job_hash IS DISTINCT FROM j.content_hash
+    OR o.detail_hash IS DISTINCT FROM d.content_hash
+    OR o.status IS DISTINCT FROM j.status
+ON CONFLICT (job_id) DO UPDATE SET
+    source = EXCLUDED.source,
+    external_id = EXCLUDED.external_id,
+    title = EXCLUDED.title,
+    company = EXCLUDED.company,
+    location = EXCLUDED.location,
+    code_postal = EXCLUDED.code_postal,
+    country = EXCLUDED.country,
+    contract_type = EXCLUDED.contract_type,
+    sector = EXCLUDED.sector,
+    salary_min = EXCLUDED.salary_min,
+    salary_max = EXCLUDED.salary_max,
+    created_at = EXCLUDED.created_at,
+    status = EXCLUDED.status,
+    description = EXCLUDED.description,
+    apply_url = EXCLUDED.apply_url,
+    job_hash = EXCLUDED.job_hash,
+    detail_hash = EXCLUDED.detail_hash;
+
+DROP INDEX IF EXISTS idx_title_search_adzuna;
+DROP INDEX IF EXISTS idx_description_search_adzuna;
+DROP INDEX IF EXISTS idx_title_search_france_travail;
+DROP INDEX IF EXISTS idx_description_search_france_travail;
+DROP INDEX IF EXISTS idx_title_search_jsearch;
+DROP INDEX IF EXISTS idx_description_search_jsearch;
+
+CREATE OR REPLACE VIEW vw_job_offers_desc_country AS
+SELECT
+    j.job_id,
+    j.external_id,
+    l.country,
+    spec.description
+FROM job_offers j
+LEFT JOIN locations l ON j.location_id = l.location_id
+LEFT JOIN (
+    SELECT job_id, description FROM adzuna_offers
+    UNION ALL
+    SELECT job_id, description FROM france_travail_offers
+    UNION ALL
+    SELECT job_id, description FROM jsearch_offers
+) spec ON j.job_id = spec.job_id;
+
+COMMIT;
@@ -0,0 +1,65 @@
+-- Migration 006 : agrégats matérialisés des tableaux de bord (mv_offer_rollups).
+--
+-- Crée la vue matérialisée et son index unique (nécessaire au rafraîchissement CONCURRENTLY),
+-- puis redéfinit vw_job_offers_summary, vw_offers_by_source et vw_offers_by_day pour les lire
+-- depuis offer_search et mv_offer_rollups. Nécessite la migration 005 (offer_search).
+--
+-- Exécution : psql -U "$JOBS_POSTGRES_USER" -d "$JOBS_POSTGRES_DB" -f src/sql/migrations/006_offer_rollups.sql
+
+BEGIN;
+
+-- Agrégats pré-calculés pour les tableaux de bord : offres par source, jour, statut et département.
+-- Rafraîchie (REFRESH ... CONCURRENTLY, sans bloquer les lectures) par le chargement et la
+-- désactivation des offres ; les lectures ne dépendent que du nombre de combinaisons, pas de l'historique.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_offer_rollups AS
+SELECT
+    source,
+    created_at::date AS day,
+    coalesce(status, '') AS status,
+    -- Département : deux premiers chiffres du code postal, trois pour l'outre-mer (97x)
+    coalesce(
+        CASE WHEN code_postal LIKE '97%' THEN left(code_postal, 3) ELSE left(code_postal, 2) END,
+        ''
+    ) AS department,
+    COUNT(*) AS offers_count
+FROM offer_search
+GROUP BY 1, 2, 3, 4;
+
+-- Index unique requis par REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_offer_rollups_key ON mv_offer_rollups(source, day, status, department);
+
+
+CREATE OR REPLACE VIEW vw_job_offers_summary AS
+SELECT
+    status,
+    job_id,
+    external_id,
+    source,
+    company,
+    location,
+    code_postal,
+    country,
+    salary_min,
+    salary_max,
+    created_at
+FROM offer_search;
+
+
+CREATE OR REPLACE VIEW vw_offers_by_source AS
+SELECT
+    source,
+    SUM(offers_count)::BIGINT AS offers_count
+FROM mv_offer_rollups
+GROUP BY source
+ORDER BY offers_count DESC;
+
+
+CREATE OR REPLACE VIEW vw_offers_by_day AS
+SELECT
+    day::TIMESTAMP AS day,
+    SUM(offers_count)::BIGINT AS offers_count
+FROM mv_offer_rollups
+GROUP BY day
+ORDER BY day;
+
+COMMIT;
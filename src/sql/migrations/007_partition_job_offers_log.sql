@@ -0,0 +1,117 @@
+-- Migration 007 : partitionnement mensuel de job_offers_log.
+--
+-- La table existante est renommée, la table partitionnée créée (partition par défaut et
+-- partitions mensuelles depuis le plus ancien log jusqu'à 3 mois après le mois courant),
+-- les logs recopiés puis l'ancienne table supprimée. Les identifiants log_id sont conservés.
+-- À exécuter hors chargement (verrou exclusif sur job_offers_log le temps de la copie).
+--
+-- Exécution : psql -U "$JOBS_POSTGRES_USER" -d "$JOBS_POSTGRES_DB" -f src/sql/migrations/007_partition_job_offers_log.sql
+
+BEGIN;
+
+ALTER TABLE job_offers_log RENAME TO job_offers_log_legacy;
+ALTER INDEX job_offers_log_pkey RENAME TO job_offers_log_legacy_pkey;
+ALTER SEQUENCE job_offers_log_log_id_seq RENAME TO job_offers_log_legacy_log_id_seq;
+DROP INDEX IF EXISTS idx_job_id_logs_;
+
+CREATE TABLE job_offers_log (
+    log_id SERIAL,
+    job_id INT REFERENCES job_offers(job_id) ON DELETE CASCADE,
+    action VARCHAR(255) NOT NULL,  -- 'insert', 'update', 'delete'
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP,
+    deleted_at TIMESTAMP,
+    log_timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (log_id, log_timestamp)
+) PARTITION BY RANGE (log_timestamp);
+
+CREATE TABLE job_offers_log_default PARTITION OF job_offers_log DEFAULT;
+
+-- Crée les partitions mensuelles de from_month (mois courant par défaut) jusqu'à months_ahead mois
+-- après le mois courant. Les lignes d'un mois déjà présentes dans la partition par défaut y sont déplacées.
+-- Retourne le nombre de partitions créées.
+CREATE OR REPLACE FUNCTION create_job_offers_log_partitions(months_ahead INT DEFAULT 3, from_month DATE DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', coalesce(from_month, now()))::date;
+    last_month DATE := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+    month_end DATE;
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        month_end := (month_start + INTERVAL '1 month')::date;
+        partition_name := format('job_offers_log_%s', to_char(month_start, 'YYYYMM'));
+
+        IF to_regclass(partition_name) IS NULL THEN
+            IF EXISTS (
+                SELECT 1 FROM job_offers_log_default
+                 WHERE log_timestamp >= month_start AND log_timestamp < month_end
+            ) THEN
+                EXECUTE format('CREATE TABLE %I (LIKE job_offers_log INCLUDING DEFAULTS)', partition_name);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM job_offers_log_default WHERE log_timestamp >= %L AND log_timestamp < %L RETURNING *)
+                     INSERT INTO %I SELECT * FROM moved',
+                    month_start, month_end, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE job_offers_log ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF job_offers_log FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            END IF;
+            created := created + 1;
+        END IF;
+
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Supprime les partitions mensuelles antérieures aux retention_months derniers mois (mois courant inclus).
+-- Retourne le nombre de partitions supprimées.
+CREATE OR REPLACE FUNCTION drop_job_offers_log_partitions(retention_months INT)
+RETURNS INT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', now()) - make_interval(months => retention_months - 1))::date;
+    partition_name TEXT;
+    dropped INT := 0;
+BEGIN
+    FOR partition_name IN
+        SELECT c.relname
+          FROM pg_inherits i
+          JOIN pg_class c ON c.oid = i.inhrelid
+         WHERE i.inhparent = 'job_offers_log'::regclass
+           AND c.relname ~ '^job_offers_log_[0-9]{6}$'
+    LOOP
+        IF to_date(right(partition_name, 6), 'YYYYMM') < cutoff THEN
+            EXECUTE format('DROP TABLE %I', partition_name);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE INDEX idx_job_offers_log_job_action ON job_offers_log(job_id, action);
+
+SELECT create_job_offers_log_partitions(3, (SELECT min(log_timestamp)::date FROM job_offers_log_legacy));
+
+INSERT INTO job_offers_log (log_id, job_id, action, created_at, updated_at, deleted_at, log_timestamp)
+SELECT log_id, job_id, action, created_at, updated_at, deleted_at, log_timestamp
+  FROM job_offers_log_legacy;
+
+SELECT setval(
+    pg_get_serial_sequence('job_offers_log', 'log_id'),
+    coalesce((SELECT max(log_id) FROM job_offers_log), 0) + 1,
+    false
+);
+
+DROP TABLE job_offers_log_legacy;
+
+COMMIT;
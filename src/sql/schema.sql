@@ -1,5 +1,25 @@
 DROP TABLE IF EXISTS job_offers_log CASCADE;
 
+-- Empreintes du contenu des offres (md5 sur 16 octets, stockée en UUID).
+-- Colonnes générées dans les tables : le chargement compare l'empreinte stockée à celle des
+-- nouvelles valeurs et n'écrit que les offres réellement modifiées (ON CONFLICT ... WHERE).
+CREATE OR REPLACE FUNCTION job_offer_content_hash(
+    company_id INT, location_id INT, salary_min INT, salary_max INT, created_at TIMESTAMP
+) RETURNS UUID
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    -- epoch plutôt que le texte du timestamp, qui dépend de DateStyle
+    SELECT md5(ROW(company_id, location_id, salary_min, salary_max, extract(epoch FROM created_at))::text)::uuid;
+$$;
+
+CREATE OR REPLACE FUNCTION offer_detail_content_hash(
+    title TEXT, contract_type TEXT, sector TEXT, description TEXT, apply_url TEXT
+) RETURNS UUID
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT md5(ROW(title, contract_type, sector, description, apply_url)::text)::uuid;
+$$;
+
 -- Création de la table des sources
 CREATE TABLE sources (
     source_id SERIAL PRIMARY KEY,
@@ -19,7 +39,9 @@ CREATE TABLE locations (
     code_postal VARCHAR(10),
     longitude DOUBLE PRECISION,
     latitude DOUBLE PRECISION,
-    country VARCHAR(255)
+    country VARCHAR(255),
+    -- Clé naturelle (NULL compris) ; index couvrant : l'ID est lu sans accès à la table
+    CONSTRAINT unique_location UNIQUE NULLS NOT DISTINCT (location, code_postal, country) INCLUDE (location_id)
 );
 
 -- Création de la table principale des offres d'emploi
@@ -33,6 +55,9 @@ CREATE TABLE job_offers (
     salary_max INT,
     created_at TIMESTAMP NOT NULL,
     status TEXT,
+    content_hash UUID GENERATED ALWAYS AS (
+        job_offer_content_hash(company_id, location_id, salary_min, salary_max, created_at)
+    ) STORED,
     CONSTRAINT unique_external_source UNIQUE (external_id, source_id)
 );
 
@@ -43,7 +68,10 @@ CREATE TABLE adzuna_offers (
     contract_type VARCHAR(50),
     sector VARCHAR(255),
     description TEXT,
-    apply_url TEXT
+    apply_url TEXT,
+    content_hash UUID GENERATED ALWAYS AS (
+        offer_detail_content_hash(title, contract_type, sector, description, apply_url)
+    ) STORED
 );
 
 -- Table spécifique pour France Travail
@@ -53,7 +81,10 @@ CREATE TABLE france_travail_offers (
     contract_type VARCHAR(50),
     sector VARCHAR(255),
     description TEXT,
-    apply_url TEXT
+    apply_url TEXT,
+    content_hash UUID GENERATED ALWAYS AS (
+        offer_detail_content_hash(title, contract_type, sector, description, apply_url)
+    ) STORED
 );
 
 -- Table spécifique pour JSearch
@@ -63,16 +94,159 @@ CREATE TABLE jsearch_offers (
     contract_type VARCHAR(50),
     sector VARCHAR(255),
     description TEXT,
-    apply_url TEXT
+    apply_url TEXT,
+    content_hash UUID GENERATED ALWAYS AS (
+        offer_detail_content_hash(title, contract_type, sector, description, apply_url)
+    ) STORED
 );
 
--- Table spécifique aux logs
+-- Modèle de lecture dénormalisé pour la recherche et le reporting : une ligne par offre
+-- (job_offers, dimensions et table spécifique à la source), synchronisée par le chargement.
+-- search_vector pondère le titre (A) et la description (B).
+CREATE TABLE offer_search (
+    job_id INT PRIMARY KEY REFERENCES job_offers(job_id) ON DELETE CASCADE,
+    source VARCHAR(50) NOT NULL,
+    external_id VARCHAR(255) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    company VARCHAR(255),
+    location VARCHAR(255),
+    code_postal VARCHAR(10),
+    country VARCHAR(255),
+    contract_type VARCHAR(50),
+    sector VARCHAR(255),
+    salary_min INT,
+    salary_max INT,
+    created_at TIMESTAMP NOT NULL,
+    status TEXT,
+    description TEXT,
+    apply_url TEXT,
+    -- Empreintes des lignes sources lors de la dernière synchronisation
+    job_hash UUID,
+    detail_hash UUID,
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('french', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('french', coalesce(description, '')), 'B')
+    ) STORED
+);
+
+-- Table spécifique aux logs, partitionnée par mois sur log_timestamp.
+-- Les partitions mensuelles (job_offers_log_AAAAMM) sont créées à l'avance et les plus anciennes
+-- supprimées par la maintenance (pipelines/maintenance.py) ; la partition par défaut reçoit
+-- les lignes hors des mois créés.
 CREATE TABLE job_offers_log (
-    log_id SERIAL PRIMARY KEY,
+    log_id SERIAL,
     job_id INT REFERENCES job_offers(job_id) ON DELETE CASCADE,
     action VARCHAR(255) NOT NULL,  -- 'insert', 'update', 'delete'
     created_at TIMESTAMP NOT NULL,
     updated_at TIMESTAMP,
     deleted_at TIMESTAMP,
-    log_timestamp TIMESTAMP NOT NULL DEFAULT NOW()
+    log_timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (log_id, log_timestamp)
+) PARTITION BY RANGE (log_timestamp);
+
+CREATE TABLE job_offers_log_default PARTITION OF job_offers_log DEFAULT;
+
+-- Crée les partitions mensuelles de from_month (mois courant par défaut) jusqu'à months_ahead mois
+-- après le mois courant. Les lignes d'un mois déjà présentes dans la partition par défaut y sont déplacées.
+-- Retourne le nombre de partitions créées.
+CREATE OR REPLACE FUNCTION create_job_offers_log_partitions(months_ahead INT DEFAULT 3, from_month DATE DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', coalesce(from_month, now()))::date;
+    last_month DATE := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+    month_end DATE;
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        month_end := (month_start + INTERVAL '1 month')::date;
+        partition_name := format('job_offers_log_%s', to_char(month_start, 'YYYYMM'));
+
+        IF to_regclass(partition_name) IS NULL THEN
+            IF EXISTS (
+                SELECT 1 FROM job_offers_log_default
+                 WHERE log_timestamp >= month_start AND log_timestamp < month_end
+            ) THEN
+                EXECUTE format('CREATE TABLE %I (LIKE job_offers_log INCLUDING DEFAULTS)', partition_name);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM job_offers_log_default WHERE log_timestamp >= %L AND log_timestamp < %L RETURNING *)
+                     INSERT INTO %I SELECT * FROM moved',
+                    month_start, month_end, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE job_offers_log ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF job_offers_log FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            END IF;
+            created := created + 1;
+        END IF;
+
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Supprime les partitions mensuelles antérieures aux retention_months derniers mois (mois courant inclus).
+-- Retourne le nombre de partitions supprimées.
+CREATE OR REPLACE FUNCTION drop_job_offers_log_partitions(retention_months INT)
+RETURNS INT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', now()) - make_interval(months => retention_months - 1))::date;
+    partition_name TEXT;
+    dropped INT := 0;
+BEGIN
+    FOR partition_name IN
+        SELECT c.relname
+          FROM pg_inherits i
+          JOIN pg_class c ON c.oid = i.inhrelid
+         WHERE i.inhparent = 'job_offers_log'::regclass
+           AND c.relname ~ '^job_offers_log_[0-9]{6}$'
+    LOOP
+        IF to_date(right(partition_name, 6), 'YYYYMM') < cutoff THEN
+            EXECUTE format('DROP TABLE %I', partition_name);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_job_offers_log_partitions();
+
+
+-- Table de transit du chargement en masse (COPY), vidée à chaque chargement.
+-- UNLOGGED : pas d'écriture dans le WAL, son contenu n'a pas à survivre à un arrêt brutal.
+CREATE UNLOGGED TABLE IF NOT EXISTS staging_job_offers (
+    position INT NOT NULL,  -- rang de l'offre dans le fichier transformé
+    source TEXT,
+    external_id TEXT,
+    title TEXT,
+    company TEXT,
+    location TEXT,
+    code_postal TEXT,
+    longitude DOUBLE PRECISION,
+    latitude DOUBLE PRECISION,
+    country TEXT,
+    salary_min DOUBLE PRECISION,
+    salary_max DOUBLE PRECISION,
+    created_at TEXT,
+    contract_type TEXT,
+    sector TEXT,
+    description TEXT,
+    apply_url TEXT
+);
+
+-- Points de reprise du chargement : dernier lot validé par fichier transformé (supprimé en fin de chargement)
+CREATE TABLE IF NOT EXISTS load_checkpoints (
+    snapshot_id TEXT PRIMARY KEY,     -- nom du fichier transformé
+    last_batch INT NOT NULL,          -- numéro du dernier lot validé (à partir de 0)
+    batch_size INT NOT NULL,
+    loaded_offers INT NOT NULL,       -- offres du fichier déjà chargées (reprise à partir de la suivante)
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
 );
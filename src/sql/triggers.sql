@@ -1,45 +1,53 @@
-CREATE OR REPLACE FUNCTION log_job_offers_changes()
+-- Journalisation des changements de job_offers dans job_offers_log.
+-- Déclencheurs par instruction (FOR EACH STATEMENT) avec tables de transition : un chargement
+-- en masse de N offres produit un seul INSERT ensembliste dans le journal, et non N appels PL/pgSQL.
+-- PostgreSQL n'accepte les tables de transition que sur un seul événement : un déclencheur par événement.
+-- Pour un INSERT ... ON CONFLICT DO UPDATE, chacun ne voit que les lignes réellement insérées ou modifiées.
+
+CREATE OR REPLACE FUNCTION log_job_offers_inserts()
 RETURNS trigger AS $$
 BEGIN
-    IF TG_OP = 'INSERT' THEN
-        INSERT INTO job_offers_log (job_id, action, created_at)
-        VALUES (NEW.job_id, 'insert_job_offers', NEW.created_at);
-        RETURN NEW;
-
-    ELSIF TG_OP = 'UPDATE' THEN
-        -- 1) Si on désactive l'offre (status passe d'active à inactive) :
-        IF OLD.status = 'active' AND NEW.status = 'inactive' THEN
-            INSERT INTO job_offers_log (
-                job_id, action, created_at, deleted_at
-            )
-            VALUES (
-                OLD.job_id,
-                'delete_job_offers',
-                OLD.created_at,
-                NOW()
-            );
-        -- 2) Sinon, c'est un update classique :
-        ELSE
-            INSERT INTO job_offers_log (
-                job_id, action, created_at, updated_at
-            )
-            VALUES (
-                OLD.job_id,
-                'update_job_offers',
-                OLD.created_at,
-                NOW()
-            );
-        END IF;
-
-        RETURN NEW;
-    END IF;
+    INSERT INTO job_offers_log (job_id, action, created_at)
+    SELECT job_id, 'insert_job_offers', created_at
+      FROM new_rows;
 
     RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
 
+CREATE OR REPLACE FUNCTION log_job_offers_updates()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO job_offers_log (job_id, action, created_at, updated_at, deleted_at)
+    SELECT o.job_id,
+           -- 1) Si on désactive l'offre (status passe d'active à inactive) : suppression
+           -- 2) Sinon, c'est un update classique
+           CASE WHEN o.status = 'active' AND n.status = 'inactive'
+                THEN 'delete_job_offers' ELSE 'update_job_offers' END,
+           o.created_at,
+           CASE WHEN o.status = 'active' AND n.status = 'inactive' THEN NULL ELSE NOW() END,
+           CASE WHEN o.status = 'active' AND n.status = 'inactive' THEN NOW() END
+      FROM old_rows o
+      JOIN new_rows n ON n.job_id = o.job_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Ancien déclencheur ligne par ligne
 DROP TRIGGER IF EXISTS trg_job_offers_changes ON job_offers;
-CREATE TRIGGER trg_job_offers_changes
-AFTER INSERT OR UPDATE ON job_offers
-FOR EACH ROW EXECUTE FUNCTION log_job_offers_changes();
+DROP FUNCTION IF EXISTS log_job_offers_changes();
+
+DROP TRIGGER IF EXISTS trg_job_offers_inserts ON job_offers;
+CREATE TRIGGER trg_job_offers_inserts
+AFTER INSERT ON job_offers
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION log_job_offers_inserts();
+
+DROP TRIGGER IF EXISTS trg_job_offers_updates ON job_offers;
+CREATE TRIGGER trg_job_offers_updates
+AFTER UPDATE ON job_offers
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION log_job_offers_updates();
@@ -1,37 +1,54 @@
+-- Agrégats pré-calculés pour les tableaux de bord : offres par source, jour, statut et département.
+-- Rafraîchie (REFRESH ... CONCURRENTLY, sans bloquer les lectures) par le chargement et la
+-- désactivation des offres ; les lectures ne dépendent que du nombre de combinaisons, pas de l'historique.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_offer_rollups AS
+SELECT
+    source,
+    created_at::date AS day,
+    coalesce(status, '') AS status,
+    -- Département : deux premiers chiffres du code postal, trois pour l'outre-mer (97x)
+    coalesce(
+        CASE WHEN code_postal LIKE '97%' THEN left(code_postal, 3) ELSE left(code_postal, 2) END,
+        ''
+    ) AS department,
+    COUNT(*) AS offers_count
+FROM offer_search
+GROUP BY 1, 2, 3, 4;
+
+-- Index unique requis par REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_offer_rollups_key ON mv_offer_rollups(source, day, status, department);
+
+
 CREATE OR REPLACE VIEW vw_job_offers_summary AS
 SELECT
-    j.status,
-    j.job_id,
-    j.external_id,
-    s.name AS source,
-    c.name AS company,
-    l.location,
-    l.code_postal,
-    l.country,
-    j.salary_min,
-    j.salary_max,
-    j.created_at
-FROM job_offers j
-LEFT JOIN sources s ON j.source_id = s.source_id
-LEFT JOIN companies c ON j.company_id = c.company_id
-LEFT JOIN locations l ON j.location_id = l.location_id;
+    status,
+    job_id,
+    external_id,
+    source,
+    company,
+    location,
+    code_postal,
+    country,
+    salary_min,
+    salary_max,
+    created_at
+FROM offer_search;
 
 
 CREATE OR REPLACE VIEW vw_offers_by_source AS
 SELECT
-    s.name AS source,
-    COUNT(*) AS offers_count
-FROM job_offers j
-JOIN sources s ON j.source_id = s.source_id
-GROUP BY s.name
+    source,
+    SUM(offers_count)::BIGINT AS offers_count
+FROM mv_offer_rollups
+GROUP BY source
 ORDER BY offers_count DESC;
 
 
 CREATE OR REPLACE VIEW vw_offers_by_day AS
 SELECT
-    date_trunc('day', j.created_at) AS day,
-    COUNT(*) AS offers_count
-FROM job_offers j
+    day::TIMESTAMP AS day,
+    SUM(offers_count)::BIGINT AS offers_count
+FROM mv_offer_rollups
 GROUP BY day
 ORDER BY day;
 
@@ -45,7 +62,7 @@ SELECT
 FROM job_offers j
 LEFT JOIN locations l ON j.location_id = l.location_id
 LEFT JOIN (
-    SELECT job_id, description FROM france_travail_offers
+    SELECT job_id, description FROM adzuna_offers
     UNION ALL
     SELECT job_id, description FROM france_travail_offers
     UNION ALL
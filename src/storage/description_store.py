@@ -0,0 +1,130 @@
+"""
+Stockage compressé des descriptions d'offres, séparé des fichiers transformés.
+
+Les descriptions représentent l'essentiel du volume des offres. Elles sont écrites à côté
+de chaque fichier transformé, dans `processed_data/descriptions/` :
+- `<fichier>.bin` : descriptions compressées (zlib) mises bout à bout ;
+- `<fichier>.idx` : index JSON clé d'offre → [position, longueur] dans le .bin.
+
+Le .bin est projeté en mémoire (mmap) : seules les descriptions effectivement lues
+(offres chargées en base, offres renvoyées par l'API) sont décompressées.
+La clé d'une offre est "<source>:<external_id>", l'external_id seul n'étant unique que par source.
+"""
+
+import json
+import mmap
+import os
+import zlib
+
+from logger.logger import warning
+
+
+DESCRIPTIONS_DIRNAME = "descriptions"
+COMPRESSION_LEVEL = 6
+
+
+def offer_key(offer: dict) -> str:
+    """Clé d'une offre dans le stockage des descriptions."""
+    return f"{offer.get('source')}:{offer.get('external_id')}"
+
+
+def description_store_path(snapshot_path: str) -> str:
+    """Chemin (sans extension) du stockage associé à un fichier transformé."""
+    directory, filename = os.path.split(snapshot_path)
+    return os.path.join(directory, DESCRIPTIONS_DIRNAME, os.path.splitext(filename)[0])
+
+
+def write_description_store(store_path: str, descriptions) -> int:
+    """
+    Écrit le stockage des descriptions.
+
+    :param store_path: Chemin sans extension (voir `description_store_path`).
+    :param descriptions: Itérable de couples (clé d'offre, description) ; les descriptions vides sont ignorées.
+    :return: Nombre de descriptions écrites.
+    """
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    index = {}
+    offset = 0
+
+    # Écriture dans des fichiers temporaires puis renommage : un lecteur ne voit jamais de stockage partiel
+    with open(f"{store_path}.bin.tmp", "wb") as blob:
+        for key, description in descriptions:
+            if not description:
+                continue
+            compressed = zlib.compress(description.encode("utf-8"), COMPRESSION_LEVEL)
+            blob.write(compressed)
+            index[key] = [offset, len(compressed)]
+            offset += len(compressed)
+
+    with open(f"{store_path}.idx.tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+
+    os.replace(f"{store_path}.bin.tmp", f"{store_path}.bin")
+    os.replace(f"{store_path}.idx.tmp", f"{store_path}.idx")
+    return len(index)
+
+
+class DescriptionStore:
+    """
+    Lecteur du stockage des descriptions (mmap + index en mémoire).
+    Les lectures peuvent être faites depuis plusieurs threads.
+    """
+
+    def __init__(self, store_path: str):
+        with open(f"{store_path}.idx", "r", encoding="utf-8") as f:
+            self._index = json.load(f)
+
+        with open(f"{store_path}.bin", "rb") as blob:
+            # mmap refuse les fichiers vides
+            self._data = mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ) if self._index else b""
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def get(self, key: str, default=None):
+        """Retourne la description associée à une clé d'offre, ou `default`."""
+        entry = self._index.get(key)
+        if entry is None:
+            return default
+        offset, length = entry
+        return zlib.decompress(self._data[offset:offset + length]).decode("utf-8")
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_description_store(snapshot_path: str):
+    """
+    Ouvre le stockage des descriptions d'un fichier transformé.
+    Retourne None si le fichier a été produit avant le stockage séparé (descriptions en ligne).
+    """
+    store_path = description_store_path(snapshot_path)
+    if not os.path.exists(f"{store_path}.idx"):
+        return None
+    try:
+        return DescriptionStore(store_path)
+    except (OSError, ValueError) as e:
+        warning(f"Stockage des descriptions illisible pour {snapshot_path} : {e}")
+        return None
+
+
+def get_description(offer: dict, store=None) -> str:
+    """
+    Description d'une offre : lue dans le stockage si disponible,
+    sinon dans l'offre elle-même (anciens fichiers transformés).
+    """
+    if store is not None:
+        description = store.get(offer_key(offer))
+        if description is not None:
+            return description
+    return offer.get("description") or ""
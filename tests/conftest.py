@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Les modules du projet s'importent depuis ./src (comme l'API et le DAG Airflow)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
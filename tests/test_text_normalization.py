@@ -0,0 +1,102 @@
+"""
+Parité des fonctions de normalization.text (et de leurs variantes en cache) avec les anciennes
+fonctions `normalize_text` (transform.py) et `text_normalization` (recommender/data_preparation.py).
+"""
+
+import random
+
+import pytest
+
+from benchmarks.bench_text_normalization import (
+    CITIES,
+    COMPANIES,
+    DESCRIPTION,
+    TITLES,
+    legacy_normalize_text,
+    legacy_text_normalization,
+)
+from normalization.text import (
+    normalize_label,
+    normalize_label_cached,
+    normalize_search_text,
+    normalize_search_text_cached,
+)
+from recommender.data_preparation import prepare_offer_data
+
+
+LABEL_FUNCTIONS = [
+    pytest.param(normalize_label, id="normalize_label"),
+    pytest.param(normalize_label_cached, id="normalize_label_cached"),
+]
+SEARCH_FUNCTIONS = [
+    pytest.param(normalize_search_text, id="normalize_search_text"),
+    pytest.param(normalize_search_text_cached, id="normalize_search_text_cached"),
+]
+
+
+def bmp_sample():
+    """Chaque caractère du BMP (hors substituts), seul et entouré de texte."""
+    for codepoint in range(0x10000):
+        if 0xD800 <= codepoint <= 0xDFFF:
+            continue
+        ch = chr(codepoint)
+        yield from (ch, f"a{ch}b", f"Saint{ch}Paris 8")
+
+
+def random_sample(count: int = 20000):
+    rng = random.Random(0)
+    alphabet = "aàâäéèêëîïôöùûüçœæ AÉÈÇ-'’_/()&.,;:!?0123456789\t\nßøłđ"
+    for _ in range(count):
+        yield "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+
+
+CORPUS = CITIES + COMPANIES + TITLES + [DESCRIPTION, None, "", 42]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    for func in (normalize_label_cached, normalize_search_text_cached):
+        func.cache_clear()
+
+
+@pytest.mark.parametrize("normalize", LABEL_FUNCTIONS)
+def test_label_parity_bmp(normalize):
+    for text in bmp_sample():
+        assert normalize(text) == legacy_normalize_text(text), ascii(text)
+
+
+@pytest.mark.parametrize("normalize", SEARCH_FUNCTIONS)
+def test_search_text_parity_bmp(normalize):
+    for text in bmp_sample():
+        assert normalize(text) == legacy_text_normalization(text), ascii(text)
+
+
+@pytest.mark.parametrize("normalize", LABEL_FUNCTIONS)
+def test_label_parity_corpus(normalize):
+    for text in [*random_sample(), *CORPUS]:
+        assert normalize(text) == legacy_normalize_text(text), text
+
+
+@pytest.mark.parametrize("normalize", SEARCH_FUNCTIONS)
+def test_search_text_parity_corpus(normalize):
+    for text in [*random_sample(), *CORPUS]:
+        assert normalize(text) == legacy_text_normalization(text), text
+
+
+def test_prepare_offer_data_parity():
+    """Champs en cache ou non, chaque valeur normalisée est celle de l'ancienne text_normalization."""
+    offer = {
+        "external_id": "A-12 345", "title": TITLES[1], "company": COMPANIES[1], "location": CITIES[2],
+        "code_postal": "42000", "contract_type": "CDI ", "sector": "Informatique / Télécom",
+        "source": "france_travail", "created_at": "2025-07-08T10:00:00", "description": DESCRIPTION,
+        "salary_min": 45000, "apply_url": "https://exemple.fr/offre?id=1",
+    }
+    # Deux passages : le second lit les champs répétitifs depuis le cache
+    for _ in range(2):
+        cleaned = prepare_offer_data(offer)
+        for key, value in offer.items():
+            if key == "apply_url":
+                assert cleaned[key] == value
+            else:
+                assert cleaned[key] == legacy_text_normalization(value), key